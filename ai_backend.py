@@ -0,0 +1,214 @@
+"""
+Backends de génération de texte pour le coach IA et cache des réponses.
+
+Le backend est choisi via la variable d'environnement ``AI_BACKEND`` :
+- ``gemini`` (défaut) : appel à l'API Google Gemini
+- ``stub`` : réponse locale déterministe, sans réseau (benchmarks, tests, mode hors ligne)
+
+Les réponses sont mises en cache dans la table ``ai_responses``, indexées par
+une empreinte SHA-256 du prompt complet, avec une durée de vie et un nombre
+maximal d'entrées.
+"""
+
+import hashlib
+import os
+import random
+import time
+
+
+class GenerationBackend:
+    """Interface commune des backends de génération"""
+
+    name = 'base'
+
+    def generate(self, prompt):
+        """Retourne le texte complet généré pour le prompt"""
+        raise NotImplementedError
+
+    def stream(self, prompt):
+        """Génère le texte par morceaux (par défaut : un seul morceau)"""
+        yield self.generate(prompt)
+
+
+class GeminiBackend(GenerationBackend):
+    """Génération via l'API Google Gemini"""
+
+    name = 'gemini'
+
+    def __init__(self, model_name='gemini-flash-latest', api_key=None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+        self.model_name = model_name
+        self._genai = genai
+
+    def generate(self, prompt):
+        model = self._genai.GenerativeModel(self.model_name)
+        response = model.generate_content(prompt)
+        return response.text
+
+    def stream(self, prompt):
+        model = self._genai.GenerativeModel(self.model_name)
+        for chunk in model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend(GenerationBackend):
+    """Backend local déterministe : le même prompt produit toujours le même programme"""
+
+    name = 'stub'
+
+    EXERCICES = [
+        ("Développé couché (Barre)", "6-8"),
+        ("Squat (Barre)", "6-8"),
+        ("Soulevé de terre roumain", "8-10"),
+        ("Tractions", "8-10"),
+        ("Rowing barre", "8-10"),
+        ("Développé militaire (Haltères)", "8-10"),
+        ("Presse à cuisses", "10-12"),
+        ("Élévations latérales", "12-15"),
+        ("Curl biceps (Haltères)", "10-12"),
+        ("Extensions triceps poulie (Corde)", "10-12"),
+    ]
+
+    def __init__(self, seances=3, exercices_par_seance=4, delay=0.0):
+        self.seances = seances
+        self.exercices_par_seance = exercices_par_seance
+        self.delay = delay
+
+    def generate(self, prompt):
+        return ''.join(self.stream(prompt))
+
+    def stream(self, prompt):
+        rnd = random.Random(hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+        yield "Voici votre programme pour les 5 prochaines semaines (4 semaines d'entrainement et 1 semaine de deload).\n\n"
+        for numero in range(1, self.seances + 1):
+            exercices = rnd.sample(self.EXERCICES, self.exercices_par_seance)
+            lignes = []
+            bloc = []
+            for nom, reps in exercices:
+                series = rnd.randint(3, 4)
+                lignes.append(f"- {nom} : {series} x {reps} reps @ RIR 2-3, 2 min repos")
+                bloc.append(f"EXERCICE: {nom} | SERIES: {series} | REPS: {reps} | NOTES: RIR 2-3, repos 2 min")
+            if self.delay:
+                time.sleep(self.delay)
+            yield (
+                f"SEANCE {numero}: Séance {chr(64 + numero)}\n\n"
+                + '\n'.join(lignes)
+                + "\n\n[PARSE_START]\n"
+                + '\n'.join(bloc)
+                + "\n[PARSE_END]\n\n"
+            )
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+
+def get_backend(name=None):
+    """Instancie le backend demandé (ou celui de AI_BACKEND)"""
+    name = (name or os.getenv("AI_BACKEND", "gemini")).lower()
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Backend IA inconnu: {name} (disponibles: {', '.join(BACKENDS)})")
+
+
+class ResponseCache:
+    """Cache persistant (SQLite) des réponses du modèle, avec TTL et éviction LRU"""
+
+    def __init__(self, ttl=7 * 24 * 3600, max_entries=200):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(backend, prompt):
+        """Empreinte du prompt complet (backend inclus pour ne pas mélanger stub et Gemini)"""
+        return hashlib.sha256(f"{backend.name}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, conn, key):
+        now = time.time()
+        with conn:
+            row = conn.execute(
+                "SELECT response FROM ai_responses WHERE prompt_hash = ? AND created_at >= ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE ai_responses SET last_used = ? WHERE prompt_hash = ?", (now, key))
+        return row[0]
+
+    def set(self, conn, key, backend, response):
+        now = time.time()
+        with conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO ai_responses (prompt_hash, backend, response, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            """, (key, backend.name, response, now, now))
+            self.evict(conn, now)
+
+    def evict(self, conn, now=None):
+        """Supprime les réponses expirées puis les moins récemment utilisées au-delà de max_entries"""
+        now = now or time.time()
+        conn.execute("DELETE FROM ai_responses WHERE created_at < ?", (now - self.ttl,))
+        conn.execute("""
+            DELETE FROM ai_responses WHERE prompt_hash IN (
+                SELECT prompt_hash FROM ai_responses
+                ORDER BY last_used DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+
+def generate_cached(connection, backend, cache, prompt):
+    """
+    Retourne la réponse du modèle pour le prompt, depuis le cache si possible.
+
+    Args:
+        connection: fonction sans argument retournant un gestionnaire de
+            contexte qui fournit une connexion (db.pooled_connection) ; elle
+            n'est ouverte que pour lire puis écrire le cache, jamais pendant
+            l'appel au modèle
+
+    Returns:
+        tuple: (texte, depuis_le_cache)
+    """
+    key = cache.make_key(backend, prompt)
+    with connection() as conn:
+        cached = cache.get(conn, key)
+    if cached is not None:
+        return cached, True
+
+    response = backend.generate(prompt)
+    with connection() as conn:
+        cache.set(conn, key, backend, response)
+    return response, False
+
+
+def stream_cached(connection, backend, cache, prompt):
+    """
+    Variante de generate_cached qui produit le texte au fil de la génération.
+
+    Une réponse en cache est renvoyée en un seul morceau ; sinon les morceaux
+    du backend sont transmis au fur et à mesure, puis la réponse complète est
+    mise en cache.
+
+    Yields:
+        tuple: (morceau de texte, depuis_le_cache)
+    """
+    key = cache.make_key(backend, prompt)
+    with connection() as conn:
+        cached = cache.get(conn, key)
+    if cached is not None:
+        yield cached, True
+        return
+
+    chunks = []
+    for chunk in backend.stream(prompt):
+        chunks.append(chunk)
+        yield chunk, False
+    with connection() as conn:
+        cache.set(conn, key, backend, ''.join(chunks))
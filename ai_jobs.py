@@ -0,0 +1,181 @@
+"""
+Génération IA asynchrone.
+
+Une demande au coach IA devient un « job » exécuté par un pool de threads en
+arrière-plan : le worker WSGI répond immédiatement avec l'identifiant du job,
+puis le client interroge son état (polling) ou reçoit le texte au fil de la
+génération via Server-Sent Events.
+"""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_backend import stream_cached
+from db import pooled_connection
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_ERROR = 'error'
+
+
+class JobQueueFull(RuntimeError):
+    """Toutes les places sont prises par des jobs en attente ou en cours"""
+
+
+class GenerationJob:
+    """État d'une génération : texte partiel, résultat final ou erreur"""
+
+    def __init__(self, prompt):
+        self.id = uuid.uuid4().hex
+        self.prompt = prompt
+        self.status = JOB_PENDING
+        self.chunks = []
+        self.html = None
+        self.error = None
+        self.from_cache = False
+        self.created_at = time.time()
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    @property
+    def text(self):
+        return ''.join(self.chunks)
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_ERROR)
+
+    def _update(self, **changes):
+        with self._changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def append(self, chunk):
+        with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    def wait_for_update(self, seen_chunks, timeout):
+        """
+        Attend de nouveaux morceaux de texte ou la fin du job.
+
+        Returns:
+            tuple: (nouveaux morceaux depuis seen_chunks, job terminé)
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.chunks) > seen_chunks or self.finished, timeout=timeout)
+            return self.chunks[seen_chunks:], self.finished
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'text': self.text,
+            'html': self.html,
+            'error': self.error,
+            'from_cache': self.from_cache,
+        }
+
+
+class JobManager:
+    """Exécute les jobs de génération dans un pool de threads borné"""
+
+    def __init__(self, app, backend, cache, render, max_workers=4, max_jobs=200, retention=15 * 60):
+        """
+        Args:
+            app: application Flask (pour ouvrir un contexte et accéder à la base)
+            backend: GenerationBackend utilisé pour générer le texte
+            cache: ResponseCache des réponses du modèle
+            render: fonction texte -> HTML appliquée au résultat final
+        """
+        self.app = app
+        self.backend = backend
+        self.cache = cache
+        self.render = render
+        self.max_jobs = max_jobs
+        self.retention = retention
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-job')
+
+    def submit(self, prompt):
+        """
+        Crée un job pour le prompt et le place dans la file d'exécution.
+
+        Raises:
+            JobQueueFull: max_jobs jobs sont déjà en attente ou en cours
+        """
+        job = GenerationJob(prompt)
+        with self._lock:
+            self._purge()
+            if len(self._jobs) >= self.max_jobs:
+                raise JobQueueFull(f"{len(self._jobs)} générations déjà en attente ou en cours")
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _purge(self):
+        """
+        Oublie les jobs terminés depuis longtemps, puis les plus anciens jobs
+        terminés si la limite est atteinte. Un job en attente ou en cours n'est
+        jamais oublié : son client le suit encore.
+        """
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        excess = len(self._jobs) - self.max_jobs + 1
+        if excess > 0:
+            finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.created_at)
+            for job in finished[:excess]:
+                del self._jobs[job.id]
+
+    def _run(self, job):
+        job._update(status=JOB_RUNNING)
+        try:
+            with self.app.app_context():
+                # Connexion empruntée seulement pour lire et écrire le cache, pas pendant le flux
+                connection = lambda: pooled_connection(self.app)
+                for chunk, from_cache in stream_cached(connection, self.backend, self.cache, job.prompt):
+                    job.from_cache = from_cache
+                    job.append(chunk)
+            job._update(html=self.render(job.text), status=JOB_DONE, finished_at=time.time())
+        except Exception as e:
+            print(f"Erreur API IA ({self.backend.name}) dans le job {job.id}: {e}")
+            job._update(error=str(e), status=JOB_ERROR, finished_at=time.time())
+
+
+def sse_event(event, data):
+    """Formate un événement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_job_events(job, keepalive=15.0):
+    """Générateur SSE : un événement 'chunk' par morceau de texte, puis 'done' ou 'error'"""
+    seen = 0
+    while True:
+        chunks, finished = job.wait_for_update(seen, timeout=keepalive)
+        for chunk in chunks:
+            yield sse_event('chunk', {'text': chunk})
+        seen += len(chunks)
+        if finished:
+            if job.status == JOB_DONE:
+                yield sse_event('done', {'html': job.html, 'text': job.text})
+            else:
+                yield sse_event('error', {'error': job.error})
+            return
+        if not chunks:
+            # Commentaire SSE pour garder la connexion ouverte derrière les proxys
+            yield ": keep-alive\n\n"
@@ -0,0 +1,367 @@
+"""
+Calculs vectorisés sur des séries en colonnes (1RM, tonnage, records).
+
+Les séries sont chargées une fois dans des colonnes homogènes (exercice du
+catalogue, séance, date, répétitions, charge) et les calculs portent sur des
+colonnes entières au lieu de mettre à jour des dictionnaires ligne par ligne.
+
+NumPy est utilisé s'il est installé (dépendance facultative) ; sinon les
+colonnes sont des ``array`` de la bibliothèque standard (mémoire compacte,
+boucles Python) et les résultats sont identiques.
+
+Le module sert à reconstruire ``exercise_stats`` et les maxima des records
+(stats.rebuild_exercise_stats, records.rebuild_record_maxima), au contexte du
+coach IA (stats.aggregate_training_history) et aux totaux de la page d'une
+séance. Le 1RM d'Epley y est celui de ``stats.calculate_1rm`` (arrondi à
+0,1 kg, voir rounded_1rm) : les records sont comparés exactement comme dans
+le reste de l'application.
+"""
+
+from array import array
+
+from stats import calculate_1rm
+
+try:
+    import numpy as np
+except ImportError:  # dépendance facultative
+    np = None
+
+BACKEND = 'numpy' if np is not None else 'array'
+
+FORMULAS = ('epley', 'brzycki')
+
+# Au-delà, la formule de Brzycki n'a plus de sens (dénominateur nul ou négatif)
+BRZYCKI_MAX_REPS = 36
+
+
+class SetColumns:
+    """Séries en colonnes, dans l'ordre chronologique (date de séance, puis saisie)"""
+
+    __slots__ = ('exercise_ids', 'session_ids', 'dates', 'reps', 'weights')
+
+    def __init__(self, rows):
+        """rows: itérable de tuples (catalog_id, session_id, date, reps, weight)"""
+        rows = rows if isinstance(rows, list) else list(rows)
+        # Une colonne à la fois : zip(*rows) créerait des millions de tuples (coûteux pour le GC)
+        self.exercise_ids = _int_column(rows, 0)
+        self.session_ids = _int_column(rows, 1)
+        self.dates = [row[2] for row in rows]
+        self.reps = _int_column(rows, 3)
+        self.weights = _float_column(rows, 4)
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def _int_column(rows, position):
+    values = (row[position] for row in rows)
+    if np is not None:
+        return np.fromiter(values, dtype=np.int64, count=len(rows))
+    return array('q', values)
+
+
+def _float_column(rows, position):
+    values = (row[position] for row in rows)
+    if np is not None:
+        return np.fromiter(values, dtype=np.float64, count=len(rows))
+    return array('d', values)
+
+
+def load_sets(cur, catalog_id=None, session_id=None, valid_only=True):
+    """
+    Charge les séries des exercices du catalogue en colonnes.
+
+    Args:
+        catalog_id: limiter à un exercice du catalogue
+        session_id: limiter à une séance
+        valid_only: ne garder que les séries avec reps et charge > 0
+    """
+    where = ["e.catalog_id IS NOT NULL"]
+    if valid_only:
+        where += ["st.reps > 0", "st.weight > 0"]
+    params = []
+    if catalog_id is not None:
+        where.append("e.catalog_id = ?")
+        params.append(catalog_id)
+    if session_id is not None:
+        where.append("e.session_id = ?")
+        params.append(session_id)
+    cur.execute(f"""
+        SELECT e.catalog_id, e.session_id, s.date, st.reps, st.weight
+        FROM sets st
+        JOIN exercises e ON e.id = st.exercise_id
+        JOIN sessions s ON s.id = e.session_id
+        WHERE {' AND '.join(where)}
+        ORDER BY s.date, s.id, st.id
+    """, params)
+    return SetColumns(cur.fetchall())
+
+
+def _estimate(weight, reps, formula):
+    if weight <= 0 or reps <= 0:
+        return 0.0
+    if reps == 1:
+        return float(weight)
+    if formula == 'epley':
+        return weight * (1 + reps / 30)
+    if reps > BRZYCKI_MAX_REPS:
+        return 0.0
+    return weight * 36 / (37 - reps)
+
+
+def estimate_1rm(weights, reps, formula='epley'):
+    """
+    1RM estimé pour chaque série (non arrondi).
+
+    formula: 'epley' (celle de calculate_1rm) ou 'brzycki' ; une série à une
+    répétition vaut sa charge, une série invalide vaut 0.
+    """
+    if formula not in FORMULAS:
+        raise ValueError(f"formule inconnue: {formula} (attendu: {', '.join(FORMULAS)})")
+
+    if np is None:
+        return array('d', (_estimate(w, r, formula) for w, r in zip(weights, reps)))
+
+    w = np.asarray(weights, dtype=np.float64)
+    r = np.asarray(reps, dtype=np.float64)
+    if formula == 'epley':
+        estimates = w * (1 + r / 30)
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimates = np.where(r <= BRZYCKI_MAX_REPS, w * 36 / (37 - r), 0.0)
+    estimates = np.where(r == 1, w, estimates)
+    return np.where((w > 0) & (r > 0), estimates, 0.0)
+
+
+def rounded_1rm(weights, reps):
+    """
+    1RM d'Epley de chaque série, tel que calculé par stats.calculate_1rm.
+
+    calculate_1rm n'est appelée qu'une fois par couple (charge, reps) distinct.
+    """
+    if np is None:
+        known = {pair: calculate_1rm(*pair) for pair in set(zip(weights, reps))}
+        return array('d', map(known.__getitem__, zip(weights, reps)))
+
+    weights = np.asarray(weights, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.int64)
+    first, inverse = _pair_codes(weights, reps)
+    distinct = np.fromiter((calculate_1rm(float(weights[i]), int(reps[i])) for i in first.tolist()),
+                           dtype=np.float64, count=len(first))
+    return distinct[inverse]
+
+
+def _pair_codes(first, second):
+    """
+    Couples (first, second) distincts : (position d'une ligne de chaque couple,
+    numéro du couple de chaque ligne). Deux np.unique 1D au lieu d'un
+    np.unique(axis=0), beaucoup plus lent.
+    """
+    _, first_codes = np.unique(first, return_inverse=True)
+    _, second_codes = np.unique(second, return_inverse=True)
+    codes = first_codes.reshape(-1).astype(np.int64) * (int(second_codes.max(initial=0)) + 1) + second_codes.reshape(-1)
+    _, positions, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    return positions, inverse.reshape(-1)
+
+
+def set_volumes(weights, reps):
+    """Tonnage de chaque série (reps × charge)"""
+    if np is None:
+        return array('d', (r * w for w, r in zip(weights, reps)))
+    return np.asarray(reps, dtype=np.float64) * np.asarray(weights, dtype=np.float64)
+
+
+def total_tonnage(weights, reps):
+    """Tonnage total (somme de reps × charge)"""
+    if np is None:
+        return sum(r * w for w, r in zip(weights, reps))
+    return float(np.dot(np.asarray(reps, dtype=np.float64), np.asarray(weights, dtype=np.float64)))
+
+
+def _segments(groups):
+    """Tri stable par groupe : (ordre, [(groupe, début, fin)]) ; l'ordre chronologique est conservé"""
+    order = np.argsort(groups, kind='stable')
+    if not len(order):
+        return order, []
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    return order, [(int(sorted_groups[start]), int(start), int(end)) for start, end in zip(starts, ends)]
+
+
+def group_max(values, groups):
+    """
+    Maximum par groupe et position de la série correspondante.
+
+    À égalité, la série la plus récente l'emporte (comme pour exercise_stats).
+
+    Returns:
+        dict: {groupe: (maximum, indice de la série)}
+    """
+    if np is None:
+        best = {}
+        for index, (group, value) in enumerate(zip(groups, values)):
+            current = best.get(group)
+            if current is None or value >= current[0]:
+                best[group] = (value, index)
+        return best
+
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    order, segments = _segments(groups)
+    sorted_values = values[order]
+    best = {}
+    for group, start, end in segments:
+        segment = sorted_values[start:end]
+        # Dernière occurrence du maximum = série la plus récente
+        position = end - 1 - int(np.argmax(segment[::-1]))
+        best[group] = (float(sorted_values[position]), int(order[position]))
+    return best
+
+
+def running_records(values, groups):
+    """
+    Records successifs : True pour chaque série qui bat strictement le meilleur
+    résultat précédent de son groupe (la première série d'un groupe compte).
+    """
+    if np is None:
+        best = {}
+        records = array('b')
+        for group, value in zip(groups, values):
+            is_record = group not in best or value > best[group]
+            if is_record:
+                best[group] = value
+            records.append(is_record)
+        return records
+
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    records = np.zeros(len(values), dtype=bool)
+    order, segments = _segments(groups)
+    sorted_values = values[order]
+    sorted_records = np.zeros(len(values), dtype=bool)
+    for _, start, end in segments:
+        segment = sorted_values[start:end]
+        best_so_far = np.maximum.accumulate(segment)
+        sorted_records[start] = True
+        sorted_records[start + 1:end] = segment[1:] > best_so_far[:-1]
+    records[order] = sorted_records
+    return records
+
+
+def group_sum(values, groups):
+    """Somme par groupe : {groupe: total}"""
+    if np is None:
+        totals = {}
+        for group, value in zip(groups, values):
+            totals[group] = totals.get(group, 0.0) + value
+        return totals
+
+    keys, inverse = np.unique(np.asarray(groups), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.asarray(values, dtype=np.float64), minlength=len(keys))
+    return dict(zip(keys.tolist(), totals.tolist()))
+
+
+def session_tonnage(columns):
+    """Tonnage par séance : {session_id: tonnage}"""
+    return group_sum(set_volumes(columns.weights, columns.reps), columns.session_ids)
+
+
+def exercise_summary(columns, formula='epley'):
+    """
+    Statistiques par groupe (exercice) en quelques passes sur les colonnes.
+
+    Les colonnes de exercise_stats (voir stats.STATS_COLUMNS) plus le tonnage,
+    la dernière série en date et le nombre de fois où le meilleur 1RM a été
+    battu. À égalité, la série la plus récente reste le record.
+
+    Returns:
+        dict: {catalog_id: stats}
+    """
+    if formula == 'epley':
+        one_rm_values = rounded_1rm(columns.weights, columns.reps)
+    else:
+        one_rm_values = estimate_1rm(columns.weights, columns.reps, formula)
+    volumes = set_volumes(columns.weights, columns.reps)
+
+    one_rm = group_max(one_rm_values, columns.exercise_ids)
+    best_volume = group_max(volumes, columns.exercise_ids)
+    heaviest = group_max(columns.weights, columns.exercise_ids)
+    tonnage = group_sum(volumes, columns.exercise_ids)
+    set_counts = group_sum(_ones(len(columns)), columns.exercise_ids)
+    improvements = group_sum(running_records(one_rm_values, columns.exercise_ids), columns.exercise_ids)
+    # Séries triées par date : la dernière série d'un exercice donne sa dernière date
+    last_index = group_max(_positions(len(columns)), columns.exercise_ids)
+
+    summary = {}
+    for exercise_id, (best_1rm, index) in one_rm.items():
+        best_reps, best_weight = int(columns.reps[index]), float(columns.weights[index])
+        volume_total, volume_index = best_volume[exercise_id]
+        last = last_index[exercise_id][1]
+        summary[int(exercise_id)] = {
+            'max_weight': float(heaviest[exercise_id][0]),
+            'max_1rm': float(best_1rm) if formula == 'epley' else round(best_1rm, 1),
+            'best_1rm_reps': best_reps,
+            'best_1rm_weight': best_weight,
+            'best_volume_reps': int(columns.reps[volume_index]),
+            'best_volume_weight': float(columns.weights[volume_index]),
+            'best_volume_total': float(volume_total),
+            'total_sets': int(set_counts[exercise_id]),
+            'has_actual_1rm': best_reps == 1,
+            'last_date': columns.dates[last],
+            'tonnage': tonnage[exercise_id],
+            'last_reps': int(columns.reps[last]),
+            'last_weight': float(columns.weights[last]),
+            # La première série d'un exercice n'est pas une amélioration
+            'improvements': int(improvements[exercise_id]) - 1,
+        }
+    return summary
+
+
+def rep_records(columns):
+    """Meilleur nombre de répétitions par exercice et par charge : {(catalog_id, charge): reps}"""
+    if np is None:
+        best = {}
+        for key, reps in zip(zip(columns.exercise_ids, columns.weights), columns.reps):
+            if reps > best.get(key, 0):
+                best[key] = reps
+        return best
+
+    positions, inverse = _pair_codes(columns.exercise_ids, columns.weights)
+    best = np.zeros(len(positions), dtype=np.int64)
+    np.maximum.at(best, inverse, columns.reps)
+    kept = best > 0
+    return dict(zip(
+        zip(columns.exercise_ids[positions][kept].tolist(), columns.weights[positions][kept].tolist()),
+        best[kept].tolist(),
+    ))
+
+
+def best_session_volumes(columns):
+    """Plus gros tonnage de chaque exercice sur une même séance : {catalog_id: tonnage}"""
+    volumes = set_volumes(columns.weights, columns.reps)
+    if np is None:
+        per_session = {}
+        for key, volume in zip(zip(columns.exercise_ids, columns.session_ids), volumes):
+            per_session[key] = per_session.get(key, 0.0) + volume
+        best = {}
+        for (exercise_id, _), volume in per_session.items():
+            if volume > best.get(exercise_id, 0.0):
+                best[exercise_id] = volume
+        return best
+
+    positions, inverse = _pair_codes(columns.exercise_ids, columns.session_ids)
+    totals = np.bincount(inverse, weights=volumes, minlength=len(positions))
+    return {exercise_id: volume for exercise_id, (volume, _) in group_max(totals, columns.exercise_ids[positions]).items()}
+
+
+def _ones(count):
+    if np is not None:
+        return np.ones(count, dtype=np.float64)
+    return array('d', [1.0]) * count
+
+
+def _positions(count):
+    if np is not None:
+        return np.arange(count, dtype=np.float64)
+    return array('d', range(count))
@@ -1,223 +1,91 @@
 import os
-from flask import Flask, render_template, request, jsonify, redirect, flash, session
-import google.generativeai as genai
+from flask import Flask, Response, render_template, request, jsonify, redirect, flash, session, url_for
 from dotenv import load_dotenv
 import sqlite3
 import markdown
 import json
+import logging
+import re
+from contextlib import closing
 from datetime import datetime
 
+import db
+import metrics
+from ai_backend import ResponseCache, generate_cached, get_backend
+from ai_jobs import JobManager, JobQueueFull, stream_job_events
+from analytics import SetColumns, exercise_summary, total_tonnage
+from cache import LRUCache, bump_data_version, get_data_version
+from dates import format_date, format_datetime, to_stored_date
+from db import get_db
+from exercise_catalog import ExerciseIndex, find_catalog_id, resolve_catalog_ids
+from migrations import SCHEMA_VERSION, run_migrations
+from page_cache import PageCache, no_store_flashed_pages
+from records import format_record, recent_records
+from programme_parser import parse_programme_ia_robuste, strip_html
+from programme_store import (
+    clone_next_mesocycle, duplicate_programme, refresh_programme_progress, refresh_seance_programme_progress,
+)
+from session_store import (
+    DEFAULT_PAGE_SIZE, import_sessions, list_sessions, parse_cursor, save_session, validate_client_id,
+    validate_exercises,
+)
+from session_templates import load_programme_template, load_session_template
+from stats import aggregate_training_history, load_exercise_stats
+from timeline import BUCKETS, DEFAULT_BUCKET, DEFAULT_POINT_BUDGET, MAX_POINT_BUDGET, parse_day, progress_series
+
 load_dotenv() # Load environment variables from .env
 base_dir = os.path.dirname(os.path.abspath(__file__))
 app = Flask(__name__, template_folder=os.path.join(base_dir, 'templates'), static_folder=os.path.join(base_dir, 'static'))
 app.secret_key = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
+app.config['DATABASE'] = os.getenv("DATABASE_PATH", db.DEFAULT_DATABASE)
+db.init_app(app)
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Latences par route, temps SQL / rendu / IA et endpoint /metrics (désactivés par défaut)
+metrics_registry = None
+if os.getenv("METRICS_ENABLED"):
+    metrics_registry = metrics.init_app(app)
 
-def format_date(date_string):
-    """Convertit une date au format DD-MM-YYYY"""
-    if not date_string:
-        return ""
-    
-    try:
-        # Essayer différents formats de date
-        for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y']:
-            try:
-                dt = datetime.strptime(str(date_string)[:19], fmt)
-                return dt.strftime('%d-%m-%Y')
-            except ValueError:
-                continue
-        
-        # Si aucun format ne fonctionne, essayer de prendre juste les premiers caractères
-        if len(str(date_string)) >= 10:
-            # Format YYYY-MM-DD
-            parts = str(date_string)[:10].split('-')
-            if len(parts) == 3:
-                return f"{parts[2]}-{parts[1]}-{parts[0]}"
-        
-        return str(date_string)[:10]
-    except Exception as e:
-        print(f"Erreur de formatage de date: {e}")
-        return str(date_string)[:10]
+# Traces détaillées du parser de programmes IA (désactivées par défaut)
+if os.getenv("PARSER_DEBUG"):
+    logging.basicConfig()
+    logging.getLogger('programme_parser').setLevel(logging.DEBUG)
 
-def format_datetime(date_string):
-    """Convertit une date au format DD-MM-YYYY HH:MM"""
-    if not date_string:
-        return ""
-    
-    try:
-        # Essayer différents formats de date
-        for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y %H:%M:%S']:
-            try:
-                dt = datetime.strptime(str(date_string)[:19], fmt)
-                return dt.strftime('%d-%m-%Y %H:%M')
-            except ValueError:
-                continue
-        
-        return str(date_string)[:16]
-    except Exception as e:
-        print(f"Erreur de formatage de datetime: {e}")
-        return str(date_string)[:16]
+# Backend de génération (Gemini par défaut, "stub" local via AI_BACKEND) et cache des réponses
+ai_backend = get_backend()
+if metrics_registry is not None:
+    ai_backend = metrics.InstrumentedBackend(ai_backend, metrics_registry)
+response_cache = ResponseCache(
+    ttl=int(os.getenv("AI_CACHE_TTL", 7 * 24 * 3600)),
+    max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", 200)),
+)
+
+# Index en mémoire des noms d'exercices (autocomplétion), chargé au premier appel
+exercise_index = ExerciseIndex()
+
+# Nombre maximal de séances par requête POST /api/sessions
+API_MAX_SESSIONS = int(os.getenv("API_MAX_SESSIONS", 10000))
+
+# Résumés d'historique pour le prompt IA, indexés par version des données
+history_cache = LRUCache(max_entries=16, max_bytes=1024 * 1024)
+
+# Templates de séance par nom, indexés par version des données
+template_cache = LRUCache(max_entries=64, max_bytes=1024 * 1024)
+
+# Pages rendues (accueil, programme, progression), indexées par version des données
+page_cache = PageCache(max_entries=32, max_bytes=4 * 1024 * 1024)
+app.after_request(no_store_flashed_pages)
 
 # Ajouter les filtres Jinja2
 app.jinja_env.filters['format_date'] = format_date
 app.jinja_env.filters['format_datetime'] = format_datetime
 
-def migrate_database_schema(conn):
-    """Migre l'ancienne structure de base de données vers la nouvelle"""
-    try:
-        print("🔄 Début de la migration de la base de données...")
-        cursor = conn.cursor()
-        
-        # 1. Créer une sauvegarde des données existantes
-        cursor.execute("SELECT * FROM exercises")
-        old_exercises = cursor.fetchall()
-        print(f"📊 {len(old_exercises)} exercices à migrer")
-        
-        # 2. Créer la nouvelle table exercises temporaire
-        cursor.execute('''
-            CREATE TABLE exercises_new (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                exercise_name TEXT NOT NULL,
-                FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 3. Créer la table sets si elle n'existe pas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                exercise_id INTEGER NOT NULL,
-                set_number INTEGER NOT NULL,
-                reps INTEGER NOT NULL,
-                weight REAL NOT NULL,
-                FOREIGN KEY (exercise_id) REFERENCES exercises (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 4. Migrer les données vers la nouvelle structure
-        for old_exercise in old_exercises:
-            # old_exercise: (id, session_id, exercise_name, sets, reps, weight)
-            old_id, session_id, exercise_name, sets_count, reps, weight = old_exercise
-            
-            # Créer le nouvel exercice (sans sets, reps, weight)
-            cursor.execute('''
-                INSERT INTO exercises_new (session_id, exercise_name) 
-                VALUES (?, ?)
-            ''', (session_id, exercise_name))
-            
-            new_exercise_id = cursor.lastrowid
-            
-            # Créer les séries individuelles
-            if sets_count and reps and weight:
-                for set_num in range(1, int(sets_count) + 1):
-                    cursor.execute('''
-                        INSERT INTO sets (exercise_id, set_number, reps, weight)
-                        VALUES (?, ?, ?, ?)
-                    ''', (new_exercise_id, set_num, int(reps), float(weight)))
-        
-        # 5. Remplacer l'ancienne table par la nouvelle
-        cursor.execute("DROP TABLE exercises")
-        cursor.execute("ALTER TABLE exercises_new RENAME TO exercises")
-        
-        conn.commit()
-        print("✅ Migration terminée avec succès")
-        
-    except Exception as e:
-        print(f"❌ Erreur durant la migration: {e}")
-        conn.rollback()
-        raise
-
 def init_db():
-    """Initialise la base de données avec gestion d'erreur"""
+    """Initialise la base de données et applique les migrations en attente"""
     try:
-        with sqlite3.connect('database.db') as conn:
-            # Vérifier si migration est nécessaire (ancienne structure avec sets dans exercises)
-            cursor = conn.cursor()
-            try:
-                cursor.execute("PRAGMA table_info(exercises)")
-                columns = [col[1] for col in cursor.fetchall()]
-                if 'sets' in columns or 'reps' in columns or 'weight' in columns:
-                    print("🔄 Migration de la base de données détectée...")
-                    migrate_database_schema(conn)
-            except sqlite3.OperationalError:
-                # Table n'existe pas encore, c'est normal
-                pass
-            
-            # Table pour les séances
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Table pour les exercices dans chaque séance (sans sets, reps, weight)
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS exercises (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id INTEGER NOT NULL,
-                    exercise_name TEXT NOT NULL,
-                    FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Table pour les séries individuelles
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS sets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exercise_id INTEGER NOT NULL,
-                    set_number INTEGER NOT NULL,
-                    reps INTEGER NOT NULL,
-                    weight REAL NOT NULL,
-                    FOREIGN KEY (exercise_id) REFERENCES exercises (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Table pour les programmes d'entraînement
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS programmes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nom TEXT NOT NULL,
-                    description TEXT,
-                    actif INTEGER DEFAULT 0,
-                    archive INTEGER DEFAULT 0,
-                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Table pour les séances d'un programme
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS programme_seances (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    programme_id INTEGER NOT NULL,
-                    ordre INTEGER NOT NULL,
-                    nom_seance TEXT NOT NULL,
-                    description TEXT,
-                    completee INTEGER DEFAULT 0,
-                    date_completion TIMESTAMP,
-                    FOREIGN KEY (programme_id) REFERENCES programmes (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Table pour les exercices des séances de programme
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS programme_exercices (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    seance_id INTEGER NOT NULL,
-                    ordre INTEGER NOT NULL,
-                    nom_exercice TEXT NOT NULL,
-                    series INTEGER,
-                    repetitions TEXT,
-                    notes TEXT,
-                    FOREIGN KEY (seance_id) REFERENCES programme_seances (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            conn.commit()
-            print("✅ Base de données initialisée avec succès")
+        with closing(db.connect(app.config['DATABASE'])) as conn:
+            applied = run_migrations(conn)
+            if applied:
+                print(f"✅ Base de données initialisée avec succès (schéma v{SCHEMA_VERSION})")
             
     except sqlite3.Error as e:
         print(f"❌ Erreur lors de l'initialisation de la base de données: {e}")
@@ -225,48 +93,32 @@ def init_db():
         print(f"❌ Erreur inattendue lors de l'initialisation: {e}")
 
 @app.route('/')
+@page_cache.cached
 def home():
     """Page d'accueil - affiche la prochaine séance du programme actif"""
     programme_actif = None
     prochaine_seance = None
+    derniers_records = []
     
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
             
+            # Derniers records personnels (table d'événements, sans parcourir l'historique)
+            derniers_records = [
+                (format_record(*record[:6]), record[6]) for record in recent_records(cur, limit=5)
+            ]
+            
             # Récupérer le programme actif
             cur.execute("SELECT * FROM programmes WHERE actif = 1 LIMIT 1")
             programme_actif = cur.fetchone()
             
             if programme_actif:
-                programme_id = programme_actif[0]
-                
-                # Trouver la dernière séance complétée (ordre le plus élevé)
-                cur.execute("""
-                    SELECT MAX(ordre) FROM programme_seances 
-                    WHERE programme_id = ? AND completee = 1
-                """, (programme_id,))
-                
-                derniere_completee = cur.fetchone()[0]
-                
-                if derniere_completee is None:
-                    # Aucune séance complétée, prendre la première séance
-                    cur.execute("""
-                        SELECT * FROM programme_seances 
-                        WHERE programme_id = ? 
-                        ORDER BY ordre ASC 
-                        LIMIT 1
-                    """, (programme_id,))
-                else:
-                    # Prendre la séance suivant la dernière complétée
-                    cur.execute("""
-                        SELECT * FROM programme_seances 
-                        WHERE programme_id = ? AND ordre > ?
-                        ORDER BY ordre ASC 
-                        LIMIT 1
-                    """, (programme_id, derniere_completee))
-                
-                prochaine_seance = cur.fetchone()
+                # Séance suivante maintenue sur le programme (refresh_programme_progress)
+                next_seance_id = programme_actif[8]
+                if next_seance_id is not None:
+                    cur.execute("SELECT * FROM programme_seances WHERE id = ?", (next_seance_id,))
+                    prochaine_seance = cur.fetchone()
                 
     except sqlite3.Error as e:
         print(f"❌ Erreur lors de la récupération du programme: {e}")
@@ -275,106 +127,77 @@ def home():
     
     return render_template('index.html', 
                          programme_actif=programme_actif, 
-                         prochaine_seance=prochaine_seance)
+                         prochaine_seance=prochaine_seance,
+                         derniers_records=derniers_records)
 
-@app.route('/ai', methods=['GET', 'POST'])
-def ai_coach():
-    """Génération de programmes d'entraînement avec l'IA"""
-    training_program = None
-    training_program_html = None
-    if request.method == 'POST':
-        user_prompt = request.form['prompt']
+def build_history_context(cur):
+    """Construit le résumé de l'historique d'entraînement injecté dans le prompt du coach IA"""
+    history_context = "\n## 📊 HISTORIQUE DES ENTRAÎNEMENTS\n\n"
+    
+    # Récupérer les séances distinctes avec dates
+    cur.execute("""
+        SELECT DISTINCT name, 
+               MAX(date) as last_date,
+               COUNT(*) as session_count,
+               CAST((julianday('now') - julianday(MAX(date))) AS INTEGER) as days_since
+        FROM sessions
+        WHERE name IS NOT NULL AND name != ''
+        GROUP BY name
+        ORDER BY last_date DESC
+        LIMIT 10
+    """)
+    sessions = cur.fetchall()
+    
+    # Statistiques par exercice, agrégées en SQL (triées par 1RM décroissant)
+    exercise_stats = aggregate_training_history(cur)
+    
+    # Derniers records battus
+    records = recent_records(cur, limit=10)
+    
+    # Construire le contexte d'historique
+    if sessions:
+        history_context += "**Types de séances réalisées :**\n"
+        for session in sessions:
+            days_text = "aujourd'hui" if session[3] == 0 else f"il y a {session[3]} jour{'s' if session[3] > 1 else ''}"
+            history_context += f"- {session[0]} : {session[2]} fois (dernière: {days_text})\n"
         
-        # 📊 RÉCUPÉRER L'HISTORIQUE DES ENTRAÎNEMENTS
-        history_context = "\n## 📊 HISTORIQUE DES ENTRAÎNEMENTS\n\n"
+        history_context += "\n**Exercices pratiqués (avec charges maximales) :**\n"
+        for exercise, stats in exercise_stats[:15]:
+            history_context += f"- {exercise} : dernière série {stats['last_reps']} reps @ {stats['last_weight']} kg (max 1RM: {stats['max_1rm']:.1f} kg) - {stats['occurrences']} séries au total, 1RM amélioré {stats['improvements']} fois\n"
         
-        try:
-            with sqlite3.connect('database.db') as conn:
-                cur = conn.cursor()
-                
-                # Récupérer les séances distinctes avec dates
-                cur.execute("""
-                    SELECT DISTINCT name, 
-                           MAX(date) as last_date,
-                           COUNT(*) as session_count,
-                           CAST((julianday('now') - julianday(MAX(date))) AS INTEGER) as days_since
-                    FROM sessions
-                    WHERE name IS NOT NULL AND name != ''
-                    GROUP BY name
-                    ORDER BY last_date DESC
-                    LIMIT 10
-                """)
-                sessions = cur.fetchall()
-                
-                # Récupérer les exercices récents avec leurs performances
-                cur.execute("""
-                    SELECT e.exercise_name, 
-                           s.name as session_name,
-                           s.date,
-                           GROUP_CONCAT(st.set_number || 'x' || st.reps || '@' || st.weight, ', ') as sets_detail
-                    FROM exercises e
-                    JOIN sessions s ON e.session_id = s.id
-                    LEFT JOIN sets st ON e.id = st.exercise_id
-                    GROUP BY e.id, e.exercise_name, s.name, s.date
-                    ORDER BY s.date DESC
-                    LIMIT 30
-                """)
-                recent_exercises = cur.fetchall()
-                
-                # Calculer les statistiques par exercice
-                exercise_stats = {}
-                
-                # Récupérer tous les sets pour calculer les max
-                cur.execute("""
-                    SELECT e.exercise_name, st.reps, st.weight
-                    FROM exercises e
-                    JOIN sets st ON e.id = st.exercise_id
-                    ORDER BY e.exercise_name
-                """)
-                all_sets = cur.fetchall()
-                
-                for exercise_name, reps, weight in all_sets:
-                    if exercise_name not in exercise_stats:
-                        exercise_stats[exercise_name] = {
-                            'max_weight': weight,
-                            'max_1rm': calculate_1rm(weight, reps),
-                            'occurrences': 1,
-                            'last_reps': reps,
-                            'last_weight': weight
-                        }
-                    else:
-                        stats = exercise_stats[exercise_name]
-                        if weight > stats['max_weight']:
-                            stats['max_weight'] = weight
-                        
-                        current_1rm = calculate_1rm(weight, reps)
-                        if current_1rm > stats['max_1rm']:
-                            stats['max_1rm'] = current_1rm
-                        
-                        stats['occurrences'] += 1
-                        stats['last_reps'] = reps
-                        stats['last_weight'] = weight
-                
-                # Construire le contexte d'historique
-                if sessions:
-                    history_context += "**Types de séances réalisées :**\n"
-                    for session in sessions:
-                        days_text = "aujourd'hui" if session[3] == 0 else f"il y a {session[3]} jour{'s' if session[3] > 1 else ''}"
-                        history_context += f"- {session[0]} : {session[2]} fois (dernière: {days_text})\n"
-                    
-                    history_context += "\n**Exercices pratiqués (avec charges maximales) :**\n"
-                    for exercise, stats in sorted(exercise_stats.items(), key=lambda x: x[1]['max_1rm'], reverse=True)[:15]:
-                        history_context += f"- {exercise} : dernière série {stats['last_reps']} reps @ {stats['last_weight']} kg (max 1RM: {stats['max_1rm']:.1f} kg) - {stats['occurrences']} séries au total\n"
-                    
-                    history_context += f"\n**Total d'exercices différents pratiqués :** {len(exercise_stats)}\n"
-                else:
-                    history_context += "Aucun historique d'entraînement disponible (première utilisation).\n"
-                    
-        except sqlite3.Error as e:
-            print(f"❌ Erreur lors de la récupération de l'historique: {e}")
-            history_context += "Erreur lors de la récupération de l'historique.\n"
+        history_context += f"\n**Total d'exercices différents pratiqués :** {len(exercise_stats)}\n"
+        
+        if records:
+            history_context += "\n**Records personnels récents :**\n"
+            for record in records:
+                history_context += f"- {format_record(*record[:6])} ({record[6][:10]})\n"
+    else:
+        history_context += "Aucun historique d'entraînement disponible (première utilisation).\n"
+    
+    return history_context
 
-        enhanced_prompt = f"""
+def get_history_context():
+    """
+    Retourne le résumé de l'historique, recalculé uniquement quand les données ont changé.
+    
+    La clé inclut la date du jour car le résumé contient des durées relatives ("il y a 3 jours").
+    """
+    try:
+        with get_db() as conn:
+            cur = conn.cursor()
+            cache_key = (get_data_version(cur), datetime.now().date())
+            history_context = history_cache.get(cache_key)
+            if history_context is None:
+                history_context = build_history_context(cur)
+                history_cache.set(cache_key, history_context)
+            return history_context
+    except sqlite3.Error as e:
+        print(f"❌ Erreur lors de la récupération de l'historique: {e}")
+        return "\n## 📊 HISTORIQUE DES ENTRAÎNEMENTS\n\nErreur lors de la récupération de l'historique.\n"
+
+def build_coach_prompt(user_prompt, history_context):
+    """Assemble le prompt complet envoyé au modèle (consignes, historique, demande utilisateur)"""
+    return f"""
 Tu es un expert en coaching sportif de haut niveau. Ta mission est de créer des programmes d'entraînement personnalisés, cyclés (périodisés) et basés sur la science.
 
 {history_context}
@@ -560,18 +383,39 @@ Si c'est un nouveau programme, tu dois spécifier la durée du cycle. Exemple :
 
 Tu n'écriras rien de plus que ce qui est demandé dans ce format (sauf si tu dois poser une question pour informations manquantes).
 """
+
+def render_training_program(training_program):
+    """Retire les blocs de parsing et convertit la réponse du modèle en HTML"""
+    training_program_clean = re.sub(r'\[PARSE_START\].*?\[PARSE_END\]', '', training_program, flags=re.DOTALL)
+    return markdown.markdown(training_program_clean, extensions=['extra', 'codehilite'])
+
+# Générations IA exécutées en arrière-plan (le worker HTTP n'attend pas le modèle)
+ai_jobs = JobManager(
+    app, ai_backend, response_cache, render_training_program,
+    max_workers=int(os.getenv("AI_WORKERS", 4)),
+)
+
+@app.route('/ai', methods=['GET', 'POST'])
+def ai_coach():
+    """Génération de programmes d'entraînement avec l'IA"""
+    training_program = None
+    training_program_html = None
+    if request.method == 'POST':
+        user_prompt = request.form['prompt']
+        
+        # 📊 RÉCUPÉRER L'HISTORIQUE DES ENTRAÎNEMENTS (mis en cache jusqu'à la prochaine séance)
+        history_context = get_history_context()
+
+        enhanced_prompt = build_coach_prompt(user_prompt, history_context)
         
         try:
-            model = genai.GenerativeModel('gemini-flash-latest')
-            response = model.generate_content(enhanced_prompt)
-            training_program = response.text
+            # Un prompt identique (même demande, même historique) réutilise la réponse en cache.
+            # La connexion de la requête est rendue au pool avant l'appel au modèle (plusieurs secondes)
+            db.close_db()
+            training_program, _ = generate_cached(db.pooled_connection, ai_backend, response_cache, enhanced_prompt)
             
-            # Nettoyer le texte : retirer les blocs de parsing pour l'affichage
-            import re
-            training_program_clean = re.sub(r'\[PARSE_START\].*?\[PARSE_END\]', '', training_program, flags=re.DOTALL)
-            
-            # Convertir le markdown en HTML
-            training_program_html = markdown.markdown(training_program_clean, extensions=['extra', 'codehilite'])
+            # Nettoyer le texte (blocs de parsing) et convertir le markdown en HTML
+            training_program_html = render_training_program(training_program)
             
         except Exception as e:
             # Programme de secours en cas d'erreur
@@ -580,72 +424,63 @@ Tu n'écriras rien de plus que ce qui est demandé dans ce format (sauf si tu do
             """
            
             training_program_html = markdown.markdown(training_program, extensions=['extra', 'codehilite'])
-            print(f"Erreur Gemini API: {e}")
+            print(f"Erreur API IA ({ai_backend.name}): {e}")
             
     return render_template('ai.html', training_program=training_program, training_program_html=training_program_html)
 
+@app.route('/api/ai/jobs', methods=['POST'])
+def ai_job_submit():
+    """Lance une génération en arrière-plan et retourne immédiatement l'identifiant du job"""
+    data = request.get_json(silent=True) or request.form
+    user_prompt = (data.get('prompt') or '').strip()
+    if not user_prompt:
+        return jsonify({'error': 'Le prompt est obligatoire'}), 400
+
+    enhanced_prompt = build_coach_prompt(user_prompt, get_history_context())
+    try:
+        job = ai_jobs.submit(enhanced_prompt)
+    except JobQueueFull as e:
+        print(f"⚠️ Génération IA refusée: {e}")
+        return jsonify({'error': 'Trop de générations en cours, réessayez dans un instant'}), 429, {'Retry-After': '30'}
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('ai_job_status', job_id=job.id),
+        'stream_url': url_for('ai_job_stream', job_id=job.id),
+    }), 202
+
+@app.route('/api/ai/jobs/<job_id>')
+def ai_job_status(job_id):
+    """État d'un job de génération (pour le polling)"""
+    job = ai_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job introuvable'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/ai/jobs/<job_id>/stream')
+def ai_job_stream(job_id):
+    """Texte du job au fil de la génération, en Server-Sent Events"""
+    job = ai_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job introuvable'}), 404
+    return Response(stream_job_events(job), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
 @app.route('/start-session/<session_name>')
 def start_session(session_name):
     """Démarrer une nouvelle séance basée sur un template existant"""
-    # Récupérer les exercices de la dernière séance avec ce nom
+    # Exercices et séries de la dernière séance avec ce nom (en cache jusqu'à la prochaine écriture)
     exercises_with_sets = []
-    
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
-            # Trouver la dernière séance avec ce nom
-            cur.execute("""
-                SELECT id FROM sessions 
-                WHERE name = ? 
-                ORDER BY date DESC 
-                LIMIT 1
-            """, (session_name,))
-            
-            last_session = cur.fetchone()
-            
-            if last_session:
-                session_id = last_session[0]
-                # Récupérer les exercices avec leurs séries
-                cur.execute("""
-                    SELECT e.exercise_name, st.set_number, st.reps, st.weight
-                    FROM exercises e
-                    LEFT JOIN sets st ON e.id = st.exercise_id
-                    WHERE e.session_id = ?
-                    ORDER BY e.id, st.set_number
-                """, (session_id,))
-                
-                raw_data = cur.fetchall()
-                
-                # Regrouper par exercice
-                current_exercise = None
-                current_sets = []
-                
-                for row in raw_data:
-                    exercise_name, set_number, reps, weight = row
-                    
-                    if current_exercise != exercise_name:
-                        if current_exercise is not None:
-                            exercises_with_sets.append({
-                                'name': current_exercise,
-                                'sets': current_sets
-                            })
-                        current_exercise = exercise_name
-                        current_sets = []
-                    
-                    if set_number is not None:
-                        current_sets.append({
-                            'number': set_number,
-                            'reps': reps,
-                            'weight': weight
-                        })
-                
-                # Ajouter le dernier exercice
-                if current_exercise is not None:
-                    exercises_with_sets.append({
-                        'name': current_exercise,
-                        'sets': current_sets
-                    })
-                
+            cache_key = (get_data_version(cur), session_name)
+            exercises_with_sets = template_cache.get(cache_key)
+            if exercises_with_sets is None:
+                exercises_with_sets = load_session_template(cur, session_name)
+                template_cache.set(cache_key, exercises_with_sets)
     except sqlite3.Error as e:
         print(f"❌ Erreur lors de la récupération de la séance template: {e}")
     
@@ -679,63 +514,54 @@ def track_performance():
                     exercises_data = json.loads(exercises_json)
                     
                     if exercises_data:
-                        with sqlite3.connect('database.db') as conn:
-                            cur = conn.cursor()
-                            
-                            # Créer la séance
-                            cur.execute("INSERT INTO sessions (name) VALUES (?)", (session_name,))
-                            session_id = cur.lastrowid
-                            
-                            total_exercises = 0
-                            total_sets = 0
-                            
-                            # Ajouter tous les exercices et leurs séries
-                            for exercise in exercises_data:
-                                exercise_name = exercise.get('name', '').strip()
-                                sets = exercise.get('sets', [])
-                                
-                                if exercise_name and sets:
-                                    # Créer l'exercice
-                                    cur.execute(
-                                        "INSERT INTO exercises (session_id, exercise_name) VALUES (?, ?)",
-                                        (session_id, exercise_name)
-                                    )
-                                    exercise_id = cur.lastrowid
-                                    total_exercises += 1
-                                    
-                                    # Ajouter toutes les séries
-                                    for set_data in sets:
-                                        set_number = set_data.get('number')
-                                        reps = set_data.get('reps')
-                                        weight = set_data.get('weight')
-                                        
-                                        if set_number and reps is not None and weight is not None:
-                                            cur.execute(
-                                                "INSERT INTO sets (exercise_id, set_number, reps, weight) VALUES (?, ?, ?, ?)",
-                                                (exercise_id, set_number, int(reps), float(weight))
-                                            )
-                                            total_sets += 1
-                            
-                            # Vérifier s'il s'agit d'une séance de programme à marquer comme complétée
-                            programme_seance_id = request.form.get('programme_seance_id')
-                            if programme_seance_id:
-                                try:
-                                    cur.execute("""
-                                        UPDATE programme_seances 
-                                        SET completee = 1, date_completion = CURRENT_TIMESTAMP 
-                                        WHERE id = ?
-                                    """, (int(programme_seance_id),))
-                                    print(f"✅ Séance de programme {programme_seance_id} marquée comme complétée")
-                                except (ValueError, sqlite3.Error) as e:
-                                    print(f"⚠️ Erreur lors de la mise à jour de la séance de programme: {e}")
-                            
-                            conn.commit()
-                            session_created_successfully = True
-                            message = f"✅ Séance '{session_name}' enregistrée avec {total_exercises} exercice(s) et {total_sets} série(s)!"
-                            
-                            # Message supplémentaire si c'était une séance de programme
-                            if programme_seance_id:
-                                message += " 🎯 Séance du programme marquée comme complétée!"
+                        # Valider tout le contenu avant d'ouvrir la transaction
+                        exercises = validate_exercises(exercises_data)
+                        
+                        # Séance de programme à marquer comme complétée
+                        programme_seance_id = request.form.get('programme_seance_id')
+                        completed_seance_id = None
+                        if programme_seance_id:
+                            try:
+                                completed_seance_id = int(programme_seance_id)
+                            except ValueError as e:
+                                print(f"⚠️ Erreur lors de la mise à jour de la séance de programme: {e}")
+                        
+                        # Identifiant généré par la page : un nouvel envoi du même formulaire ne crée rien
+                        client_id = validate_client_id(request.form.get('client_id'))
+                        
+                        # Séance, exercices, séries et statistiques en une seule transaction
+                        session_id, total_exercises, total_sets, records, created = save_session(
+                            get_db(), session_name, exercises, completed_seance_id, client_id
+                        )
+                        if not created:
+                            message = f"ℹ️ Séance '{session_name}' déjà enregistrée ({total_exercises} exercice(s), {total_sets} série(s))."
+                            flash(message, 'success')
+                            return redirect('/programme')
+                        
+                        # L'index d'autocomplétion contient les noms du catalogue, pas les variantes saisies
+                        cur = get_db().cursor()
+                        cur.execute("""
+                            SELECT c.name FROM exercises e
+                            JOIN exercise_catalog c ON c.id = e.catalog_id
+                            WHERE e.session_id = ?
+                        """, (session_id,))
+                        exercise_index.add(name for name, in cur.fetchall())
+                        if completed_seance_id is not None:
+                            print(f"✅ Séance de programme {programme_seance_id} marquée comme complétée")
+                        
+                        session_created_successfully = True
+                        message = f"✅ Séance '{session_name}' enregistrée avec {total_exercises} exercice(s) et {total_sets} série(s)!"
+                        
+                        # Message supplémentaire si c'était une séance de programme
+                        if programme_seance_id:
+                            message += " 🎯 Séance du programme marquée comme complétée!"
+                        
+                        # Records personnels battus pendant cette séance
+                        if records:
+                            message += " 🏆 Nouveau(x) record(s) : " + " ; ".join(
+                                format_record(r['exercise'], r['type'], r['value'], r['previous_value'], r['reps'], r['weight'])
+                                for r in records
+                            )
                     else:
                         message = "⚠️ Aucun exercice valide trouvé dans la séance."
                     
@@ -750,21 +576,11 @@ def track_performance():
     
     # Récupérer les 5 dernières séances pour l'historique
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT s.id, s.name, s.date, COUNT(DISTINCT e.id) as exercise_count
-                FROM sessions s
-                LEFT JOIN exercises e ON s.id = e.session_id
-                GROUP BY s.id, s.name, s.date
-                ORDER BY s.date DESC
-                LIMIT 5
-            """)
-            recent_sessions = cur.fetchall() or []
+            recent_sessions, _ = list_sessions(cur, limit=5)
     except sqlite3.Error as e:
         print(f"Erreur lors de la récupération des séances : {e}")
-        # Initialiser la base de données si elle n'existe pas
-        init_db()
         recent_sessions = []
     except Exception as e:
         print(f"Erreur inattendue lors de la récupération des séances : {e}")
@@ -777,6 +593,26 @@ def track_performance():
         
     return render_template('track.html', message=message, recent_sessions=recent_sessions)
 
+@app.route('/sessions')
+def sessions_history():
+    """Historique complet des séances, paginé (les plus récentes d'abord)"""
+    sessions = []
+    next_cursor = None
+    
+    try:
+        before = parse_cursor(request.args['before']) if request.args.get('before') else None
+        with get_db() as conn:
+            cur = conn.cursor()
+            sessions, next_cursor = list_sessions(cur, before, request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        # Curseur illisible : retour à la première page
+        return redirect('/sessions')
+    except sqlite3.Error as e:
+        print(f"❌ Erreur lors de la récupération de l'historique: {e}")
+    
+    return render_template('sessions.html', sessions=sessions, next_cursor=next_cursor,
+                           first_page=not request.args.get('before'))
+
 @app.route('/session/<int:session_id>')
 def view_session(session_id):
     session = None
@@ -787,7 +623,7 @@ def view_session(session_id):
     }
     
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
             
             # Récupérer les infos de la séance
@@ -808,6 +644,7 @@ def view_session(session_id):
                 
                 # Regrouper les séries par exercice
                 exercises_dict = {}
+                set_rows = []
                 for row in raw_data:
                     exercise_id, exercise_name, set_number, reps, weight = row
                     
@@ -815,7 +652,9 @@ def view_session(session_id):
                         exercises_dict[exercise_id] = {
                             'id': exercise_id,
                             'name': exercise_name,
-                            'sets': []
+                            'sets': [],
+                            'best_1rm': 0.0,
+                            'volume': 0.0
                         }
                     
                     if set_number is not None:
@@ -825,154 +664,185 @@ def view_session(session_id):
                             'weight': weight
                         })
                         
-                        # Calculer les stats
-                        session_stats['total_sets'] += 1
-                        session_stats['total_volume'] += (reps * weight)
+                        set_rows.append((exercise_id, session_id, session[2], reps, weight))
+                
+                # Totaux de la séance et par exercice calculés sur les colonnes de séries
+                columns = SetColumns(set_rows)
+                for exercise_id, stats in exercise_summary(columns).items():
+                    exercises_dict[exercise_id]['best_1rm'] = stats['max_1rm']
+                    exercises_dict[exercise_id]['volume'] = stats['tonnage']
                 
                 exercises = list(exercises_dict.values())
+                session_stats['total_sets'] = len(columns)
+                session_stats['total_volume'] = total_tonnage(columns.weights, columns.reps)
                             
     except sqlite3.Error as e:
         print(f"Erreur de base de données dans view_session: {e}")
-        init_db()
     except Exception as e:
         print(f"Erreur inattendue dans view_session: {e}")
         
     return render_template('session_detail.html', session=session, exercises=exercises, session_stats=session_stats)
 
 @app.route('/progress')
+@page_cache.cached
 def view_progress():
-    exercise_stats = {}
+    sorted_exercises = []
     
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
             
-            # Récupérer toutes les séries de tous les exercices
-            cur.execute("""
-                SELECT e.exercise_name, st.reps, st.weight, s.date
-                FROM exercises e
-                JOIN sets st ON e.id = st.exercise_id
-                JOIN sessions s ON e.session_id = s.id
-                ORDER BY s.date DESC
-            """)
-            all_sets = cur.fetchall() or []
-            
-            # Calculer les statistiques par exercice
-            for exercise_name, reps, weight, date in all_sets:
-                if exercise_name and reps > 0 and weight > 0:
-                    current_1rm = calculate_1rm(weight, reps)
-                    current_volume = reps * weight
-                    
-                    if exercise_name not in exercise_stats:
-                        exercise_stats[exercise_name] = {
-                            'max_weight': weight,
-                            'max_1rm': current_1rm,
-                            'best_1rm_reps': reps,
-                            'best_1rm_weight': weight,
-                            'best_volume_reps': reps,
-                            'best_volume_weight': weight,
-                            'best_volume_total': current_volume,
-                            'total_sets': 1,
-                            'has_actual_1rm': (reps == 1),
-                            'last_date': date
-                        }
-                    else:
-                        stats = exercise_stats[exercise_name]
-                        
-                        # Mettre à jour le poids max
-                        if weight > stats['max_weight']:
-                            stats['max_weight'] = weight
-                        
-                        # Mettre à jour le 1RM (prendre le plus élevé)
-                        if current_1rm > stats['max_1rm']:
-                            stats['max_1rm'] = current_1rm
-                            stats['best_1rm_reps'] = reps
-                            stats['best_1rm_weight'] = weight
-                            if reps == 1:
-                                stats['has_actual_1rm'] = True
-                        
-                        # Mettre à jour le meilleur volume
-                        if current_volume > stats['best_volume_total']:
-                            stats['best_volume_reps'] = reps
-                            stats['best_volume_weight'] = weight
-                            stats['best_volume_total'] = current_volume
-                        
-                        stats['total_sets'] += 1
+            # Une ligne par exercice, maintenue à chaque enregistrement de séance
+            sorted_exercises = load_exercise_stats(cur)
             
     except sqlite3.Error as e:
         print(f"Erreur de base de données dans view_progress: {e}")
-        init_db()
-        exercise_stats = {}
+        sorted_exercises = []
     except Exception as e:
         print(f"Erreur inattendue dans view_progress: {e}")
-        exercise_stats = {}
-    
-    # Trier les exercices par 1RM décroissant
-    try:
-        sorted_exercises = sorted(exercise_stats.items(), key=lambda x: x[1]['max_1rm'], reverse=True)
-    except Exception as e:
-        print(f"Erreur lors du tri des exercices : {e}")
         sorted_exercises = []
         
     return render_template('progress.html', 
                          exercise_stats=sorted_exercises,
-                         total_exercises=len(exercise_stats))
+                         total_exercises=len(sorted_exercises))
 
-def calculate_1rm(weight, reps):
-    """
-    Calcule le 1RM en utilisant la formule d'Epley
-    1RM = weight * (1 + reps/30)
-    """
-    try:
-        weight = float(weight) if weight is not None else 0.0
-        reps = int(reps) if reps is not None else 1
-        
-        if weight <= 0 or reps <= 0:
-            return 0.0
-            
-        if reps == 1:
-            return weight
-        elif reps <= 12:  # Formule fiable jusqu'à 12 reps
-            return round(weight * (1 + reps / 30), 1)
-        else:  # Pour plus de 12 reps, estimation moins précise
-            return round(weight * (1 + reps / 30), 1)
-    except (ValueError, TypeError, ZeroDivisionError) as e:
-        print(f"Erreur dans calculate_1rm: {e}, weight={weight}, reps={reps}")
-        return 0.0
+def get_exercise_index(cur):
+    """Index de recherche des exercices, rechargé si le catalogue a changé hors de ce processus"""
+    cur.execute("SELECT COUNT(*) FROM exercise_catalog")
+    if not exercise_index.loaded or cur.fetchone()[0] != len(exercise_index):
+        exercise_index.load_from_db(cur)
+    return exercise_index
 
 @app.route('/api/exercises')
 def get_exercises():
-    """API pour récupérer la liste des exercices existants"""
-    exercises = set()
+    """
+    API de recherche des exercices existants (autocomplétion).
     
+    ?q=dev&limit=10 : noms correspondant à la saisie (préfixe, sans accents, fautes de frappe)
+    sans q : liste complète triée
+    """
+    query = request.args.get('q', '').strip()
     try:
-        with sqlite3.connect('database.db') as conn:
-            cur = conn.cursor()
-            
-            # Récupérer les exercices distincts
-            cur.execute("SELECT DISTINCT exercise_name FROM exercises WHERE exercise_name IS NOT NULL AND exercise_name != ''")
-            exercises_data = cur.fetchall()
-            for exercise in exercises_data:
-                if exercise[0] and exercise[0].strip():
-                    exercises.add(exercise[0].strip())
-                
+        limit = max(1, min(int(request.args.get('limit', 10)), 100))
+    except ValueError:
+        limit = 10
+    
+    try:
+        with get_db() as conn:
+            index = get_exercise_index(conn.cursor())
     except sqlite3.Error as e:
         print(f"Erreur de base de données dans get_exercises: {e}")
-        init_db()
-        exercises = set()
-    except Exception as e:
-        print(f"Erreur inattendue dans get_exercises: {e}")
-        exercises = set()
+        return jsonify([])
     
-    # Convertir en liste triée, filtrer les valeurs vides
-    exercises_list = sorted([ex for ex in exercises if ex and ex.strip()])
-    return jsonify(exercises_list)
+    if not query:
+        return jsonify(index.names())
+    return jsonify(index.search(query, limit))
+
+@app.route('/api/progress/<path:exercise>')
+def api_progress(exercise):
+    """
+    Courbe de progression d'un exercice : ?from=AAAA-MM-JJ&to=AAAA-MM-JJ&bucket=day|week|month&points=N
+
+    Un point par période (1RM estimé, série la plus lourde, tonnage), réduit
+    à N points au plus pour les longs historiques.
+    """
+    bucket = request.args.get('bucket', DEFAULT_BUCKET)
+    if bucket not in BUCKETS:
+        return jsonify({'error': f"Paramètre bucket invalide (attendu : {', '.join(BUCKETS)})"}), 400
+    try:
+        date_from = parse_day(request.args['from']) if request.args.get('from') else None
+        date_to = parse_day(request.args['to']) if request.args.get('to') else None
+        max_points = max(3, min(int(request.args.get('points', DEFAULT_POINT_BUDGET)), MAX_POINT_BUDGET))
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre invalide : {str(e)}'}), 400
+
+    try:
+        with get_db() as conn:
+            cur = conn.cursor()
+            catalog_id = find_catalog_id(cur, exercise)
+            if catalog_id is None:
+                return jsonify({'error': f"Exercice inconnu : {exercise}"}), 404
+            cur.execute("SELECT name FROM exercise_catalog WHERE id = ?", (catalog_id,))
+            exercise_name = cur.fetchone()[0]
+            points, total_points = progress_series(cur, catalog_id, bucket, date_from, date_to, max_points)
+    except sqlite3.Error as e:
+        print(f"❌ Erreur lors du calcul de la progression: {e}")
+        return jsonify({'error': f'Erreur de base de données : {str(e)}'}), 500
+
+    return jsonify({
+        'exercise': exercise_name,
+        'bucket': bucket,
+        'from': request.args.get('from'),
+        'to': request.args.get('to'),
+        'points': points,
+        'total_points': total_points,
+        'downsampled': len(points) < total_points,
+    })
+
+@app.route('/api/sessions', methods=['GET'])
+def api_list_sessions():
+    """Historique des séances en JSON, paginé par curseur ?before=<date>,<id>&limit=N"""
+    try:
+        before = parse_cursor(request.args['before']) if request.args.get('before') else None
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre invalide : {str(e)}'}), 400
+
+    try:
+        with get_db() as conn:
+            rows, next_cursor = list_sessions(conn.cursor(), before, limit)
+    except sqlite3.Error as e:
+        print(f"❌ Erreur lors de la récupération de l'historique: {e}")
+        return jsonify({'error': f'Erreur de base de données : {str(e)}'}), 500
+
+    return jsonify({
+        'sessions': [
+            {'id': row[0], 'name': row[1], 'date': row[2], 'exercises': row[3], 'sets': row[4]}
+            for row in rows
+        ],
+        'next': next_cursor,
+        'next_url': url_for('api_list_sessions', before=next_cursor, limit=limit) if next_cursor else None,
+    })
+
+@app.route('/api/sessions', methods=['POST'])
+def api_create_sessions():
+    """
+    Création de séances en JSON : un objet séance ou une liste (import d'historique).
+
+    Toutes les séances sont écrites dans une seule transaction ; les séances
+    invalides sont rapportées individuellement sans bloquer les autres.
+    Une séance dont le client_id a déjà été reçu n'est pas réécrite : elle est
+    retournée avec son id d'origine et ``duplicate`` à true (renvois sans risque).
+    Retourne 201 si tout est créé, 207 si une partie a échoué, 400 si rien n'a été créé.
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({'error': 'Corps JSON invalide ou manquant'}), 400
+
+    items = payload if isinstance(payload, list) else [payload]
+    if not items:
+        return jsonify({'error': 'Aucune séance à enregistrer'}), 400
+    if len(items) > API_MAX_SESSIONS:
+        return jsonify({'error': f'Maximum {API_MAX_SESSIONS} séances par requête'}), 413
+
+    try:
+        created, errors = import_sessions(get_db(), items)
+    except sqlite3.Error as e:
+        print(f"❌ Erreur lors de l'import des séances: {e}")
+        return jsonify({'error': f'Erreur de base de données : {str(e)}'}), 500
+
+    new_sessions = [entry for entry in created if not entry['duplicate']]
+    if new_sessions:
+        print(f"✅ {len(new_sessions)} séance(s) importée(s) via l'API ({len(errors)} erreur(s))")
+    status = 400 if not created else (207 if errors else 201)
+    return jsonify({'created': created, 'errors': errors}), status
 
 # ============================================
 # ROUTES PROGRAMMES
 # ============================================
 
 @app.route('/programme')
+@page_cache.cached
 def programme():
     """Afficher le programme actif et la liste des programmes"""
     programme_actif = None
@@ -981,7 +851,7 @@ def programme():
     progression = {'completees': 0, 'total': 0, 'pourcentage': 0}
     
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
             
             # Récupérer le programme actif
@@ -999,11 +869,12 @@ def programme():
                 """, (programme_id,))
                 seances_programme = cur.fetchall()
                 
-                # Calculer la progression
-                if seances_programme:
-                    progression['total'] = len(seances_programme)
-                    progression['completees'] = sum(1 for s in seances_programme if s[5] == 1)
-                    progression['pourcentage'] = int((progression['completees'] / progression['total']) * 100)
+                # Progression maintenue sur le programme (refresh_programme_progress)
+                total_seances, completed_seances = programme_actif[6:8]
+                if total_seances:
+                    progression['total'] = total_seances
+                    progression['completees'] = completed_seances
+                    progression['pourcentage'] = int((completed_seances / total_seances) * 100)
             
             # Récupérer tous les programmes
             cur.execute("SELECT * FROM programmes ORDER BY actif DESC, date_creation DESC")
@@ -1036,7 +907,7 @@ def programme_create():
                 seances = json.loads(seances_json)
                 
                 if seances:
-                    with sqlite3.connect('database.db') as conn:
+                    with get_db() as conn:
                         cur = conn.cursor()
                         
                         # Créer le programme
@@ -1049,6 +920,8 @@ def programme_create():
                                 INSERT INTO programme_seances (programme_id, ordre, nom_seance)
                                 VALUES (?, ?, ?)
                             """, (programme_id, seance['ordre'], seance['nom']))
+                        refresh_programme_progress(cur, programme_id)
+                        bump_data_version(cur)
                         
                         conn.commit()
                         message = f"✅ Programme '{nom}' créé avec {len(seances)} séance(s)!"
@@ -1071,11 +944,12 @@ def programme_create():
 def programme_activate(programme_id):
     """Activer un programme (désactive les autres)"""
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             # Désactiver tous les programmes
             conn.execute("UPDATE programmes SET actif = 0")
             # Activer le programme sélectionné
             conn.execute("UPDATE programmes SET actif = 1 WHERE id = ?", (programme_id,))
+            bump_data_version(conn.cursor())
             conn.commit()
     except sqlite3.Error as e:
         print(f"❌ Erreur lors de l'activation du programme: {e}")
@@ -1086,67 +960,30 @@ def programme_activate(programme_id):
 def programme_duplicate(programme_id):
     """Dupliquer un programme"""
     try:
-        with sqlite3.connect('database.db') as conn:
-            cur = conn.cursor()
-            
-            # Récupérer le programme original
-            cur.execute("SELECT nom, description FROM programmes WHERE id = ?", (programme_id,))
-            programme = cur.fetchone()
-            
-            if programme:
-                # Créer la copie
-                nouveau_nom = f"{programme[0]} (Copie)"
-                nouvelle_description = programme[1] if programme[1] else None
-                cur.execute("INSERT INTO programmes (nom, description) VALUES (?, ?)", (nouveau_nom, nouvelle_description))
-                nouveau_programme_id = cur.lastrowid
-                
-                # Copier les séances
-                cur.execute("""
-                    SELECT id, ordre, nom_seance, description
-                    FROM programme_seances 
-                    WHERE programme_id = ? 
-                    ORDER BY ordre
-                """, (programme_id,))
-                seances = cur.fetchall()
-                
-                for seance in seances:
-                    ancien_seance_id, ordre, nom_seance, description = seance
-                    
-                    # Créer la nouvelle séance
-                    cur.execute("""
-                        INSERT INTO programme_seances (programme_id, ordre, nom_seance, description)
-                        VALUES (?, ?, ?, ?)
-                    """, (nouveau_programme_id, ordre, nom_seance, description))
-                    nouveau_seance_id = cur.lastrowid
-                    
-                    # Copier tous les exercices de cette séance
-                    cur.execute("""
-                        SELECT ordre, nom_exercice, series, repetitions, notes
-                        FROM programme_exercices 
-                        WHERE seance_id = ?
-                        ORDER BY ordre
-                    """, (ancien_seance_id,))
-                    exercices = cur.fetchall()
-                    
-                    for exercice in exercices:
-                        ordre_ex, nom_exercice, series, repetitions, notes = exercice
-                        cur.execute("""
-                            INSERT INTO programme_exercices (seance_id, ordre, nom_exercice, series, repetitions, notes)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, (nouveau_seance_id, ordre_ex, nom_exercice, series, repetitions, notes))
-                
-                conn.commit()
+        # Durée de la copie tracée par le logger "programme_store"
+        duplicate_programme(get_db(), programme_id)
     except sqlite3.Error as e:
         print(f"❌ Erreur lors de la duplication du programme: {e}")
     
     return redirect('/programme')
 
+@app.route('/programme/next-mesocycle/<int:programme_id>')
+def programme_next_mesocycle(programme_id):
+    """Cloner un programme comme modèle du mésocycle suivant (devient le programme actif)"""
+    try:
+        clone_next_mesocycle(get_db(), programme_id)
+    except sqlite3.Error as e:
+        print(f"❌ Erreur lors de la création du mésocycle suivant: {e}")
+    
+    return redirect('/programme')
+
 @app.route('/programme/delete/<int:programme_id>')
 def programme_delete(programme_id):
     """Supprimer un programme"""
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             conn.execute("DELETE FROM programmes WHERE id = ?", (programme_id,))
+            bump_data_version(conn.cursor())
             conn.commit()
     except sqlite3.Error as e:
         print(f"❌ Erreur lors de la suppression du programme: {e}")
@@ -1157,7 +994,7 @@ def programme_delete(programme_id):
 def programme_seance_toggle(seance_id):
     """Marquer une séance comme complétée/non complétée"""
     try:
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
             
             # Récupérer l'état actuel
@@ -1166,13 +1003,15 @@ def programme_seance_toggle(seance_id):
             
             if result:
                 nouvelle_valeur = 0 if result[0] == 1 else 1
-                date_completion = datetime.now() if nouvelle_valeur == 1 else None
+                date_completion = to_stored_date(datetime.now()) if nouvelle_valeur == 1 else None
                 
                 cur.execute("""
                     UPDATE programme_seances 
                     SET completee = ?, date_completion = ? 
                     WHERE id = ?
                 """, (nouvelle_valeur, date_completion, seance_id))
+                refresh_seance_programme_progress(cur, seance_id)
+                bump_data_version(cur)
                 conn.commit()
     except sqlite3.Error as e:
         print(f"❌ Erreur lors de la mise à jour de la séance: {e}")
@@ -1183,64 +1022,11 @@ def programme_seance_toggle(seance_id):
 def programme_start_seance(seance_id):
     """Démarrer une séance depuis un programme"""
     try:
-        with sqlite3.connect('database.db') as conn:
-            cur = conn.cursor()
-            
-            # Récupérer les infos de la séance du programme
-            cur.execute("SELECT nom_seance FROM programme_seances WHERE id = ?", (seance_id,))
-            seance = cur.fetchone()
-            
-            print(f"🔍 DEBUG - Séance trouvée: {seance}")
+        with get_db() as conn:
+            seance = load_programme_template(conn.cursor(), seance_id)
             
             if seance:
-                # Nettoyer le nom de la séance (enlever les balises HTML)
-                import re
-                nom_seance = re.sub('<[^<]+?>', '', seance[0])
-                
-                print(f"🔍 DEBUG - Nom séance nettoyé: {nom_seance}")
-                
-                # Récupérer les exercices de cette séance
-                cur.execute("""
-                    SELECT nom_exercice, series, repetitions, notes
-                    FROM programme_exercices
-                    WHERE seance_id = ?
-                    ORDER BY ordre
-                """, (seance_id,))
-                exercices_data = cur.fetchall()
-                
-                print(f"🔍 DEBUG - Exercices trouvés: {len(exercices_data)} exercices")
-                print(f"🔍 DEBUG - Données brutes: {exercices_data}")
-                
-                # Formater les exercices pour le template
-                template_exercises = []
-                for ex in exercices_data:
-                    exercice = {
-                        'name': ex[0],
-                        'sets': []
-                    }
-                    
-                    # Si on a des séries/reps, créer les sets
-                    if ex[1]:  # series
-                        nb_series = ex[1]
-                        reps = ex[2] if ex[2] else '8-12'  # Valeur par défaut
-                        
-                        for i in range(nb_series):
-                            exercice['sets'].append({
-                                'reps': reps,
-                                'weight': ''
-                            })
-                    else:
-                        # Si pas de séries définies, ajouter 3 sets par défaut
-                        for i in range(3):
-                            exercice['sets'].append({
-                                'reps': '8-12',
-                                'weight': ''
-                            })
-                    
-                    template_exercises.append(exercice)
-                
-                print(f"🔍 DEBUG - Template exercises formatés: {template_exercises}")
-                
+                nom_seance, template_exercises = seance
                 # Rediriger vers la page de création de séance avec tout pré-rempli
                 return render_template('track.html', 
                                      session_template_name=nom_seance,
@@ -1250,243 +1036,13 @@ def programme_start_seance(seance_id):
                                      recent_sessions=[])
     except sqlite3.Error as e:
         print(f"❌ Erreur: {e}")
-        import traceback
-        traceback.print_exc()
     
     return redirect('/track')
-    return redirect('/track')
-
-def parse_programme_ia_robuste(programme_text_clean, nom_programme="Programme"):
-    """
-    Parser robuste pour les programmes générés par l'IA
-    Supporte DEUX formats :
-    1. Format avec blocs [PARSE_START]...[PARSE_END] (ancien format)
-    2. Format avec séparateurs ──────── et pattern "Nom : X x Y reps @ RIR ..." (nouveau format)
-    
-    Args:
-        programme_text_clean (str): Texte nettoyé du programme (sans HTML)
-        nom_programme (str): Nom du programme pour les logs
-        
-    Returns:
-        tuple: (seances, total_exercices, success)
-    """
-    import re
-    
-    print(f"\n{'='*80}")
-    print(f"🔍 DEBUG PARSING ROBUSTE - Programme: {nom_programme}")
-    print(f"{'='*80}")
-    print(f"📄 Longueur du texte: {len(programme_text_clean)} caractères")
-    
-    # Afficher un aperçu du texte
-    preview_lines = programme_text_clean.split('\n')[:20]
-    print(f"\n📋 Aperçu des 20 premières lignes:")
-    for idx, line in enumerate(preview_lines, 1):
-        print(f"   {idx:3d}: {line[:100]}")
-    
-    lignes = programme_text_clean.split('\n')
-    seances = []
-    ordre_seance = 1
-    
-    # Détecter le format utilisé
-    has_parse_blocks = '[PARSE_START]' in programme_text_clean
-    has_separators = '─' * 10 in programme_text_clean  # Au moins 10 tirets consécutifs
-    
-    print(f"\n🔎 Détection du format:")
-    print(f"   Blocs [PARSE_START]: {'✅ OUI' if has_parse_blocks else '❌ NON'}")
-    print(f"   Séparateurs ────: {'✅ OUI' if has_separators else '❌ NON'}")
-    
-    if has_parse_blocks:
-        print(f"\n📌 Utilisation du FORMAT ANCIEN (avec blocs de parsing)")
-        return parse_avec_blocs(lignes, nom_programme)
-    else:
-        print(f"\n📌 Utilisation du FORMAT NOUVEAU (détection automatique)")
-        return parse_sans_blocs(lignes, nom_programme)
-
-def parse_avec_blocs(lignes, nom_programme):
-    """Parser ancien format avec blocs [PARSE_START]...[PARSE_END]"""
-    import re
-    seances = []
-    ordre_seance = 1
-    
-    i = 0
-    while i < len(lignes):
-        ligne = lignes[i].strip()
-        
-        # Détecter une nouvelle séance
-        if re.match(r'^SEANCE\s*\d*\s*[:：]', ligne, re.IGNORECASE):
-            match = re.match(r'^SEANCE\s*\d*\s*[:：]\s*(.+)', ligne, re.IGNORECASE)
-            if match:
-                nom_seance = match.group(1).strip()
-                print(f"\n{'─'*80}")
-                print(f"🆕 SÉANCE {ordre_seance}: {nom_seance}")
-                
-                exercices = []
-                j = i + 1
-                
-                # Chercher [PARSE_START]
-                while j < len(lignes) and '[PARSE_START]' not in lignes[j]:
-                    j += 1
-                
-                if j < len(lignes) and '[PARSE_START]' in lignes[j]:
-                    print(f"   ✅ [PARSE_START] trouvé")
-                    j += 1
-                    ordre_exercice = 1
-                    
-                    # Lire les exercices
-                    while j < len(lignes) and '[PARSE_END]' not in lignes[j]:
-                        ligne_ex = lignes[j].strip()
-                        
-                        if ligne_ex.startswith('EXERCICE:'):
-                            parts = ligne_ex.split('|')
-                            
-                            nom_exercice = parts[0].replace('EXERCICE:', '').strip()
-                            series = None
-                            repetitions = None
-                            notes = ''
-                            
-                            for part in parts[1:]:
-                                part = part.strip()
-                                if part.startswith('SERIES:'):
-                                    try:
-                                        series = int(part.replace('SERIES:', '').strip())
-                                    except ValueError:
-                                        pass
-                                elif part.startswith('REPS:'):
-                                    repetitions = part.replace('REPS:', '').strip()
-                                elif part.startswith('NOTES:'):
-                                    notes = part.replace('NOTES:', '').strip()
-                            
-                            exercices.append({
-                                'ordre': ordre_exercice,
-                                'nom': nom_exercice[:200],
-                                'series': series,
-                                'repetitions': repetitions,
-                                'notes': notes[:500]
-                            })
-                            ordre_exercice += 1
-                            print(f"      ✅ Ex {ordre_exercice-1}: {nom_exercice} | {series}x{repetitions}")
-                        
-                        j += 1
-                    
-                    i = j
-                else:
-                    print(f"   ❌ [PARSE_START] NON TROUVÉ")
-                
-                seances.append({
-                    'ordre': ordre_seance,
-                    'nom': nom_seance[:200],
-                    'exercices': exercices
-                })
-                ordre_seance += 1
-                print(f"   📊 Total: {len(exercices)} exercice(s)")
-        
-        i += 1
-    
-    total_exercices = sum(len(s.get('exercices', [])) for s in seances)
-    success = len(seances) > 0 and total_exercices > 0
-    
-    print(f"\n📊 RÉSUMÉ: {len(seances)} séance(s), {total_exercices} exercice(s)")
-    return seances, total_exercices, success
-
-def parse_sans_blocs(lignes, nom_programme):
-    """Parser nouveau format sans blocs, détection par pattern"""
-    import re
-    seances = []
-    ordre_seance = 1
-    
-    i = 0
-    while i < len(lignes):
-        ligne = lignes[i].strip()
-        
-        # Détecter une séance avec séparateur ─────── SEANCE X: Nom
-        # OU simplement SEANCE X: Nom
-        seance_match = None
-        
-        # Pattern 1: Avec séparateurs
-        if '─' in ligne and 'SEANCE' in ligne.upper():
-            seance_match = re.search(r'SEANCE\s*(\d+)\s*[:：]\s*(.+)', ligne, re.IGNORECASE)
-        # Pattern 2: Sans séparateurs
-        elif re.match(r'^SEANCE\s*\d+\s*[:：]', ligne, re.IGNORECASE):
-            seance_match = re.match(r'^SEANCE\s*(\d+)\s*[:：]\s*(.+)', ligne, re.IGNORECASE)
-        
-        if seance_match:
-            num_seance = seance_match.group(1) if seance_match.lastindex >= 1 else str(ordre_seance)
-            nom_seance = seance_match.group(2).strip() if seance_match.lastindex >= 2 else ligne.split(':', 1)[1].strip()
-            
-            print(f"\n{'─'*80}")
-            print(f"🆕 SÉANCE {ordre_seance}: {nom_seance}")
-            
-            exercices = []
-            j = i + 1
-            ordre_exercice = 1
-            
-            # Lire les exercices jusqu'à la prochaine séance ou fin
-            while j < len(lignes):
-                ligne_ex = lignes[j].strip()
-                
-                # Arrêter si on trouve une nouvelle séance
-                if ('─' in ligne_ex and 'SEANCE' in ligne_ex.upper()) or re.match(r'^SEANCE\s*\d+\s*[:：]', ligne_ex, re.IGNORECASE):
-                    break
-                
-                # Pattern d'exercice: Nom (Matériel) : X x Y reps @ RIR Z, T min repos
-                # OU : Nom : X x Y reps @ RIR Z, T min repos
-                # Patterns acceptés :
-                # - Avec tiret au début : "- Développé couché..."
-                # - Sans tiret : "Développé couché..."
-                
-                exercice_pattern = r'^-?\s*(.+?)\s*:\s*(\d+)\s*x\s*([0-9\-]+)\s*reps?\s*@\s*RIR\s*([0-9\-]+)\s*,?\s*(.+?)(?:min|minutes)?\s*repos'
-                match_ex = re.match(exercice_pattern, ligne_ex, re.IGNORECASE)
-                
-                if match_ex:
-                    nom_exercice = match_ex.group(1).strip()
-                    series = int(match_ex.group(2))
-                    repetitions = match_ex.group(3).strip()
-                    rir = match_ex.group(4).strip()
-                    temps_repos = match_ex.group(5).strip()
-                    
-                    # Construire les notes
-                    notes = f"RIR {rir}, repos {temps_repos} min"
-                    
-                    exercices.append({
-                        'ordre': ordre_exercice,
-                        'nom': nom_exercice[:200],
-                        'series': series,
-                        'repetitions': repetitions,
-                        'notes': notes[:500]
-                    })
-                    ordre_exercice += 1
-                    print(f"      ✅ Ex {ordre_exercice-1}: {nom_exercice} | {series}x{repetitions} | {notes}")
-                elif ligne_ex and not ligne_ex.startswith('━') and not ligne_ex.startswith('─'):
-                    # Ligne non vide mais qui ne match pas le pattern
-                    if len(ligne_ex) > 10:  # Ignorer les lignes très courtes
-                        print(f"      ⚠️ Ligne ignorée: {ligne_ex[:80]}")
-                
-                j += 1
-            
-            seances.append({
-                'ordre': ordre_seance,
-                'nom': nom_seance[:200],
-                'exercices': exercices
-            })
-            ordre_seance += 1
-            print(f"   📊 Total: {len(exercices)} exercice(s)")
-            
-            i = j - 1  # -1 car on va faire i+1 après
-        
-        i += 1
-    
-    total_exercices = sum(len(s.get('exercices', [])) for s in seances)
-    success = len(seances) > 0 and total_exercices > 0
-    
-    print(f"\n📊 RÉSUMÉ: {len(seances)} séance(s), {total_exercices} exercice(s)")
-    return seances, total_exercices, success
 
 @app.route('/programme/save-from-ai', methods=['POST'])
 def programme_save_from_ai():
     """Sauvegarder un programme généré par l'IA avec parsing robuste"""
     try:
-        import re
-        
         nom = request.form.get('nom', '').strip()
         programme_text = request.form.get('programme_text', '').strip()
         
@@ -1494,9 +1050,9 @@ def programme_save_from_ai():
             return jsonify({'success': False, 'message': 'Données manquantes'})
         
         # Enlever toutes les balises HTML du texte
-        programme_text_clean = re.sub('<[^<]+?>', '', programme_text)
+        programme_text_clean = strip_html(programme_text)
         
-        # NOUVEAU PARSER ROBUSTE
+        # Parser en une passe (traces via le logger "programme_parser")
         seances, total_exercices, success = parse_programme_ia_robuste(programme_text_clean, nom)
         
         if not seances:
@@ -1512,13 +1068,18 @@ def programme_save_from_ai():
             })
         
         # Sauvegarder en base de données
-        with sqlite3.connect('database.db') as conn:
+        with get_db() as conn:
             cur = conn.cursor()
             
             # Créer le programme
             cur.execute("INSERT INTO programmes (nom) VALUES (?)", (nom,))
             programme_id = cur.lastrowid
             
+            # Rattacher les noms d'exercices au catalogue
+            catalog_ids = resolve_catalog_ids(
+                cur, [exercice['nom'] for seance in seances for exercice in seance.get('exercices', [])]
+            )
+            
             # Ajouter les séances et leurs exercices
             for seance in seances:
                 cur.execute("""
@@ -1530,10 +1091,13 @@ def programme_save_from_ai():
                 # Ajouter les exercices de cette séance
                 for exercice in seance.get('exercices', []):
                     cur.execute("""
-                        INSERT INTO programme_exercices (seance_id, ordre, nom_exercice, series, repetitions, notes)
-                        VALUES (?, ?, ?, ?, ?, ?)
+                        INSERT INTO programme_exercices (seance_id, ordre, nom_exercice, series, repetitions, notes, catalog_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
                     """, (seance_id, exercice['ordre'], exercice['nom'], 
-                          exercice.get('series'), exercice.get('repetitions'), exercice.get('notes', '')))
+                          exercice.get('series'), exercice.get('repetitions'), exercice.get('notes', ''),
+                          catalog_ids.get(exercice['nom'].strip())))
+            refresh_programme_progress(cur, programme_id)
+            bump_data_version(cur)
             
             conn.commit()
             
@@ -1568,6 +1132,8 @@ def service_worker():
     response.headers['Service-Worker-Allowed'] = '/'
     return response
 
+# Appliquer les migrations une seule fois, au démarrage
+init_db()
+
 if __name__ == '__main__':  
-    init_db()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark : agrégation 1RM/volume, anciennes boucles Python (une itération
+par série) vs reconstruction actuelle (séries en colonnes, module analytics).
+
+Usage :
+    python benchmarks/bench_aggregation.py [--sets 1000000] [--db /tmp/bench_aggregation.db]
+
+La base de test est générée une seule fois puis réutilisée. Les deux chemins
+sont comparés et le script échoue si leurs résultats diffèrent.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exercise_catalog import backfill_catalog_ids  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+from stats import (  # noqa: E402
+    aggregate_training_history, calculate_1rm, load_exercise_stats,
+    rebuild_exercise_stats, register_functions,
+)
+
+EXERCISES_PER_SESSION = 8
+SETS_PER_EXERCISE = 5
+
+
+def build_database(path, total_sets, seed=42):
+    """Génère une base avec environ total_sets séries réparties sur 200 exercices"""
+    rnd = random.Random(seed)
+    names = [f"Exercice {i:03d}" for i in range(200)]
+    # Chaque exercice a une charge de travail typique, incrémentée par paliers de 2.5 kg
+    base_weights = {name: rnd.choice(range(10, 160, 5)) for name in names}
+    session_count = max(1, total_sets // (EXERCISES_PER_SESSION * SETS_PER_EXERCISE))
+
+    with sqlite3.connect(path) as conn:
+        run_migrations(conn)
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO sessions (id, name, date) VALUES (?, ?, datetime('2015-01-01', ?))",
+            ((i + 1, f"Séance {i % 6}", f"+{i * 7} hours") for i in range(session_count)),
+        )
+        exercise_rows = []
+        set_rows = []
+        exercise_id = 0
+        for session_id in range(1, session_count + 1):
+            for name in rnd.sample(names, EXERCISES_PER_SESSION):
+                exercise_id += 1
+                exercise_rows.append((exercise_id, session_id, name))
+                for set_number in range(1, SETS_PER_EXERCISE + 1):
+                    weight = max(0.0, base_weights[name] + 2.5 * rnd.randint(-8, 8))
+                    set_rows.append((exercise_id, set_number, rnd.randint(1, 15), weight))
+        conn.executemany("INSERT INTO exercises (id, session_id, exercise_name) VALUES (?, ?, ?)", exercise_rows)
+        conn.executemany("INSERT INTO sets (exercise_id, set_number, reps, weight) VALUES (?, ?, ?, ?)", set_rows)
+        backfill_catalog_ids(conn)
+        conn.commit()
+    return len(set_rows)
+
+
+def progress_stats_python(cur):
+    """Ancienne boucle de view_progress (une itération Python par série)"""
+    exercise_stats = {}
+    cur.execute("""
+        SELECT e.exercise_name, st.reps, st.weight, s.date
+        FROM exercises e
+        JOIN sets st ON e.id = st.exercise_id
+        JOIN sessions s ON e.session_id = s.id
+        ORDER BY s.date DESC
+    """)
+    for exercise_name, reps, weight, date in cur.fetchall():
+        if exercise_name and reps > 0 and weight > 0:
+            current_1rm = calculate_1rm(weight, reps)
+            current_volume = reps * weight
+            if exercise_name not in exercise_stats:
+                exercise_stats[exercise_name] = {
+                    'max_weight': weight, 'max_1rm': current_1rm,
+                    'best_1rm_reps': reps, 'best_1rm_weight': weight,
+                    'best_volume_reps': reps, 'best_volume_weight': weight,
+                    'best_volume_total': current_volume, 'total_sets': 1,
+                    'has_actual_1rm': reps == 1, 'last_date': date,
+                }
+            else:
+                stats = exercise_stats[exercise_name]
+                if weight > stats['max_weight']:
+                    stats['max_weight'] = weight
+                if current_1rm > stats['max_1rm']:
+                    stats['max_1rm'] = current_1rm
+                    stats['best_1rm_reps'] = reps
+                    stats['best_1rm_weight'] = weight
+                    stats['has_actual_1rm'] = reps == 1
+                if current_volume > stats['best_volume_total']:
+                    stats['best_volume_reps'] = reps
+                    stats['best_volume_weight'] = weight
+                    stats['best_volume_total'] = current_volume
+                stats['total_sets'] += 1
+    return exercise_stats
+
+
+def history_stats_python(cur):
+    """Ancienne boucle de ai_coach (une itération Python par série)"""
+    exercise_stats = {}
+    cur.execute("""
+        SELECT e.exercise_name, st.reps, st.weight
+        FROM exercises e
+        JOIN sets st ON e.id = st.exercise_id
+        ORDER BY e.exercise_name, st.id
+    """)
+    for exercise_name, reps, weight in cur.fetchall():
+        if exercise_name not in exercise_stats:
+            exercise_stats[exercise_name] = {
+                'max_weight': weight, 'max_1rm': calculate_1rm(weight, reps),
+                'occurrences': 1, 'last_reps': reps, 'last_weight': weight,
+            }
+        else:
+            stats = exercise_stats[exercise_name]
+            if weight > stats['max_weight']:
+                stats['max_weight'] = weight
+            current_1rm = calculate_1rm(weight, reps)
+            if current_1rm > stats['max_1rm']:
+                stats['max_1rm'] = current_1rm
+            stats['occurrences'] += 1
+            stats['last_reps'] = reps
+            stats['last_weight'] = weight
+    return sorted(exercise_stats.items(), key=lambda x: x[1]['max_1rm'], reverse=True)
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed:8.3f} s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sets', type=int, default=1_000_000, help="nombre de séries à générer")
+    parser.add_argument('--db', default=None, help="chemin de la base de test")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join('/tmp', f"bench_aggregation_{args.sets}.db")
+    if not os.path.exists(db_path):
+        print(f"🔧 Génération de {args.sets} séries dans {db_path}...")
+        build_database(db_path, args.sets)
+
+    conn = sqlite3.connect(db_path)
+    register_functions(conn)
+    cur = conn.cursor()
+    total_sets = cur.execute("SELECT COUNT(*) FROM sets").fetchone()[0]
+    print(f"📊 Base: {total_sets} séries")
+
+    print("\n/progress (statistiques par exercice)")
+    python_progress, t_python = timed("Python (boucle par série)", progress_stats_python, cur)
+    _, t_new = timed("analytics (rebuild exercise_stats)", rebuild_exercise_stats, conn)
+    conn.commit()
+    new_progress = dict(load_exercise_stats(cur))
+    print(f"  → accélération x{t_python / t_new:.1f}")
+
+    print("\n/ai (contexte d'historique)")
+    python_history, t_python = timed("Python (boucle par série)", history_stats_python, cur)
+    new_history, t_new = timed("analytics (aggregate_training_history)", aggregate_training_history, cur)
+    print(f"  → accélération x{t_python / t_new:.1f}")
+
+    mismatches = [
+        name for name, stats in python_progress.items()
+        if any(stats[key] != new_progress[name][key]
+               for key in ('max_weight', 'max_1rm', 'best_1rm_reps', 'best_1rm_weight', 'best_volume_total', 'total_sets', 'last_date'))
+    ]
+    mismatches += [
+        a[0] for a, b in zip(python_history, new_history)
+        if a[0] != b[0] or any(a[1][key] != b[1][key] for key in a[1])
+    ]
+    if mismatches or len(python_history) != len(new_history):
+        print(f"\n❌ Résultats différents pour: {', '.join(mismatches[:10])}")
+        return 1
+    print("\n✅ Résultats identiques")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
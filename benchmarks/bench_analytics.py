@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark : statistiques par exercice et tonnage par séance, boucles Python
+ligne par ligne (anciennes versions de view_progress et view_session) vs
+module analytics (colonnes NumPy, ou array si NumPy n'est pas installé).
+
+Usage :
+    python benchmarks/bench_analytics.py [--sizes 10000,100000,1000000]
+
+Les séries sont générées en mémoire (pas de base SQLite) pour ne mesurer que
+le calcul. Le script échoue si les deux chemins donnent des résultats différents.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics  # noqa: E402
+from stats import calculate_1rm  # noqa: E402
+
+EXERCISE_COUNT = 200
+SETS_PER_SESSION = 40
+
+
+def generate_rows(set_count, seed=42):
+    """Séries (catalog_id, session_id, date, reps, weight) triées par date"""
+    rnd = random.Random(seed)
+    base_weights = [rnd.choice(range(10, 160, 5)) for _ in range(EXERCISE_COUNT)]
+    start = datetime(2015, 1, 1)
+    rows = []
+    for index in range(set_count):
+        session_id = index // SETS_PER_SESSION + 1
+        exercise_id = rnd.randrange(EXERCISE_COUNT) + 1
+        date = (start + timedelta(hours=7 * session_id)).strftime('%Y-%m-%d %H:%M:%S')
+        weight = max(2.5, base_weights[exercise_id - 1] + 2.5 * rnd.randint(-8, 8))
+        rows.append((exercise_id, session_id, date, rnd.randint(1, 15), weight))
+    return rows
+
+
+def legacy_loops(rows):
+    """Anciennes boucles : un dictionnaire mis à jour par série"""
+    exercise_stats = {}
+    session_volume = {}
+    for exercise_id, session_id, date, reps, weight in rows:
+        current_1rm = calculate_1rm(weight, reps)
+        stats = exercise_stats.get(exercise_id)
+        if stats is None:
+            exercise_stats[exercise_id] = {
+                'max_weight': weight, 'max_1rm': current_1rm, 'total_sets': 1,
+                'tonnage': reps * weight, 'last_date': date,
+            }
+        else:
+            stats['max_weight'] = max(stats['max_weight'], weight)
+            stats['max_1rm'] = max(stats['max_1rm'], current_1rm)
+            stats['total_sets'] += 1
+            stats['tonnage'] += reps * weight
+            stats['last_date'] = date
+        session_volume[session_id] = session_volume.get(session_id, 0.0) + reps * weight
+    return exercise_stats, session_volume
+
+
+def vectorized(columns):
+    return analytics.exercise_summary(columns), analytics.session_tonnage(columns)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def compare(legacy, fast):
+    legacy_stats, legacy_volume = legacy
+    fast_stats, fast_volume = fast
+    mismatches = [
+        exercise_id for exercise_id, stats in legacy_stats.items()
+        if exercise_id not in fast_stats
+        or any(stats[key] != fast_stats[exercise_id][key] for key in ('max_weight', 'max_1rm', 'total_sets', 'last_date'))
+        or not math.isclose(stats['tonnage'], fast_stats[exercise_id]['tonnage'], rel_tol=1e-9)
+    ]
+    mismatches += [
+        f"séance {session_id}" for session_id, volume in legacy_volume.items()
+        if not math.isclose(volume, fast_volume.get(session_id, -1), rel_tol=1e-9)
+    ]
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help="nombres de séries, séparés par des virgules")
+    args = parser.parse_args()
+
+    print(f"📊 Colonnes analytics : {analytics.BACKEND}")
+    failed = False
+    for size in (int(value) for value in args.sizes.split(',')):
+        rows = generate_rows(size)
+        legacy, t_legacy = timed(legacy_loops, rows)
+        columns, t_columns = timed(analytics.SetColumns, rows)
+        fast, t_fast = timed(vectorized, columns)
+
+        print(f"\n{size} séries")
+        print(f"  {'Boucles Python (par série)':<34} {t_legacy:8.3f} s")
+        print(f"  {'Chargement en colonnes':<34} {t_columns:8.3f} s")
+        print(f"  {'analytics (colonnes)':<34} {t_fast:8.3f} s")
+        print(f"  → accélération x{t_legacy / t_fast:.1f} (x{t_legacy / (t_columns + t_fast):.1f} chargement compris)")
+
+        mismatches = compare(legacy, fast)
+        if mismatches:
+            print(f"  ❌ Résultats différents pour: {', '.join(map(str, mismatches[:10]))}")
+            failed = True
+
+    if failed:
+        return 1
+    print("\n✅ Résultats identiques")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
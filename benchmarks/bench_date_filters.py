@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des filtres de date : rendu Jinja de 10 000 lignes de séances
+avec les filtres d'origine (strptime à chaque appel) puis avec ceux de dates.py.
+
+Usage :
+    python benchmarks/bench_date_filters.py [--rows 10000] [--repeat 5] [--output resultats.json] [--compare reference.json]
+
+Deux jeux de lignes :
+  - séances : une date distincte par ligne (liste /sessions, historique) ;
+  - séries  : 20 lignes par séance partagent la même date (détail, exports).
+Environ 2 % des dates sont dans un ancien format (JJ/MM/AAAA, ISO avec T,
+microsecondes) pour exercer le repli. Avant de mesurer, les sorties des deux
+implémentations sont comparées ligne à ligne.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from jinja2 import Environment
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dates  # noqa: E402
+from results import compare_results, write_results  # noqa: E402
+
+ROW_TEMPLATE = """{% for session in sessions %}
+<div class="session-card">
+    <h3>{{ session[1] }}</h3>
+    <p>📅 {{ session[2]|format_date }} | 🕒 {{ session[2]|format_datetime }} | 🏋️ {{ session[3] }} exercice(s)</p>
+</div>
+{% endfor %}"""
+
+
+def legacy_format_date(date_string):
+    """format_date tel qu'il était dans app.py"""
+    if not date_string:
+        return ""
+    for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y']:
+        try:
+            return datetime.strptime(str(date_string)[:19], fmt).strftime('%d-%m-%Y')
+        except ValueError:
+            continue
+    if len(str(date_string)) >= 10:
+        parts = str(date_string)[:10].split('-')
+        if len(parts) == 3:
+            return f"{parts[2]}-{parts[1]}-{parts[0]}"
+    return str(date_string)[:10]
+
+
+def legacy_format_datetime(date_string):
+    """format_datetime tel qu'il était dans app.py"""
+    if not date_string:
+        return ""
+    for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y %H:%M:%S']:
+        try:
+            return datetime.strptime(str(date_string)[:19], fmt).strftime('%d-%m-%Y %H:%M')
+        except ValueError:
+            continue
+    return str(date_string)[:16]
+
+
+def legacy_date(rng, moment):
+    return rng.choice((
+        moment.strftime('%d/%m/%Y'),
+        moment.strftime('%Y-%m-%dT%H:%M:%S'),
+        moment.strftime('%Y-%m-%d %H:%M:%S.%f'),
+        moment.strftime('%Y-%m-%d'),
+        moment.strftime('%d-%m-%Y %H:%M:%S'),
+    ))
+
+
+def make_rows(rows, per_session, seed=42):
+    """Lignes (id, nom, date, nb exercices), dates décroissantes sur ~8 ans"""
+    rng = random.Random(seed)
+    moment = datetime(2025, 6, 1, 18, 0, 0)
+    result, date = [], None
+    for index in range(rows):
+        if index % per_session == 0:
+            moment -= timedelta(hours=rng.randint(20, 60), seconds=rng.randint(0, 3599))
+            if rng.random() < 0.02:
+                date = legacy_date(rng, moment)
+            else:
+                date = moment.strftime(dates.STORED_DATE_FORMAT)
+        result.append((index, f"Séance {index // per_session}", date, rng.randint(3, 8)))
+    return result
+
+
+def check_outputs(sample):
+    """Les nouveaux filtres donnent exactement les mêmes chaînes que les anciens"""
+    edge_cases = ['', None, '2025-02-30 10:00:00', '2025-13-01', '2025-03-14 25:00:00',
+                  '14-03-2025', '14/03/2025 08:00', '2025/03/14', 'abc', '2025-03-14T08:00:00Z',
+                  datetime(2025, 3, 14, 8, 5, 9), datetime(2025, 3, 14, 8, 5, 9, 123456)]
+    mismatches = 0
+    for value in [row[2] for row in sample] + edge_cases:
+        for new, old in ((dates.format_date, legacy_format_date),
+                         (dates.format_datetime, legacy_format_datetime)):
+            if new(value) != old(value):
+                mismatches += 1
+                print(f"  ❌ {old.__name__}({value!r}) = {old(value)!r}, nouveau = {new(value)!r}")
+    return mismatches
+
+
+def render_seconds(template, rows, repeat):
+    """Meilleur temps de rendu (s) sur repeat rendus"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        template.render(sessions=rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000, help="lignes rendues par page")
+    parser.add_argument('--repeat', type=int, default=5, help="rendus par mesure")
+    parser.add_argument('--output', default=None, help="fichier JSON des résultats")
+    parser.add_argument('--compare', default=None, help="fichier JSON de référence")
+    args = parser.parse_args()
+
+    legacy_env, fast_env = Environment(), Environment()
+    legacy_env.filters.update(format_date=legacy_format_date, format_datetime=legacy_format_datetime)
+    fast_env.filters.update(format_date=dates.format_date, format_datetime=dates.format_datetime)
+    templates = {'avant': legacy_env.from_string(ROW_TEMPLATE), 'après': fast_env.from_string(ROW_TEMPLATE)}
+
+    results = {}
+    print(f"{'Rendu':<32} {'avant (ms)':>12} {'après (ms)':>12} {'gain':>8} {'cache':>8}")
+    for label, per_session in (("séances", 1), ("séries", 20)):
+        rows = make_rows(args.rows, per_session)
+        if check_outputs(rows):
+            print("❌ Les sorties diffèrent, benchmark interrompu")
+            return 1
+        if templates['avant'].render(sessions=rows) != templates['après'].render(sessions=rows):
+            print("❌ Les pages rendues diffèrent, benchmark interrompu")
+            return 1
+
+        dates._format_date.cache_clear()
+        dates._format_datetime.cache_clear()
+        before = render_seconds(templates['avant'], rows, args.repeat)
+        after = render_seconds(templates['après'], rows, args.repeat)
+        info = dates._format_date.cache_info()
+        hit_ratio = info.hits / max(info.hits + info.misses, 1)
+
+        name = f"{args.rows} lignes ({label})"
+        results[name] = {'legacy_ms': round(before * 1000, 2), 'ms': round(after * 1000, 2),
+                         'cache_hit_ratio': round(hit_ratio, 3)}
+        print(f"{name:<32} {before * 1000:12.2f} {after * 1000:12.2f} "
+              f"{before / after:7.1f}x {hit_ratio:8.1%}")
+
+    if args.output:
+        write_results(args.output, 'date_filters', results, {'rows': args.rows, 'repeat': args.repeat})
+    if args.compare and compare_results(results, args.compare, 'ms'):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks des fonctions appelées à chaque ligne affichée ou importée :
+calculate_1rm, format_date / format_datetime (filtres Jinja) et le parser
+des programmes IA.
+
+Usage :
+    python benchmarks/bench_micro.py [--repeat 5] [--output resultats.json] [--compare reference.json]
+
+Chaque mesure est le meilleur temps par appel (ns) sur --repeat répétitions
+de timeit ; le nombre d'appels par répétition est calibré automatiquement.
+Les filtres de date mémorisent leurs résultats : une même valeur répétée
+mesure le cas d'une date déjà affichée (voir bench_date_filters.py pour le
+rendu de pages entières).
+"""
+
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dates import format_date, format_datetime  # noqa: E402
+from programme_parser import iter_seances, parse_programme_ia_robuste, strip_html  # noqa: E402
+from results import compare_results, write_results  # noqa: E402
+from stats import calculate_1rm  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus')
+
+
+def load_corpus():
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            corpus[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return corpus
+
+
+def cases():
+    """(nom, fonction sans argument)"""
+    yield "calculate_1rm (8 reps)", lambda: calculate_1rm(100.0, 8)
+    yield "calculate_1rm (1 rep)", lambda: calculate_1rm(140.0, 1)
+    yield "calculate_1rm (invalide)", lambda: calculate_1rm(0, 0)
+    for label, value in (("datetime", "2025-03-14 18:30:00"), ("date", "2025-03-14"),
+                         ("JJ-MM-AAAA", "14-03-2025"), ("JJ/MM/AAAA", "14/03/2025"),
+                         ("ISO T", "2025-03-14T18:30:00"), ("vide", None)):
+        yield f"format_date ({label})", lambda value=value: format_date(value)
+    yield "format_datetime (datetime)", lambda: format_datetime("2025-03-14 18:30:00")
+    for name, text in load_corpus().items():
+        clean = strip_html(text)
+        yield f"parse_programme_ia_robuste ({name})", lambda clean=clean: parse_programme_ia_robuste(clean)
+        yield f"iter_seances ({name})", lambda clean=clean: list(iter_seances(clean))
+        yield f"strip_html ({name})", lambda text=text: strip_html(text)
+
+
+def measure(function, repeat):
+    """Meilleur temps par appel en nanosecondes"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="répétitions timeit par mesure")
+    parser.add_argument('--output', default=None, help="fichier JSON des résultats")
+    parser.add_argument('--compare', default=None, help="fichier JSON de référence")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'Fonction':<56} {'ns/appel':>12}")
+    for name, function in cases():
+        results[name] = {'ns_per_call': round(measure(function, args.repeat), 1)}
+        print(f"{name:<56} {results[name]['ns_per_call']:12.1f}")
+
+    if args.output:
+        write_results(args.output, 'micro', results, {'repeat': args.repeat})
+    if args.compare and compare_results(results, args.compare, 'ns_per_call'):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
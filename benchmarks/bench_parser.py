@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark : parser des programmes IA, ancienne version (regex recompilées,
+print par ligne, boucles imbriquées) vs parser en une passe (programme_parser).
+
+Usage :
+    python benchmarks/bench_parser.py [--repeat 200] [--fuzz 2000]
+
+Le corpus de réponses enregistrées (benchmarks/parser_corpus/*.txt) est parsé
+par les deux versions : le script échoue si un résultat diffère. L'option
+--fuzz ajoute des variantes aléatoires du corpus (lignes mélangées, supprimées,
+dupliquées) à la comparaison.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from programme_parser import parse_programme_ia_robuste  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus')
+
+
+# ─── Ancien parser (copie de app.py avant le passage à programme_parser) ───
+
+def legacy_parse_programme_ia_robuste(programme_text_clean, nom_programme="Programme"):
+    print(f"\n{'='*80}")
+    print(f"🔍 DEBUG PARSING ROBUSTE - Programme: {nom_programme}")
+    print(f"{'='*80}")
+    print(f"📄 Longueur du texte: {len(programme_text_clean)} caractères")
+
+    preview_lines = programme_text_clean.split('\n')[:20]
+    print(f"\n📋 Aperçu des 20 premières lignes:")
+    for idx, line in enumerate(preview_lines, 1):
+        print(f"   {idx:3d}: {line[:100]}")
+
+    lignes = programme_text_clean.split('\n')
+
+    has_parse_blocks = '[PARSE_START]' in programme_text_clean
+    has_separators = '─' * 10 in programme_text_clean
+
+    print(f"\n🔎 Détection du format:")
+    print(f"   Blocs [PARSE_START]: {'✅ OUI' if has_parse_blocks else '❌ NON'}")
+    print(f"   Séparateurs ────: {'✅ OUI' if has_separators else '❌ NON'}")
+
+    if has_parse_blocks:
+        print(f"\n📌 Utilisation du FORMAT ANCIEN (avec blocs de parsing)")
+        return legacy_parse_avec_blocs(lignes, nom_programme)
+    else:
+        print(f"\n📌 Utilisation du FORMAT NOUVEAU (détection automatique)")
+        return legacy_parse_sans_blocs(lignes, nom_programme)
+
+
+def legacy_parse_avec_blocs(lignes, nom_programme):
+    seances = []
+    ordre_seance = 1
+
+    i = 0
+    while i < len(lignes):
+        ligne = lignes[i].strip()
+
+        if re.match(r'^SEANCE\s*\d*\s*[:：]', ligne, re.IGNORECASE):
+            match = re.match(r'^SEANCE\s*\d*\s*[:：]\s*(.+)', ligne, re.IGNORECASE)
+            if match:
+                nom_seance = match.group(1).strip()
+                print(f"\n{'─'*80}")
+                print(f"🆕 SÉANCE {ordre_seance}: {nom_seance}")
+
+                exercices = []
+                j = i + 1
+
+                while j < len(lignes) and '[PARSE_START]' not in lignes[j]:
+                    j += 1
+
+                if j < len(lignes) and '[PARSE_START]' in lignes[j]:
+                    print(f"   ✅ [PARSE_START] trouvé")
+                    j += 1
+                    ordre_exercice = 1
+
+                    while j < len(lignes) and '[PARSE_END]' not in lignes[j]:
+                        ligne_ex = lignes[j].strip()
+
+                        if ligne_ex.startswith('EXERCICE:'):
+                            parts = ligne_ex.split('|')
+
+                            nom_exercice = parts[0].replace('EXERCICE:', '').strip()
+                            series = None
+                            repetitions = None
+                            notes = ''
+
+                            for part in parts[1:]:
+                                part = part.strip()
+                                if part.startswith('SERIES:'):
+                                    try:
+                                        series = int(part.replace('SERIES:', '').strip())
+                                    except ValueError:
+                                        pass
+                                elif part.startswith('REPS:'):
+                                    repetitions = part.replace('REPS:', '').strip()
+                                elif part.startswith('NOTES:'):
+                                    notes = part.replace('NOTES:', '').strip()
+
+                            exercices.append({
+                                'ordre': ordre_exercice,
+                                'nom': nom_exercice[:200],
+                                'series': series,
+                                'repetitions': repetitions,
+                                'notes': notes[:500]
+                            })
+                            ordre_exercice += 1
+                            print(f"      ✅ Ex {ordre_exercice-1}: {nom_exercice} | {series}x{repetitions}")
+
+                        j += 1
+
+                    i = j
+                else:
+                    print(f"   ❌ [PARSE_START] NON TROUVÉ")
+
+                seances.append({
+                    'ordre': ordre_seance,
+                    'nom': nom_seance[:200],
+                    'exercices': exercices
+                })
+                ordre_seance += 1
+                print(f"   📊 Total: {len(exercices)} exercice(s)")
+
+        i += 1
+
+    total_exercices = sum(len(s.get('exercices', [])) for s in seances)
+    success = len(seances) > 0 and total_exercices > 0
+
+    print(f"\n📊 RÉSUMÉ: {len(seances)} séance(s), {total_exercices} exercice(s)")
+    return seances, total_exercices, success
+
+
+def legacy_parse_sans_blocs(lignes, nom_programme):
+    seances = []
+    ordre_seance = 1
+
+    i = 0
+    while i < len(lignes):
+        ligne = lignes[i].strip()
+
+        seance_match = None
+
+        if '─' in ligne and 'SEANCE' in ligne.upper():
+            seance_match = re.search(r'SEANCE\s*(\d+)\s*[:：]\s*(.+)', ligne, re.IGNORECASE)
+        elif re.match(r'^SEANCE\s*\d+\s*[:：]', ligne, re.IGNORECASE):
+            seance_match = re.match(r'^SEANCE\s*(\d+)\s*[:：]\s*(.+)', ligne, re.IGNORECASE)
+
+        if seance_match:
+            nom_seance = seance_match.group(2).strip() if seance_match.lastindex >= 2 else ligne.split(':', 1)[1].strip()
+
+            print(f"\n{'─'*80}")
+            print(f"🆕 SÉANCE {ordre_seance}: {nom_seance}")
+
+            exercices = []
+            j = i + 1
+            ordre_exercice = 1
+
+            while j < len(lignes):
+                ligne_ex = lignes[j].strip()
+
+                if ('─' in ligne_ex and 'SEANCE' in ligne_ex.upper()) or re.match(r'^SEANCE\s*\d+\s*[:：]', ligne_ex, re.IGNORECASE):
+                    break
+
+                exercice_pattern = r'^-?\s*(.+?)\s*:\s*(\d+)\s*x\s*([0-9\-]+)\s*reps?\s*@\s*RIR\s*([0-9\-]+)\s*,?\s*(.+?)(?:min|minutes)?\s*repos'
+                match_ex = re.match(exercice_pattern, ligne_ex, re.IGNORECASE)
+
+                if match_ex:
+                    nom_exercice = match_ex.group(1).strip()
+                    series = int(match_ex.group(2))
+                    repetitions = match_ex.group(3).strip()
+                    rir = match_ex.group(4).strip()
+                    temps_repos = match_ex.group(5).strip()
+
+                    notes = f"RIR {rir}, repos {temps_repos} min"
+
+                    exercices.append({
+                        'ordre': ordre_exercice,
+                        'nom': nom_exercice[:200],
+                        'series': series,
+                        'repetitions': repetitions,
+                        'notes': notes[:500]
+                    })
+                    ordre_exercice += 1
+                    print(f"      ✅ Ex {ordre_exercice-1}: {nom_exercice} | {series}x{repetitions} | {notes}")
+                elif ligne_ex and not ligne_ex.startswith('━') and not ligne_ex.startswith('─'):
+                    if len(ligne_ex) > 10:
+                        print(f"      ⚠️ Ligne ignorée: {ligne_ex[:80]}")
+
+                j += 1
+
+            seances.append({
+                'ordre': ordre_seance,
+                'nom': nom_seance[:200],
+                'exercices': exercices
+            })
+            ordre_seance += 1
+            print(f"   📊 Total: {len(exercices)} exercice(s)")
+
+            i = j - 1
+
+        i += 1
+
+    total_exercices = sum(len(s.get('exercices', [])) for s in seances)
+    success = len(seances) > 0 and total_exercices > 0
+
+    print(f"\n📊 RÉSUMÉ: {len(seances)} séance(s), {total_exercices} exercice(s)")
+    return seances, total_exercices, success
+
+
+# ─── Corpus et comparaison ───
+
+def load_corpus():
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            corpus[os.path.basename(path)] = f.read()
+    return corpus
+
+
+def fuzz_variants(corpus, count, seed=42):
+    """Variantes aléatoires : lignes mélangées entre documents, supprimées ou dupliquées"""
+    rnd = random.Random(seed)
+    all_lines = [line for text in corpus.values() for line in text.split('\n')]
+    variants = {}
+    for n in range(count):
+        lines = rnd.choice(list(corpus.values())).split('\n')
+        for _ in range(rnd.randint(1, 8)):
+            action = rnd.random()
+            position = rnd.randrange(len(lines) + 1)
+            if action < 0.4:
+                lines.insert(position, rnd.choice(all_lines))
+            elif action < 0.7 and lines:
+                del lines[min(position, len(lines) - 1)]
+            elif lines:
+                lines.insert(position, lines[min(position, len(lines) - 1)])
+        variants[f"fuzz_{n:05d}"] = '\n'.join(lines)
+    return variants
+
+
+def run_legacy(text):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return legacy_parse_programme_ia_robuste(text)
+
+
+def serialize(result):
+    return json.dumps(result, ensure_ascii=False)
+
+
+def throughput(label, func, texts, repeat):
+    size = sum(len(text.encode('utf-8')) for text in texts) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    elapsed = time.perf_counter() - start
+    docs = len(texts) * repeat
+    print(f"  {label:<40} {elapsed:8.3f} s  {docs / elapsed:10.0f} docs/s  {size / elapsed / 1e6:7.2f} Mo/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help="nombre de passes sur le corpus pour la mesure")
+    parser.add_argument('--fuzz', type=int, default=2000, help="nombre de variantes aléatoires à comparer")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"📄 Corpus: {len(corpus)} réponses enregistrées")
+
+    documents = dict(corpus)
+    documents.update(fuzz_variants(corpus, args.fuzz))
+    mismatches = [
+        name for name, text in documents.items()
+        if serialize(run_legacy(text)) != serialize(parse_programme_ia_robuste(text))
+    ]
+    if mismatches:
+        print(f"❌ Résultats différents pour: {', '.join(mismatches[:10])}")
+        return 1
+    print(f"✅ Résultats identiques sur {len(documents)} documents")
+
+    texts = list(corpus.values())
+    print(f"\nDébit ({args.repeat} passes sur le corpus)")
+    t_legacy = throughput("Ancien parser (stdout redirigé)", run_legacy, texts, args.repeat)
+    t_new = throughput("Parser en une passe", parse_programme_ia_robuste, texts, args.repeat)
+    print(f"  → accélération x{t_legacy / t_new:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark : duplication d'un programme, un INSERT par séance puis par
+exercice (ancienne route programme_duplicate) vs copie ensembliste
+(programme_store.copy_programme).
+
+Usage :
+    python benchmarks/bench_programme_copy.py [--seances 12,48] [--exercices 10,20] [--copies 20]
+
+Pour chaque taille, le script compte les instructions SQL exécutées
+(set_trace_callback), mesure le temps moyen d'une copie et vérifie que les
+deux chemins produisent le même contenu.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import CONNECTION_PRAGMAS  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+from programme_store import copy_programme  # noqa: E402
+
+
+def create_programme(conn, seance_count, exercice_count):
+    with conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO programmes (nom, description) VALUES (?, ?) RETURNING id",
+                    ("Programme de mesure", "Généré par le benchmark"))
+        programme_id = cur.fetchone()[0]
+        for s in range(1, seance_count + 1):
+            cur.execute("""
+                INSERT INTO programme_seances (programme_id, ordre, nom_seance, description)
+                VALUES (?, ?, ?, ?) RETURNING id
+            """, (programme_id, s, f"Séance {s}", None))
+            seance_id = cur.fetchone()[0]
+            cur.executemany("""
+                INSERT INTO programme_exercices (seance_id, ordre, nom_exercice, series, repetitions, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(seance_id, e, f"Exercice {e:02d}", 3 + e % 3, "8-12", None) for e in range(1, exercice_count + 1)])
+    return programme_id
+
+
+def copy_legacy(cur, programme_id, nom):
+    """Ancienne boucle de programme_duplicate"""
+    cur.execute("SELECT nom, description FROM programmes WHERE id = ?", (programme_id,))
+    programme = cur.fetchone()
+    cur.execute("INSERT INTO programmes (nom, description) VALUES (?, ?)", (nom, programme[1]))
+    nouveau_programme_id = cur.lastrowid
+    cur.execute("""
+        SELECT id, ordre, nom_seance, description
+        FROM programme_seances WHERE programme_id = ? ORDER BY ordre
+    """, (programme_id,))
+    for ancien_seance_id, ordre, nom_seance, description in cur.fetchall():
+        cur.execute("""
+            INSERT INTO programme_seances (programme_id, ordre, nom_seance, description)
+            VALUES (?, ?, ?, ?)
+        """, (nouveau_programme_id, ordre, nom_seance, description))
+        nouveau_seance_id = cur.lastrowid
+        cur.execute("""
+            SELECT ordre, nom_exercice, series, repetitions, notes, catalog_id
+            FROM programme_exercices WHERE seance_id = ? ORDER BY ordre
+        """, (ancien_seance_id,))
+        for exercice in cur.fetchall():
+            cur.execute("""
+                INSERT INTO programme_exercices (seance_id, ordre, nom_exercice, series, repetitions, notes, catalog_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (nouveau_seance_id, *exercice))
+    return nouveau_programme_id
+
+
+def copy_batched(cur, programme_id, nom):
+    return copy_programme(cur, programme_id, nom)[0]
+
+
+def programme_content(cur, programme_id):
+    cur.execute("""
+        SELECT ps.ordre, ps.nom_seance, pe.ordre, pe.nom_exercice, pe.series, pe.repetitions
+        FROM programme_seances ps
+        JOIN programme_exercices pe ON pe.seance_id = ps.id
+        WHERE ps.programme_id = ?
+        ORDER BY ps.ordre, pe.ordre
+    """, (programme_id,))
+    return cur.fetchall()
+
+
+def measure(label, copy, db_path, programme_id, copies):
+    conn = sqlite3.connect(db_path)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    cur = conn.cursor()
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    with conn:
+        copy(cur, programme_id, "Copie")
+    conn.set_trace_callback(None)
+
+    start = time.perf_counter()
+    for _ in range(copies):
+        with conn:
+            copy_id = copy(cur, programme_id, "Copie")
+    elapsed = (time.perf_counter() - start) / copies
+
+    content = programme_content(cur, copy_id)
+    conn.close()
+    print(f"  {label:<36} {len(statements):6d} instructions  {elapsed * 1000:8.2f} ms/copie")
+    return elapsed, content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seances', default='12,48', help="séances par programme, séparées par des virgules")
+    parser.add_argument('--exercices', default='10,20', help="exercices par séance, séparés par des virgules")
+    parser.add_argument('--copies', type=int, default=20, help="nombre de copies mesurées")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        for seance_count in (int(value) for value in args.seances.split(',')):
+            for exercice_count in (int(value) for value in args.exercices.split(',')):
+                print(f"\n📊 {seance_count} séances × {exercice_count} exercices "
+                      f"({seance_count * exercice_count} exercices)")
+                results = []
+                for label, copy in (("Ancien (un INSERT par ligne)", copy_legacy),
+                                    ("Ensembliste (programme_store)", copy_batched)):
+                    db_path = os.path.join(workdir, f"{copy.__name__}_{seance_count}_{exercice_count}.db")
+                    with sqlite3.connect(db_path) as conn:
+                        run_migrations(conn)
+                        programme_id = create_programme(conn, seance_count, exercice_count)
+                    results.append(measure(label, copy, db_path, programme_id, args.copies))
+
+                (t_legacy, legacy), (t_fast, fast) = results
+                print(f"  → accélération x{t_legacy / t_fast:.1f}")
+                if legacy != fast:
+                    print("  ❌ Contenus des copies différents")
+                    failed = True
+
+    if failed:
+        return 1
+    print("\n✅ Copies identiques")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark : enregistrement d'une séance, une instruction par ligne (ancienne
+boucle de track_performance) vs écriture groupée (session_store).
+
+Usage :
+    python benchmarks/bench_session_save.py [--exercises 20] [--sets 6] [--saves 200]
+
+Pour chaque chemin, le script compte les appels execute/executemany faits
+depuis Python et les instructions SQL réellement exécutées (set_trace_callback),
+puis mesure le temps moyen d'un enregistrement.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import bump_data_version  # noqa: E402
+from db import CONNECTION_PRAGMAS  # noqa: E402
+from exercise_catalog import resolve_catalog_ids  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+from records import detect_records, update_record_maxima  # noqa: E402
+from session_store import save_session, validate_exercises  # noqa: E402
+from stats import register_functions, update_exercise_stats  # noqa: E402
+
+
+class CountingCursor(sqlite3.Cursor):
+    """Curseur qui compte les appels faits depuis Python"""
+
+    def execute(self, *args, **kwargs):
+        self.connection.calls += 1
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.connection.calls += 1
+        return super().executemany(*args, **kwargs)
+
+
+class CountingConnection(sqlite3.Connection):
+    calls = 0
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+def make_payload(exercise_count, set_count):
+    return [
+        {
+            'name': f"Exercice {e:02d}",
+            'sets': [{'number': s, 'reps': 8 + s % 3, 'weight': 40 + 2.5 * e + s} for s in range(1, set_count + 1)],
+        }
+        for e in range(exercise_count)
+    ]
+
+
+def save_legacy(conn, session_name, exercises_data):
+    """Ancienne boucle de track_performance (un INSERT par exercice et par série)"""
+    with conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO sessions (name) VALUES (?)", (session_name,))
+        session_id = cur.lastrowid
+        performed_sets = []
+        for exercise in exercises_data:
+            exercise_name = exercise.get('name', '').strip()
+            sets = exercise.get('sets', [])
+            if exercise_name and sets:
+                catalog_id = resolve_catalog_ids(cur, [exercise_name])[exercise_name]
+                cur.execute(
+                    "INSERT INTO exercises (session_id, exercise_name, catalog_id) VALUES (?, ?, ?)",
+                    (session_id, exercise_name, catalog_id)
+                )
+                exercise_id = cur.lastrowid
+                for set_data in sets:
+                    set_number = set_data.get('number')
+                    reps = set_data.get('reps')
+                    weight = set_data.get('weight')
+                    if set_number and reps is not None and weight is not None:
+                        cur.execute(
+                            "INSERT INTO sets (exercise_id, set_number, reps, weight) VALUES (?, ?, ?, ?)",
+                            (exercise_id, set_number, int(reps), float(weight))
+                        )
+                        performed_sets.append((catalog_id, int(reps), float(weight)))
+        cur.execute("SELECT date FROM sessions WHERE id = ?", (session_id,))
+        session_date = cur.fetchone()[0]
+        _, session_bests = detect_records(cur, session_id, session_date, performed_sets)
+        update_exercise_stats(cur, session_date, performed_sets)
+        update_record_maxima(cur, session_bests)
+        bump_data_version(cur)
+
+
+def save_batched(conn, session_name, exercises_data):
+    save_session(conn, session_name, validate_exercises(exercises_data))
+
+
+def measure(label, save, db_path, payload, saves):
+    conn = sqlite3.connect(db_path, factory=CountingConnection)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    register_functions(conn)
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    conn.calls = 0
+    save(conn, "Séance de mesure", payload)
+    conn.set_trace_callback(None)
+    calls = conn.calls
+
+    start = time.perf_counter()
+    for _ in range(saves):
+        save(conn, "Séance de mesure", payload)
+    elapsed = (time.perf_counter() - start) / saves
+    conn.close()
+
+    print(f"  {label:<32} {calls:6d} appels  {len(statements):6d} instructions  {elapsed * 1000:8.2f} ms/séance")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exercises', type=int, default=20, help="exercices par séance")
+    parser.add_argument('--sets', type=int, default=6, help="séries par exercice")
+    parser.add_argument('--saves', type=int, default=200, help="nombre d'enregistrements mesurés")
+    args = parser.parse_args()
+
+    payload = make_payload(args.exercises, args.sets)
+    print(f"📊 Séance de {args.exercises} exercices × {args.sets} séries")
+
+    timings = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, save in (("Ancien (une instruction par ligne)", save_legacy),
+                            ("Groupé (session_store)", save_batched)):
+            db_path = os.path.join(workdir, f"{save.__name__}.db")
+            with sqlite3.connect(db_path) as conn:
+                run_migrations(conn)
+            timings.append(measure(label, save, db_path, payload, args.saves))
+
+    print(f"  → accélération x{timings[0] / timings[1]:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Générateur d'historiques d'entraînement synthétiques et reproductibles.
+
+Usage :
+    python benchmarks/generate_history.py --db /tmp/history.db [--sets 1000000]
+        [--exercises 300] [--programmes 100] [--years 8] [--seed 42]
+
+Pour une même graine, la base produite est identique. L'historique imite un
+pratiquant réel :
+- des blocs de 6 à 10 semaines (mésocycles) avec une répartition fixe (PPL,
+  haut/bas, full body) : chaque nom de séance revient avec ses exercices ;
+- des charges qui progressent au fil des semaines, avec une semaine de
+  décharge en fin de bloc et une progression lente d'un bloc à l'autre ;
+- des séries de 3 à 15 répétitions, charges arrondies à 2.5 kg, quelques
+  noms d'exercices saisis avec une autre casse (alias du catalogue) ;
+- des programmes de 3 à 6 séances, dont un actif et certains entamés.
+
+De 1 000 à 10 millions de séries : les séances sont réparties sur --years
+années ; au-delà d'environ 4 séances par semaine, plusieurs séances tombent
+le même jour. Le catalogue, les statistiques par exercice, les maxima des
+records et les compteurs de programmes sont reconstruits à la fin.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import load_sets  # noqa: E402
+from exercise_catalog import backfill_catalog_ids  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+from programme_store import refresh_programme_progress  # noqa: E402
+from records import rebuild_record_maxima  # noqa: E402
+from stats import rebuild_exercise_stats, register_functions  # noqa: E402
+
+# Mouvements de base : (nom, charge de travail typique en kg, groupe)
+MOVEMENTS = [
+    ("Squat", 100, 'legs'), ("Front squat", 80, 'legs'), ("Soulevé de terre", 130, 'pull'),
+    ("Soulevé de terre roumain", 90, 'legs'), ("Presse à cuisses", 180, 'legs'),
+    ("Fentes", 40, 'legs'), ("Leg curl", 45, 'legs'), ("Leg extension", 55, 'legs'),
+    ("Hip thrust", 110, 'legs'), ("Mollets debout", 80, 'legs'), ("Mollets assis", 50, 'legs'),
+    ("Développé couché", 80, 'push'), ("Développé incliné", 65, 'push'),
+    ("Développé décliné", 75, 'push'), ("Développé militaire", 50, 'push'),
+    ("Développé épaules", 40, 'push'), ("Écarté", 20, 'push'), ("Élévations latérales", 10, 'push'),
+    ("Dips", 20, 'push'), ("Extensions triceps", 25, 'push'), ("Barre au front", 30, 'push'),
+    ("Pompes lestées", 15, 'push'), ("Tractions", 10, 'pull'), ("Rowing", 70, 'pull'),
+    ("Rowing un bras", 35, 'pull'), ("Tirage vertical", 60, 'pull'), ("Tirage horizontal", 60, 'pull'),
+    ("Face pull", 25, 'pull'), ("Oiseau", 10, 'pull'), ("Curl", 30, 'pull'),
+    ("Curl marteau", 16, 'pull'), ("Curl incliné", 14, 'pull'), ("Shrugs", 60, 'pull'),
+    ("Pull-over", 25, 'pull'), ("Good morning", 50, 'legs'), ("Gainage lesté", 10, 'core'),
+    ("Crunch", 30, 'core'), ("Relevés de jambes", 5, 'core'), ("Rotations russes", 10, 'core'),
+    ("Farmer walk", 40, 'core'),
+]
+EQUIPMENT = ["Barre", "Haltères", "Machine", "Poulie", "Smith", "Kettlebell", "Élastique", "Landmine"]
+
+# Répartitions : nom de séance -> groupes travaillés
+SPLITS = [
+    {"Push": ('push',), "Pull": ('pull',), "Legs": ('legs', 'core')},
+    {"Haut du corps": ('push', 'pull'), "Bas du corps": ('legs', 'core')},
+    {"Full body A": ('legs', 'push', 'pull'), "Full body B": ('legs', 'pull', 'push', 'core')},
+    {"Pectoraux/Triceps": ('push',), "Dos/Biceps": ('pull',), "Jambes": ('legs',), "Épaules/Abdos": ('push', 'core')},
+]
+
+AVERAGE_SETS_PER_SESSION = 6 * 4
+BATCH_SETS = 50_000
+END_DATE = datetime(2025, 12, 31, 18, 0)
+
+
+def exercise_pool(count, rnd):
+    """count exercices distincts (mouvement + matériel) : [(nom, charge typique, groupe)]"""
+    combos = [(f"{name} ({equipment})", weight, group) for name, weight, group in MOVEMENTS for equipment in EQUIPMENT]
+    rnd.shuffle(combos)
+    if count > len(combos):
+        combos += [(f"Exercice {i:04d}", rnd.choice(range(10, 150, 5)), rnd.choice(('legs', 'push', 'pull')))
+                   for i in range(count - len(combos))]
+    return combos[:count]
+
+
+def mesocycle_plan(pool_by_group, rnd):
+    """Répartition et exercices de chaque séance pour un bloc : {nom de séance: [exercices]}"""
+    plan = {}
+    for session_name, groups in rnd.choice(SPLITS).items():
+        candidates = [exercise for group in groups for exercise in pool_by_group.get(group, [])]
+        plan[session_name] = rnd.sample(candidates, min(len(candidates), rnd.randint(4, 8)))
+    return plan
+
+
+def iter_sessions(session_count, pool, years, rnd):
+    """
+    Séances dans l'ordre chronologique.
+
+    Yields:
+        tuple: (nom, date, [(nom d'exercice saisi, [(reps, charge)])])
+    """
+    pool_by_group = {}
+    for exercise in pool:
+        pool_by_group.setdefault(exercise[2], []).append(exercise)
+
+    start = END_DATE - timedelta(days=365 * years)
+    interval = (END_DATE - start) / max(1, session_count)
+    # Niveau de chaque exercice (multiplicateur de la charge typique), progresse d'un bloc à l'autre
+    level = {name: rnd.uniform(0.6, 1.1) for name, _, _ in pool}
+
+    index = 0
+    while index < session_count:
+        plan = mesocycle_plan(pool_by_group, rnd)
+        weeks = rnd.randint(6, 10)
+        block_sessions = min(session_count - index, weeks * max(1, round(len(plan) * 1.5)))
+        names = list(plan)
+        for position in range(block_sessions):
+            week = position * weeks // block_sessions
+            deload = week == weeks - 1
+            session_name = names[position % len(names)]
+            date = start + interval * index + timedelta(minutes=rnd.randint(-90, 90))
+            exercises = []
+            for name, typical, _ in plan[session_name]:
+                progress = 1 + 0.015 * week
+                working = typical * level[name] * (0.8 if deload else progress)
+                sets = []
+                for _ in range(rnd.randint(3, 5)):
+                    reps = max(1, min(15, int(rnd.gauss(8, 3))))
+                    weight = max(2.5, round(working * (1.15 - reps * 0.02) / 2.5) * 2.5)
+                    sets.append((reps, weight))
+                # Saisies irrégulières : même exercice, casse différente
+                typed = name.lower() if rnd.random() < 0.03 else name
+                exercises.append((typed, sets))
+            yield session_name, date.strftime('%Y-%m-%d %H:%M:%S'), exercises
+            index += 1
+        for name in level:
+            level[name] *= rnd.uniform(1.0, 1.04)
+
+
+def insert_history(conn, total_sets, pool, years, rnd):
+    """Insère les séances par paquets ; retourne (séances, exercices, séries)"""
+    session_count = max(1, total_sets // AVERAGE_SETS_PER_SESSION)
+    session_rows, exercise_rows, set_rows = [], [], []
+    exercise_id = 0
+    totals = [0, 0, 0]
+
+    def flush():
+        conn.executemany("INSERT INTO sessions (id, name, date) VALUES (?, ?, ?)", session_rows)
+        conn.executemany("INSERT INTO exercises (id, session_id, exercise_name) VALUES (?, ?, ?)", exercise_rows)
+        conn.executemany("INSERT INTO sets (exercise_id, set_number, reps, weight) VALUES (?, ?, ?, ?)", set_rows)
+        for position, rows in enumerate((session_rows, exercise_rows, set_rows)):
+            totals[position] += len(rows)
+            rows.clear()
+
+    for session_id, (name, date, exercises) in enumerate(iter_sessions(session_count, pool, years, rnd), start=1):
+        session_rows.append((session_id, name, date))
+        for exercise_name, sets in exercises:
+            exercise_id += 1
+            exercise_rows.append((exercise_id, session_id, exercise_name))
+            set_rows.extend((exercise_id, number, reps, weight) for number, (reps, weight) in enumerate(sets, start=1))
+        if len(set_rows) >= BATCH_SETS:
+            flush()
+    flush()
+    return tuple(totals)
+
+
+def insert_programmes(conn, programme_count, pool, rnd):
+    """Programmes de 3 à 6 séances ; le dernier est actif, certains sont entamés"""
+    pool_by_group = {}
+    for exercise in pool:
+        pool_by_group.setdefault(exercise[2], []).append(exercise)
+    cur = conn.cursor()
+    for number in range(1, programme_count + 1):
+        cur.execute("""
+            INSERT INTO programmes (nom, description, actif, date_creation)
+            VALUES (?, ?, ?, datetime(?, ?)) RETURNING id
+        """, (f"Programme {number:03d}", "Généré par generate_history", int(number == programme_count),
+              END_DATE.strftime('%Y-%m-%d'), f"-{(programme_count - number) * 7} days"))
+        programme_id = cur.fetchone()[0]
+        plan = mesocycle_plan(pool_by_group, rnd)
+        seance_names = (list(plan) * 2)[:rnd.randint(3, 6)]
+        completed = rnd.randint(0, len(seance_names))
+        for ordre, seance_name in enumerate(seance_names, start=1):
+            cur.execute("""
+                INSERT INTO programme_seances (programme_id, ordre, nom_seance, completee, date_completion)
+                VALUES (?, ?, ?, ?, ?) RETURNING id
+            """, (programme_id, ordre, seance_name, int(ordre <= completed),
+                  END_DATE.strftime('%Y-%m-%d %H:%M:%S') if ordre <= completed else None))
+            seance_id = cur.fetchone()[0]
+            cur.executemany("""
+                INSERT INTO programme_exercices (seance_id, ordre, nom_exercice, series, repetitions, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(seance_id, position, name, rnd.randint(3, 5), rnd.choice(("5", "6-8", "8-10", "10-12")), "")
+                  for position, (name, _, _) in enumerate(plan[seance_name], start=1)])
+
+
+def generate_history(path, total_sets, exercise_count=300, programme_count=100, years=8, seed=42):
+    """
+    Crée (ou remplace) la base path avec un historique synthétique.
+
+    Returns:
+        dict: nombres de séances, exercices, séries et programmes, durée de génération
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rnd = random.Random(seed)
+    pool = exercise_pool(exercise_count, rnd)
+    start = time.perf_counter()
+
+    with sqlite3.connect(path) as conn:
+        run_migrations(conn)
+        register_functions(conn)
+        # Base jetable : pas de journal pendant le chargement
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+        sessions, exercises, sets = insert_history(conn, total_sets, pool, years, rnd)
+        insert_programmes(conn, programme_count, pool, rnd)
+        backfill_catalog_ids(conn)
+        columns = load_sets(conn.cursor())
+        rebuild_exercise_stats(conn, columns)
+        rebuild_record_maxima(conn, columns)
+        refresh_programme_progress(conn.cursor())
+        conn.commit()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("ANALYZE")
+
+    return {
+        'sessions': sessions,
+        'exercises': exercises,
+        'sets': sets,
+        'programmes': programme_count,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help="chemin de la base à créer (remplacée si elle existe)")
+    parser.add_argument('--sets', type=int, default=1_000_000, help="nombre approximatif de séries")
+    parser.add_argument('--exercises', type=int, default=300, help="nombre d'exercices distincts")
+    parser.add_argument('--programmes', type=int, default=100, help="nombre de programmes")
+    parser.add_argument('--years', type=int, default=8, help="durée de l'historique en années")
+    parser.add_argument('--seed', type=int, default=42, help="graine du générateur")
+    args = parser.parse_args()
+
+    summary = generate_history(args.db, args.sets, args.exercises, args.programmes, args.years, args.seed)
+    print(f"✅ {args.db}: {summary['sessions']} séances, {summary['exercises']} exercices, "
+          f"{summary['sets']} séries, {summary['programmes']} programmes en {summary['seconds']} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
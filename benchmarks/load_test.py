@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de charge : toutes les routes de l'application via le client de test
+Flask, sur un historique synthétique (generate_history).
+
+Usage :
+    python benchmarks/load_test.py [--sets 100000] [--requests 50] [--db base.db]
+        [--metrics] [--output resultats.json] [--compare reference.json]
+
+Sans --db, une base est générée dans un répertoire temporaire (même graine,
+même base). Avec --db, la base est copiée avant le test : les routes
+d'écriture (séances, programmes) ne modifient pas l'original.
+
+Pour chaque route : latences p50/p95/p99 et moyenne (ms), pic de mémoire
+résidente (RSS) du processus après la route. Le backend IA est le stub local.
+Les routes de l'application sans scénario sont signalées ; /metrics n'est
+testée qu'avec --metrics (les métriques ajoutent leur propre coût).
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_history import generate_history  # noqa: E402
+from results import compare_results, write_results  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus')
+
+# Routes servies par Flask lui-même, hors application
+IGNORED_RULES = {'/static/<path:filename>'}
+
+PROMPTS = [
+    "Programme de force 3 jours",
+    "Hypertrophie haut/bas 4 jours",
+    "Full body débutant",
+    "Préparation trail, renforcement jambes",
+]
+
+
+def percentile(sorted_values, p):
+    """Percentile au rang le plus proche (valeurs triées)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_kb():
+    """Pic de mémoire résidente du processus (Ko)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en Ko sous Linux
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class Context:
+    """Données de la base utilisées pour construire les requêtes"""
+
+    def __init__(self, db_path, client, seed):
+        self.db_path = db_path
+        self.client = client
+        self.rnd = random.Random(seed)
+        with sqlite3.connect(db_path) as conn:
+            self.session_ids = [row[0] for row in conn.execute("SELECT id FROM sessions ORDER BY random() LIMIT 500")]
+            self.session_names = [row[0] for row in conn.execute("SELECT DISTINCT name FROM sessions")]
+            self.exercise_names = [row[0] for row in conn.execute("SELECT name FROM exercise_catalog")]
+            self.programme_ids = [row[0] for row in conn.execute("SELECT id FROM programmes")]
+            self.seance_ids = [row[0] for row in conn.execute("SELECT id FROM programme_seances")]
+        with open(os.path.join(CORPUS_DIR, 'ppl_blocs.txt'), encoding='utf-8') as f:
+            self.programme_text = f.read()
+
+    def pick(self, values):
+        return self.rnd.choice(values)
+
+    def last_programme_id(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT MAX(id) FROM programmes").fetchone()[0]
+
+    def exercises_payload(self):
+        return [
+            {'name': name, 'sets': [{'number': n, 'reps': self.rnd.randint(5, 12), 'weight': 2.5 * self.rnd.randint(4, 60)}
+                                    for n in range(1, 5)]}
+            for name in self.rnd.sample(self.exercise_names, min(6, len(self.exercise_names)))
+        ]
+
+    def submit_job(self):
+        response = self.client.post('/api/ai/jobs', json={'prompt': self.pick(PROMPTS)})
+        return response.get_json()['job_id']
+
+
+# Scénarios : (règle Flask, méthode, construction de la requête -> (url, options))
+SCENARIOS = [
+    ('/', 'GET', lambda ctx: ('/', {})),
+    ('/ai', 'GET', lambda ctx: ('/ai', {})),
+    ('/ai', 'POST', lambda ctx: ('/ai', {'data': {'prompt': ctx.pick(PROMPTS)}})),
+    ('/api/ai/jobs', 'POST', lambda ctx: ('/api/ai/jobs', {'json': {'prompt': ctx.pick(PROMPTS)}})),
+    ('/api/ai/jobs/<job_id>', 'GET', lambda ctx: (f'/api/ai/jobs/{ctx.submit_job()}', {})),
+    ('/api/ai/jobs/<job_id>/stream', 'GET', lambda ctx: (f'/api/ai/jobs/{ctx.submit_job()}/stream', {})),
+    ('/start-session/<session_name>', 'GET', lambda ctx: (f'/start-session/{ctx.pick(ctx.session_names)}', {})),
+    ('/track', 'GET', lambda ctx: ('/track', {})),
+    ('/track', 'POST', lambda ctx: ('/track', {'data': {
+        'action': 'create_session', 'session_name': ctx.pick(ctx.session_names),
+        'exercises_data': json.dumps(ctx.exercises_payload()),
+    }})),
+    ('/sessions', 'GET', lambda ctx: ('/sessions', {})),
+    ('/session/<int:session_id>', 'GET', lambda ctx: (f'/session/{ctx.pick(ctx.session_ids)}', {})),
+    ('/progress', 'GET', lambda ctx: ('/progress', {})),
+    ('/api/exercises', 'GET', lambda ctx: (f'/api/exercises?q={ctx.pick(ctx.exercise_names)[:ctx.rnd.randint(2, 6)]}', {})),
+    ('/api/progress/<path:exercise>', 'GET', lambda ctx: (f'/api/progress/{ctx.pick(ctx.exercise_names)}', {})),
+    ('/api/sessions', 'GET', lambda ctx: ('/api/sessions?limit=50', {})),
+    ('/api/sessions', 'POST', lambda ctx: ('/api/sessions', {'json': {
+        'name': ctx.pick(ctx.session_names), 'exercises': ctx.exercises_payload(),
+    }})),
+    ('/programme', 'GET', lambda ctx: ('/programme', {})),
+    ('/programme/create', 'GET', lambda ctx: ('/programme/create', {})),
+    ('/programme/create', 'POST', lambda ctx: ('/programme/create', {'data': {
+        'nom': f"Programme test {ctx.rnd.randint(1, 10**6)}",
+        'seances_data': json.dumps([{'ordre': n, 'nom': f"Séance {n}"} for n in range(1, 5)]),
+    }})),
+    ('/programme/activate/<int:programme_id>', 'GET',
+     lambda ctx: (f'/programme/activate/{ctx.pick(ctx.programme_ids)}', {})),
+    ('/programme/duplicate/<int:programme_id>', 'GET',
+     lambda ctx: (f'/programme/duplicate/{ctx.pick(ctx.programme_ids)}', {})),
+    ('/programme/next-mesocycle/<int:programme_id>', 'GET',
+     lambda ctx: (f'/programme/next-mesocycle/{ctx.pick(ctx.programme_ids)}', {})),
+    # Supprime les programmes créés par les scénarios précédents, jamais ceux de la base générée
+    ('/programme/delete/<int:programme_id>', 'GET',
+     lambda ctx: (f'/programme/delete/{ctx.last_programme_id()}', {})),
+    ('/programme/seance/toggle/<int:seance_id>', 'GET',
+     lambda ctx: (f'/programme/seance/toggle/{ctx.pick(ctx.seance_ids)}', {})),
+    ('/programme/start-seance/<int:seance_id>', 'GET',
+     lambda ctx: (f'/programme/start-seance/{ctx.pick(ctx.seance_ids)}', {})),
+    ('/programme/save-from-ai', 'POST', lambda ctx: ('/programme/save-from-ai', {'data': {
+        'nom': f"Programme IA {ctx.rnd.randint(1, 10**6)}", 'programme_text': ctx.programme_text,
+    }})),
+    ('/manifest.json', 'GET', lambda ctx: ('/manifest.json', {})),
+    ('/sw.js', 'GET', lambda ctx: ('/sw.js', {})),
+    ('/metrics', 'GET', lambda ctx: ('/metrics', {})),
+]
+
+
+def run_scenario(client, ctx, method, build, count):
+    """Exécute count requêtes ; retourne les latences (s) triées et les statuts rencontrés"""
+    latencies = []
+    statuses = set()
+    for _ in range(count):
+        url, options = build(ctx)
+        start = time.perf_counter()
+        response = client.open(url, method=method, **options)
+        response.get_data()
+        latencies.append(time.perf_counter() - start)
+        statuses.add(response.status_code)
+        response.close()
+    latencies.sort()
+    return latencies, statuses
+
+
+def uncovered_rules(app):
+    covered = {(rule, method) for rule, method, _ in SCENARIOS}
+    return sorted(
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules() if rule.rule not in IGNORED_RULES
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+        if (rule.rule, method) not in covered
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sets', type=int, default=100_000, help="séries de la base générée")
+    parser.add_argument('--db', default=None, help="base existante à utiliser (copiée)")
+    parser.add_argument('--requests', type=int, default=50, help="requêtes par route")
+    parser.add_argument('--seed', type=int, default=42, help="graine de la base et des requêtes")
+    parser.add_argument('--metrics', action='store_true', help="activer les métriques (et tester /metrics)")
+    parser.add_argument('--output', default=None, help="fichier JSON des résultats")
+    parser.add_argument('--compare', default=None, help="fichier JSON de référence (régressions sur p95)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    db_path = os.path.join(workdir, 'database.db')
+    try:
+        if args.db:
+            shutil.copy(args.db, db_path)
+            print(f"📂 Base copiée depuis {args.db}")
+        else:
+            summary = generate_history(db_path, args.sets, seed=args.seed)
+            print(f"🧪 Base générée: {summary['sessions']} séances, {summary['sets']} séries "
+                  f"en {summary['seconds']} s")
+
+        # L'application lit sa configuration à l'import
+        os.environ['DATABASE_PATH'] = db_path
+        os.environ['AI_BACKEND'] = 'stub'
+        if args.metrics:
+            os.environ['METRICS_ENABLED'] = '1'
+        import app as appmodule
+
+        client = appmodule.app.test_client()
+        ctx = Context(db_path, client, args.seed)
+        rss_start = peak_rss_kb()
+
+        results = {}
+        print(f"\n{'Route':<56} {'p50':>8} {'p95':>8} {'p99':>8} {'moy.':>8}   RSS max")
+        for rule, method, build in SCENARIOS:
+            if rule not in {r.rule for r in appmodule.app.url_map.iter_rules()}:
+                continue
+            latencies, statuses = run_scenario(client, ctx, method, build, args.requests)
+            name = f"{method} {rule}"
+            results[name] = {
+                'requests': len(latencies),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+                'statuses': sorted(statuses),
+                'peak_rss_kb': peak_rss_kb(),
+            }
+            r = results[name]
+            flag = ' ❌' if any(status >= 500 for status in statuses) else ''
+            print(f"{name:<56} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {r['mean_ms']:8.2f}  "
+                  f"{r['peak_rss_kb'] / 1024:7.1f} Mo{flag}")
+
+        print(f"\n🧠 RSS max: {peak_rss_kb() / 1024:.1f} Mo (après chargement de l'application: {rss_start / 1024:.1f} Mo)")
+        missing = uncovered_rules(appmodule.app)
+        if missing:
+            print(f"⚠️ Routes sans scénario: {', '.join(missing)}")
+
+        parameters = {'sets': args.sets if not args.db else None, 'db': args.db,
+                      'requests': args.requests, 'seed': args.seed}
+        if args.output:
+            write_results(args.output, 'load_test', results, parameters)
+        failed = any(status >= 500 for r in results.values() for status in r['statuses'])
+        if args.compare and compare_results(results, args.compare, 'p95_ms'):
+            failed = True
+        return 1 if failed else 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Résultats de benchmarks au format JSON et comparaison avec une exécution de référence.
+
+Chaque fichier contient les métadonnées de l'exécution (date, Python,
+plateforme, commit) et un dictionnaire ``results`` {nom: {mesure: valeur}}.
+"""
+
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = __file__.rsplit('/benchmarks/', 1)[0]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_results(path, benchmark, results, parameters=None):
+    """Écrit les résultats d'un benchmark (et ses paramètres) dans un fichier JSON"""
+    payload = {
+        'benchmark': benchmark,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'commit': _git_commit(),
+        'parameters': parameters or {},
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"💾 Résultats écrits dans {path}")
+
+
+def compare_results(results, baseline_path, metric, threshold=0.10):
+    """
+    Compare une mesure (plus petite = meilleure) à un fichier de référence.
+
+    Affiche les écarts supérieurs à threshold (10 % par défaut) et retourne
+    la liste des noms en régression.
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    print(f"\n📏 Comparaison avec {baseline_path} ({metric}, seuil {threshold:.0%})")
+    for name, values in results.items():
+        reference = baseline.get(name, {}).get(metric)
+        current = values.get(metric)
+        if not reference or current is None:
+            continue
+        change = current / reference - 1
+        if change > threshold:
+            regressions.append(name)
+            print(f"  ❌ {name:<48} {reference:10.3f} → {current:10.3f}  (+{change:.0%})")
+        elif change < -threshold:
+            print(f"  ✅ {name:<48} {reference:10.3f} → {current:10.3f}  ({change:.0%})")
+    if not regressions:
+        print("  ✅ Aucune régression")
+    return regressions
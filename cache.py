@@ -0,0 +1,104 @@
+"""
+Caches en mémoire et compteur de version des données.
+
+Le compteur ``data_version`` est stocké dans la table ``app_meta`` et
+incrémenté dans la transaction de chaque écriture qui modifie les données
+affichées (enregistrement de séance, programmes, nettoyage de la base), avec
+l'heure de la modification (``data_modified``, secondes Unix) qui sert
+d'en-tête Last-Modified aux pages mises en cache. Les valeurs mises en cache
+sont indexées par cette version : dès qu'elle change, les anciennes entrées ne
+sont plus jamais lues et finissent évincées par la politique LRU.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+DATA_VERSION_KEY = 'data_version'
+DATA_MODIFIED_KEY = 'data_modified'
+
+
+def get_data_version(cur):
+    """Retourne la version courante des données (lecture par clé primaire)"""
+    cur.execute("SELECT value FROM app_meta WHERE key = ?", (DATA_VERSION_KEY,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def get_data_state(cur):
+    """
+    Retourne (version des données, heure de la dernière modification en secondes Unix).
+
+    L'heure vaut None tant qu'aucune écriture n'a incrémenté la version.
+    """
+    cur.execute("SELECT key, value FROM app_meta WHERE key IN (?, ?)", (DATA_VERSION_KEY, DATA_MODIFIED_KEY))
+    values = dict(cur.fetchall())
+    return values.get(DATA_VERSION_KEY, 0), values.get(DATA_MODIFIED_KEY)
+
+
+def bump_data_version(cur):
+    """Incrémente la version des données (à appeler dans la transaction d'écriture)"""
+    cur.execute("""
+        INSERT INTO app_meta (key, value) VALUES (?, 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    """, (DATA_VERSION_KEY,))
+    cur.execute("""
+        INSERT INTO app_meta (key, value) VALUES (?, CAST(strftime('%s', 'now') AS INTEGER))
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (DATA_MODIFIED_KEY,))
+
+
+class LRUCache:
+    """Cache LRU thread-safe borné en nombre d'entrées et en taille mémoire approximative"""
+
+    def __init__(self, max_entries=64, max_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _sizeof(value):
+        return sys.getsizeof(value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def discard(self, key):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
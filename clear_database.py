@@ -9,6 +9,11 @@ import sqlite3
 import os
 from datetime import datetime
 
+from cache import bump_data_version
+
+# Tables conservées lors du nettoyage
+PRESERVED_TABLES = ('app_meta', 'sqlite_sequence')
+
 def clear_database():
     """Vide toutes les tables de la base de données"""
     
@@ -35,7 +40,8 @@ def clear_database():
             
             # Lister toutes les tables
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [table[0] for table in cursor.fetchall()]
+            all_tables = [table[0] for table in cursor.fetchall()]
+            tables = all_tables
             
             if not tables:
                 print("ℹ️  Aucune table trouvée dans la base de données")
@@ -43,6 +49,10 @@ def clear_database():
             
             print(f"📋 Tables trouvées: {', '.join(tables)}")
             
+            # app_meta contient le compteur de version des données : il est incrémenté
+            # (et non remis à zéro) pour invalider les caches de l'application
+            tables = [table for table in tables if table not in PRESERVED_TABLES]
+            
             # Compter les enregistrements avant suppression
             total_records = 0
             for table in tables:
@@ -65,6 +75,11 @@ def clear_database():
             # (pour éviter les erreurs de clé étrangère)
             deletion_order = [
                 'sets',                    # Dépend de exercises
+                'personal_records',        # Dépend de sessions
+                'exercise_rep_records',    # Maxima des records
+                'exercise_stats',          # Statistiques dérivées des séries
+                'exercise_aliases',        # Dépend de exercise_catalog
+                'exercise_catalog',        # Exercices canoniques (autocomplétion, statistiques)
                 'programme_exercices',     # Dépend de programme_seances
                 'programme_seances',       # Dépend de programmes
                 'exercises',               # Dépend de sessions
@@ -93,6 +108,11 @@ def clear_database():
             # Remettre les contraintes de clé étrangère
             cursor.execute("PRAGMA foreign_keys = ON")
             
+            # Invalider les caches de l'application (résumé d'historique IA, ...)
+            if 'app_meta' in all_tables:
+                bump_data_version(cursor)
+                print("  🔄 Caches de l'application invalidés")
+            
             # Réinitialiser les compteurs d'auto-increment
             for table in tables:
                 cursor.execute(f"DELETE FROM sqlite_sequence WHERE name='{table}'")
@@ -0,0 +1,87 @@
+"""
+Formatage des dates affichées (filtres Jinja format_date et format_datetime).
+
+Les dates sont stockées au format de CURRENT_TIMESTAMP
+("AAAA-MM-JJ HH:MM:SS", ``STORED_DATE_FORMAT``) : le cas courant est traité
+par découpage de la chaîne, sans strptime. Les autres formats (anciennes
+données, saisies "JJ/MM/AAAA"...) passent par la chaîne de formats
+d'origine, qui donne exactement les mêmes résultats qu'avant.
+
+Une même date revient sur de nombreuses lignes (séries d'une séance,
+historique) : les résultats sont mémorisés dans un cache LRU.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+STORED_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Entrées mémorisées par filtre
+MEMO_SIZE = 4096
+
+DATE_FALLBACK_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+DATETIME_FALLBACK_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y %H:%M:%S')
+
+
+def _is_iso_day(text):
+    """Les 10 premiers caractères ont la forme AAAA-MM-JJ"""
+    return (len(text) >= 10 and text[4] == '-' and text[7] == '-'
+            and text[:4].isdigit() and text[5:7].isdigit() and text[8:10].isdigit())
+
+
+def to_stored_date(value):
+    """Date ou datetime au format stocké (à utiliser à l'écriture à la place de datetime brut)"""
+    return value.strftime(STORED_DATE_FORMAT)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _format_date(text):
+    # AAAA-MM-JJ… : l'ancienne chaîne de formats aboutissait toujours à JJ-MM-AAAA
+    if _is_iso_day(text):
+        return f"{text[8:10]}-{text[5:7]}-{text[:4]}"
+
+    for fmt in DATE_FALLBACK_FORMATS:
+        try:
+            return datetime.strptime(text[:19], fmt).strftime('%d-%m-%Y')
+        except ValueError:
+            continue
+    if len(text) >= 10:
+        parts = text[:10].split('-')
+        if len(parts) == 3:
+            return f"{parts[2]}-{parts[1]}-{parts[0]}"
+    return text[:10]
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _format_datetime(text):
+    head = text[:19]
+    # Format stocké (ou date seule) : validé par fromisoformat, formaté par découpage
+    if _is_iso_day(head) and (len(head) == 10 or (
+            len(head) == 19 and head[10] == ' ' and head[13] == ':' and head[16] == ':')):
+        try:
+            datetime.fromisoformat(head)
+        except ValueError:
+            return text[:16]
+        time_part = head[11:16] if len(head) == 19 else '00:00'
+        return f"{head[8:10]}-{head[5:7]}-{head[:4]} {time_part}"
+
+    for fmt in DATETIME_FALLBACK_FORMATS:
+        try:
+            return datetime.strptime(head, fmt).strftime('%d-%m-%Y %H:%M')
+        except ValueError:
+            continue
+    return text[:16]
+
+
+def format_date(value):
+    """Convertit une date au format JJ-MM-AAAA"""
+    if not value:
+        return ""
+    return _format_date(str(value))
+
+
+def format_datetime(value):
+    """Convertit une date au format JJ-MM-AAAA HH:MM"""
+    if not value:
+        return ""
+    return _format_datetime(str(value))
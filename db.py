@@ -0,0 +1,159 @@
+"""
+Couche d'accès SQLite partagée par toutes les routes.
+
+Les connexions sont ouvertes une seule fois, configurées (WAL, synchronous,
+foreign_keys, mmap, cache) puis recyclées via un pool borné et thread-safe.
+Chaque requête Flask emprunte une connexion stockée dans ``g`` et la rend
+automatiquement au pool à la fin du contexte d'application.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from flask import current_app, g
+
+from stats import register_functions
+
+DEFAULT_DATABASE = 'database.db'
+DEFAULT_POOL_SIZE = 8
+DEFAULT_POOL_TIMEOUT = 10.0
+
+# PRAGMAs appliqués une seule fois, à l'ouverture de chaque connexion
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA mmap_size = 268435456",   # 256 Mo
+    "PRAGMA cache_size = -16000",     # ~16 Mo de cache de pages
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+def connect(database=DEFAULT_DATABASE, factory=sqlite3.Connection):
+    """Ouvre une connexion SQLite configurée pour l'application"""
+    conn = sqlite3.connect(database, timeout=5.0, check_same_thread=False, factory=factory)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    register_functions(conn)
+    return conn
+
+
+class ConnectionPool:
+    """Pool borné de connexions SQLite réutilisables entre les requêtes"""
+
+    def __init__(self, database=DEFAULT_DATABASE, max_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT,
+                 factory=sqlite3.Connection):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        # Classe des connexions créées (connexion instrumentée quand les métriques sont activées)
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def acquire(self):
+        """Emprunte une connexion (en crée une si le pool n'est pas plein)"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return connect(self.database, self.factory)
+            except sqlite3.Error:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Pool de connexions épuisé ({self.max_size} connexions occupées)"
+            )
+
+    def release(self, conn):
+        """Rend une connexion au pool en annulant toute transaction restée ouverte"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Connexion inutilisable : on la jette et on libère sa place
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def close_all(self):
+        """Ferme toutes les connexions inactives du pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+def get_pool(app=None):
+    """Retourne le pool de connexions de l'application"""
+    app = app or current_app
+    return app.extensions['db_pool']
+
+
+def get_db():
+    """Retourne la connexion de la requête courante (empruntée au pool au premier appel)"""
+    if 'db' not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+
+@contextmanager
+def pooled_connection(app=None):
+    """
+    Connexion empruntée au pool le temps d'un bloc with, puis rendue.
+
+    Pour les traitements longs (génération IA) : la connexion n'est tenue que
+    pendant les accès à la base, pas pendant l'attente du modèle.
+    """
+    pool = get_pool(app)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def close_db(exception=None):
+    """Rend la connexion de la requête au pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def init_app(app):
+    """Attache le pool de connexions à l'application Flask"""
+    app.config.setdefault('DATABASE', DEFAULT_DATABASE)
+    app.config.setdefault('DATABASE_POOL_SIZE', DEFAULT_POOL_SIZE)
+    app.extensions['db_pool'] = ConnectionPool(
+        app.config['DATABASE'],
+        max_size=app.config['DATABASE_POOL_SIZE'],
+    )
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,325 @@
+"""
+Catalogue des noms d'exercices et index de recherche pour l'autocomplétion.
+
+La table ``exercise_catalog`` contient une ligne par exercice (nom affiché,
+clé canonique, nombre d'utilisations). Les noms saisis librement dans les
+séances et les programmes sont résolus par ``exercise_aliases`` : les variantes
+d'écriture ("Développé couché", "developpe couche ", "Développé couché (Barre)")
+pointent vers la même entrée, et ``exercises.catalog_id`` /
+``programme_exercices.catalog_id`` permettent de regrouper les statistiques sur
+un entier. Le catalogue est tenu à jour dans la transaction de chaque
+enregistrement de séance.
+
+``ExerciseIndex`` garde en mémoire ces noms « repliés » (minuscules, sans
+accents ni ponctuation) dans une liste triée : une recherche par préfixe est
+une simple dichotomie (bisect). Chaque mot du nom est indexé, "cou" trouve
+donc "Développé couché". Si les préfixes ne suffisent pas, une recherche
+approchée (mots dans l'ordre, fautes de frappe) complète les résultats.
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+_SEPARATORS_RE = re.compile(r'[\W_]+')
+# Équipement par défaut, ignoré pour identifier un exercice : "Squat (Barre)" = "Squat"
+_DEFAULT_EQUIPMENT_RE = re.compile(r'\s*\(\s*barre\s*\)\s*$', re.IGNORECASE)
+
+# Nombre de noms par requête IN (...) lors de la résolution
+LOOKUP_BATCH_SIZE = 400
+
+
+def fold(text):
+    """Forme de recherche : sans accents, en minuscules, mots séparés par une espace"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(_SEPARATORS_RE.sub(' ', without_accents.casefold()).split())
+
+
+def normalize_exercise_name(name):
+    """
+    Clé canonique d'un nom d'exercice : forme repliée, sans l'équipement par défaut.
+
+    "Développé couché", "developpe couche " et "Développé couché (Barre)"
+    ont la même clé "developpe couche".
+    """
+    key = fold(_DEFAULT_EQUIPMENT_RE.sub('', name))
+    # Nom fait uniquement de ponctuation : on garde le nom exact comme clé
+    return key or name.strip()
+
+
+def resolve_catalog_ids(cur, exercise_names):
+    """
+    Identifiants du catalogue pour des noms saisis librement.
+
+    Un nom déjà rencontré est résolu par la table des alias ; un nouveau nom
+    est rattaché à l'exercice de même clé canonique, ou crée une entrée du
+    catalogue (il en devient le nom affiché). Le nouveau nom est enregistré
+    comme alias dans les deux cas.
+
+    Returns:
+        dict: {nom sans espaces de bord: catalog_id}
+    """
+    names = list(dict.fromkeys(name.strip() for name in exercise_names if name and name.strip()))
+    resolved = {}
+    for start in range(0, len(names), LOOKUP_BATCH_SIZE):
+        batch = names[start:start + LOOKUP_BATCH_SIZE]
+        cur.execute(f"""
+            SELECT alias, catalog_id FROM exercise_aliases
+            WHERE alias IN ({', '.join('?' for _ in batch)})
+        """, batch)
+        resolved.update(cur.fetchall())
+
+    missing = [name for name in names if name not in resolved]
+    if not missing:
+        return resolved
+
+    keys = {name: normalize_exercise_name(name) for name in missing}
+    distinct_keys = list(dict.fromkeys(keys.values()))
+    ids_by_key = {}
+    for start in range(0, len(distinct_keys), LOOKUP_BATCH_SIZE):
+        batch = distinct_keys[start:start + LOOKUP_BATCH_SIZE]
+        cur.execute(f"""
+            SELECT normalized_name, id FROM exercise_catalog
+            WHERE normalized_name IN ({', '.join('?' for _ in batch)})
+        """, batch)
+        ids_by_key.update(cur.fetchall())
+
+    for name in missing:
+        key = keys[name]
+        if key not in ids_by_key:
+            cur.execute(
+                "INSERT INTO exercise_catalog (name, normalized_name) VALUES (?, ?) RETURNING id",
+                (name, key)
+            )
+            ids_by_key[key] = cur.fetchone()[0]
+        resolved[name] = ids_by_key[key]
+
+    cur.executemany(
+        "INSERT INTO exercise_aliases (alias, catalog_id) VALUES (?, ?)",
+        [(name, resolved[name]) for name in missing]
+    )
+    return resolved
+
+
+def find_catalog_id(cur, exercise_name):
+    """Identifiant du catalogue pour un nom (alias exact ou même clé canonique), sans rien créer"""
+    name = exercise_name.strip()
+    cur.execute("SELECT catalog_id FROM exercise_aliases WHERE alias = ?", (name,))
+    row = cur.fetchone()
+    if row is None:
+        cur.execute("SELECT id FROM exercise_catalog WHERE normalized_name = ?", (normalize_exercise_name(name),))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def record_exercises(cur, catalog_ids, session_date):
+    """
+    Incrémente l'usage des exercices d'une séance (un identifiant par exercice saisi).
+
+    À appeler dans la transaction d'enregistrement de la séance.
+    """
+    usage = Counter(catalog_ids)
+    cur.executemany("""
+        UPDATE exercise_catalog SET
+            usage_count = usage_count + ?,
+            last_used = MAX(COALESCE(last_used, ?), ?)
+        WHERE id = ?
+    """, [(count, session_date, session_date, catalog_id) for catalog_id, count in usage.items()])
+
+
+def backfill_catalog_ids(conn):
+    """
+    Rattache au catalogue les exercices (séances et programmes) sans catalog_id,
+    puis recalcule l'usage de chaque entrée du catalogue.
+
+    Les noms les plus utilisés sont résolus en premier : parmi les variantes
+    d'un même exercice, c'est la plus fréquente qui devient le nom affiché.
+
+    Returns:
+        int: nombre d'exercices de séance rattachés
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT name FROM (
+            SELECT TRIM(exercise_name) AS name, COUNT(*) AS uses
+            FROM exercises WHERE catalog_id IS NULL GROUP BY TRIM(exercise_name)
+            UNION ALL
+            SELECT TRIM(nom_exercice), 0
+            FROM programme_exercices WHERE catalog_id IS NULL GROUP BY TRIM(nom_exercice)
+        )
+        WHERE name != ''
+        GROUP BY name
+        ORDER BY SUM(uses) DESC, name
+    """)
+    names = [name for name, in cur.fetchall()]
+    if not names:
+        return 0
+
+    resolve_catalog_ids(cur, names)
+    cur.execute("""
+        UPDATE exercises SET catalog_id = (
+            SELECT a.catalog_id FROM exercise_aliases a WHERE a.alias = TRIM(exercises.exercise_name)
+        )
+        WHERE catalog_id IS NULL
+    """)
+    count = cur.rowcount
+    cur.execute("""
+        UPDATE programme_exercices SET catalog_id = (
+            SELECT a.catalog_id FROM exercise_aliases a WHERE a.alias = TRIM(programme_exercices.nom_exercice)
+        )
+        WHERE catalog_id IS NULL
+    """)
+    cur.execute("""
+        UPDATE exercise_catalog SET
+            usage_count = (SELECT COUNT(*) FROM exercises e WHERE e.catalog_id = exercise_catalog.id),
+            last_used = (
+                SELECT MAX(s.date) FROM exercises e JOIN sessions s ON s.id = e.session_id
+                WHERE e.catalog_id = exercise_catalog.id
+            )
+    """)
+    return count
+
+
+def _edit_distance(a, b, max_distance):
+    """Distance d'édition (avec transpositions), arrêtée dès qu'elle dépasse max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            cost = 0 if char_a == char_b else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class ExerciseIndex:
+    """Index en mémoire des noms du catalogue (préfixes par dichotomie + recherche approchée)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Listes remplacées (jamais modifiées sur place) : les recherches lisent sans verrou
+        self._keys = []       # [(suffixe replié à partir d'un mot, position du mot, nom)], trié
+        self._tokens = {}     # nom -> mots repliés
+        self._usage = {}      # nom -> nombre d'utilisations
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._tokens)
+
+    @staticmethod
+    def _entries(name, tokens):
+        return [(' '.join(tokens[position:]), position, name) for position in range(len(tokens))]
+
+    def load(self, rows):
+        """Construit l'index à partir de lignes (name, usage_count)"""
+        tokens = {}
+        usage = {}
+        keys = []
+        for name, usage_count in rows:
+            folded = fold(name).split()
+            if not folded:
+                continue
+            tokens[name] = folded
+            usage[name] = usage_count
+            keys.extend(self._entries(name, folded))
+        keys.sort()
+        with self._lock:
+            self._keys, self._tokens, self._usage = keys, tokens, usage
+            self.loaded = True
+
+    def load_from_db(self, cur):
+        cur.execute("SELECT name, usage_count FROM exercise_catalog")
+        self.load(cur.fetchall())
+
+    def add(self, exercise_names):
+        """Mise à jour incrémentale après l'enregistrement d'une séance"""
+        with self._lock:
+            keys = self._keys
+            tokens = dict(self._tokens)
+            usage = dict(self._usage)
+            for name in exercise_names:
+                if name not in tokens:
+                    folded = fold(name).split()
+                    if not folded:
+                        continue
+                    tokens[name] = folded
+                    if keys is self._keys:
+                        keys = list(keys)
+                    for entry in self._entries(name, folded):
+                        bisect.insort(keys, entry)
+                usage[name] = usage.get(name, 0) + 1
+            self._keys, self._tokens, self._usage = keys, tokens, usage
+
+    def names(self):
+        """Tous les noms du catalogue, triés"""
+        return sorted(self._tokens)
+
+    def search(self, query, limit=10):
+        """
+        Noms correspondant à la saisie, les plus pertinents d'abord :
+        1. préfixe du nom complet, puis préfixe d'un mot du nom
+        2. chaque mot de la saisie débute un mot du nom, dans l'ordre
+        3. préfixe d'un mot à une ou deux fautes de frappe près
+        À pertinence égale, les exercices les plus utilisés passent en premier.
+        """
+        folded_query = fold(query)
+        if not folded_query or limit <= 0:
+            return []
+        keys, tokens, usage = self._keys, self._tokens, self._usage
+
+        ranked = {}
+
+        # 1. Préfixe : toutes les clés commençant par la saisie sont contiguës
+        index = bisect.bisect_left(keys, (folded_query,))
+        while index < len(keys) and keys[index][0].startswith(folded_query):
+            _, position, name = keys[index]
+            rank = 0 if position == 0 else 1
+            if ranked.get(name, 2 ** 31) > rank:
+                ranked[name] = rank
+            index += 1
+
+        if len(ranked) < limit:
+            query_tokens = folded_query.split()
+            max_distance = 1 if len(folded_query) <= 5 else 2
+            distances = {}  # beaucoup de noms partagent les mêmes débuts de mots
+            for name, name_tokens in tokens.items():
+                if name in ranked:
+                    continue
+                # 2. Mots de la saisie = débuts de mots du nom, dans l'ordre
+                if len(query_tokens) > 1 and self._match_tokens(query_tokens, name_tokens):
+                    ranked[name] = 2
+                    continue
+                # 3. Fautes de frappe sur le début d'un mot (saisies d'au moins 3 lettres)
+                if len(folded_query) >= 3:
+                    distance = max_distance + 1
+                    for position in range(len(name_tokens)):
+                        start = ' '.join(name_tokens[position:])[:len(folded_query)]
+                        if start not in distances:
+                            distances[start] = _edit_distance(folded_query, start, max_distance)
+                        distance = min(distance, distances[start])
+                    if distance <= max_distance:
+                        ranked[name] = 2 + distance
+
+        ordered = sorted(ranked, key=lambda name: (ranked[name], -usage.get(name, 0), name))
+        return ordered[:limit]
+
+    @staticmethod
+    def _match_tokens(query_tokens, name_tokens):
+        position = 0
+        for query_token in query_tokens:
+            while position < len(name_tokens) and not name_tokens[position].startswith(query_token):
+                position += 1
+            if position == len(name_tokens):
+                return False
+            position += 1
+        return True
@@ -6,6 +6,10 @@ Script pour initialiser la base de données avec les nouvelles tables pour les s
 import sqlite3
 import os
 
+from programme_store import refresh_programme_progress
+from migrations import get_schema_version, run_migrations
+from session_store import write_session
+
 def init_database():
     """Initialise la base de données avec toutes les tables nécessaires."""
     
@@ -18,82 +22,10 @@ def init_database():
         with sqlite3.connect(db_path) as conn:
             cursor = conn.cursor()
             
-            # Créer la table des séances
-            print("📋 Création de la table 'sessions'...")
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT,
-                    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Créer la table des exercices (sans sets, reps, weight)
-            print("🏋️ Création de la table 'exercises'...")
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS exercises (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id INTEGER NOT NULL,
-                    exercise_name TEXT NOT NULL,
-                    FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Créer la table des séries individuelles
-            print("📊 Création de la table 'sets'...")
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exercise_id INTEGER NOT NULL,
-                    set_number INTEGER NOT NULL,
-                    reps INTEGER NOT NULL,
-                    weight REAL NOT NULL,
-                    FOREIGN KEY (exercise_id) REFERENCES exercises (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Créer la table des programmes
-            print("📅 Création de la table 'programmes'...")
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS programmes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nom TEXT NOT NULL,
-                    description TEXT,
-                    actif INTEGER DEFAULT 0,
-                    archive INTEGER DEFAULT 0,
-                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Créer la table des séances de programmes
-            print("📋 Création de la table 'programme_seances'...")
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS programme_seances (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    programme_id INTEGER NOT NULL,
-                    ordre INTEGER NOT NULL,
-                    nom_seance TEXT NOT NULL,
-                    description TEXT,
-                    completee INTEGER DEFAULT 0,
-                    date_completion TIMESTAMP,
-                    FOREIGN KEY (programme_id) REFERENCES programmes (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Créer la table des exercices des séances de programme
-            print("🏋️ Création de la table 'programme_exercices'...")
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS programme_exercices (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    seance_id INTEGER NOT NULL,
-                    ordre INTEGER NOT NULL,
-                    nom_exercice TEXT NOT NULL,
-                    series INTEGER,
-                    repetitions TEXT,
-                    notes TEXT,
-                    FOREIGN KEY (seance_id) REFERENCES programme_seances (id) ON DELETE CASCADE
-                )
-            ''')
+            # Créer les tables et index via les migrations versionnées
+            print("📋 Application des migrations du schéma...")
+            applied = run_migrations(conn)
+            print(f"   {len(applied)} migration(s) appliquée(s), schéma v{get_schema_version(conn)}")
             
             # Garder l'ancienne table pour compatibilité (deprecated)
             print("📊 Vérification de la table 'performance' (legacy)...")
@@ -133,14 +65,7 @@ def add_sample_data():
         with sqlite3.connect('database.db') as conn:
             cursor = conn.cursor()
             
-            # Ajouter une séance d'exemple
-            cursor.execute(
-                "INSERT INTO sessions (name) VALUES (?)",
-                ("Séance Pectoraux/Triceps",)
-            )
-            session_id = cursor.lastrowid
-            
-            # Ajouter quelques exercices avec leurs séries
+            # Séance d'exemple : quelques exercices avec leurs séries
             sample_exercises = [
                 ("Développé couché", [
                     (1, 8, 80.0),
@@ -159,20 +84,9 @@ def add_sample_data():
                 ]),
             ]
             
-            for exercise_name, sets_data in sample_exercises:
-                # Créer l'exercice
-                cursor.execute(
-                    "INSERT INTO exercises (session_id, exercise_name) VALUES (?, ?)",
-                    (session_id, exercise_name)
-                )
-                exercise_id = cursor.lastrowid
-                
-                # Ajouter les séries
-                for set_number, reps, weight in sets_data:
-                    cursor.execute(
-                        "INSERT INTO sets (exercise_id, set_number, reps, weight) VALUES (?, ?, ?, ?)",
-                        (exercise_id, set_number, reps, weight)
-                    )
+            # Même chemin que l'enregistrement depuis l'application : catalogue,
+            # statistiques par exercice, records et version des données
+            write_session(cursor, "Séance Pectoraux/Triceps", sample_exercises)
             
             # Ajouter un programme d'exemple
             cursor.execute(
@@ -196,6 +110,7 @@ def add_sample_data():
                     "INSERT INTO programme_seances (programme_id, ordre, nom_seance, description) VALUES (?, ?, ?, ?)",
                     (programme_id, ordre, nom_seance, description)
                 )
+            refresh_programme_progress(cursor, programme_id)
             
             conn.commit()
             print("✅ Données d'exemple ajoutées avec succès !")
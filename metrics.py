@@ -0,0 +1,376 @@
+"""
+Mesures de performance exposées au format texte Prometheus (``/metrics``).
+
+Activées par la variable d'environnement ``METRICS_ENABLED`` ; désactivées,
+aucun hook n'est installé (ni middleware, ni curseur instrumenté, ni route
+``/metrics``) et le coût est nul.
+
+Une fois activées, elles répondent à la question « où passe le temps d'une
+requête » :
+- ``http_request_duration_seconds`` : latence par route, méthode et statut ;
+- ``http_request_sql_seconds`` / ``http_request_render_seconds`` /
+  ``http_request_ai_seconds`` : part de cette latence passée dans SQLite, dans
+  le rendu Jinja et dans le modèle IA (le reste est du Python) ;
+- ``sqlite_query_duration_seconds`` : durée par requête SQL (texte normalisé),
+  mesurée autour de execute/executemany et des fetch* par un curseur
+  instrumenté ; ``sqlite_statements_total`` compte les instructions
+  réellement exécutées par SQLite (set_trace_callback : une par ligne d'un
+  executemany, BEGIN/COMMIT compris) ;
+- ``template_render_duration_seconds`` : rendu par template ;
+- ``ai_generation_duration_seconds`` / ``ai_first_chunk_seconds`` : appels au
+  backend de génération (Gemini ou stub).
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+
+from flask import Response, before_render_template, request, template_rendered
+
+from ai_backend import GenerationBackend
+
+# Bornes des histogrammes (secondes)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+AI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# Longueur maximale du libellé d'une requête SQL
+STATEMENT_LABEL_LENGTH = 120
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Histogramme cumulatif Prometheus, par combinaison de libellés"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            # Compteur du premier intervalle contenant la valeur ; cumulé à l'export
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", (*zip(self.label_names, labels), ('le', _format_bound(bound))), cumulative
+            yield f"{self.name}_sum", tuple(zip(self.label_names, labels)), total
+            yield f"{self.name}_count", tuple(zip(self.label_names, labels)), cumulative
+
+
+class Counter:
+    """Compteur Prometheus, par combinaison de libellés"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, tuple(zip(self.label_names, labels)), value
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Ensemble des métriques de l'application et export au format texte"""
+
+    def __init__(self):
+        self.metrics = []
+        self.request_duration = self._add(Histogram(
+            'http_request_duration_seconds', "Durée des requêtes HTTP",
+            ('method', 'route', 'status'), REQUEST_BUCKETS))
+        self.request_sql = self._add(Histogram(
+            'http_request_sql_seconds', "Temps passé dans SQLite pendant une requête HTTP",
+            ('route',), REQUEST_BUCKETS))
+        self.request_render = self._add(Histogram(
+            'http_request_render_seconds', "Temps de rendu Jinja pendant une requête HTTP",
+            ('route',), REQUEST_BUCKETS))
+        self.request_ai = self._add(Histogram(
+            'http_request_ai_seconds', "Temps d'attente du modèle IA pendant une requête HTTP",
+            ('route',), AI_BUCKETS))
+        self.query_duration = self._add(Histogram(
+            'sqlite_query_duration_seconds', "Durée des requêtes SQL (execute et lecture des lignes)",
+            ('statement',), QUERY_BUCKETS))
+        self.statements = self._add(Counter(
+            'sqlite_statements_total', "Instructions exécutées par SQLite, par route",
+            ('route',)))
+        self.render_duration = self._add(Histogram(
+            'template_render_duration_seconds', "Durée de rendu des templates Jinja",
+            ('template',), REQUEST_BUCKETS))
+        self.ai_duration = self._add(Histogram(
+            'ai_generation_duration_seconds', "Durée complète des générations du modèle IA",
+            ('backend', 'mode'), AI_BUCKETS))
+        self.ai_first_chunk = self._add(Histogram(
+            'ai_first_chunk_seconds', "Délai avant le premier morceau d'une génération en streaming",
+            ('backend',), AI_BUCKETS))
+        self.ai_errors = self._add(Counter(
+            'ai_generation_errors_total', "Générations du modèle IA en erreur",
+            ('backend',)))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Toutes les métriques au format d'exposition texte de Prometheus"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}")
+                else:
+                    lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+class RequestTimings:
+    """Temps cumulés d'une requête HTTP en cours (SQL, rendu, IA)"""
+
+    __slots__ = ('sql', 'render', 'ai', 'statements')
+
+    def __init__(self):
+        self.sql = 0.0
+        self.render = 0.0
+        self.ai = 0.0
+        self.statements = 0
+
+
+# Temps de la requête en cours (None hors requête HTTP : jobs IA, migrations)
+_current = ContextVar('request_timings', default=None)
+
+
+@lru_cache(maxsize=512)
+def statement_label(sql):
+    """Libellé court et stable d'une requête SQL (listes de paramètres repliées)"""
+    label = ' '.join(sql.split())
+    label = re.sub(r'\?(?:\s*,\s*\?)+', '?…', label)
+    label = re.sub(r'\(\?…?\)(?:\s*,\s*\(\?…?\))+', '(?…)…', label)
+    if len(label) > STATEMENT_LABEL_LENGTH:
+        label = label[:STATEMENT_LABEL_LENGTH - 1] + '…'
+    return label
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Curseur qui chronomètre execute/executemany et la lecture des lignes"""
+
+    _label = None
+
+    def _observe(self, elapsed):
+        self.connection.registry.query_duration.observe(elapsed, self._label)
+        timings = _current.get()
+        if timings is not None:
+            timings.sql += elapsed
+
+    def execute(self, sql, *args):
+        self._label = statement_label(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            self._observe(time.perf_counter() - start)
+
+    def executemany(self, sql, *args):
+        self._label = statement_label(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            self._observe(time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._observe(time.perf_counter() - start)
+
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            self._observe(time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._observe(time.perf_counter() - start)
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connexion dont les curseurs (y compris ceux de conn.execute) sont instrumentés"""
+
+    registry = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_count_statement)
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+
+def _count_statement(_sql):
+    timings = _current.get()
+    if timings is not None:
+        timings.statements += 1
+
+
+def connection_factory(registry):
+    """Classe de connexion instrumentée rattachée au registre"""
+    return type('ProfilingConnection', (ProfilingConnection,), {'registry': registry})
+
+
+class InstrumentedBackend(GenerationBackend):
+    """Backend de génération chronométré (délègue au backend réel)"""
+
+    def __init__(self, backend, registry):
+        self.backend = backend
+        self.registry = registry
+        self.name = backend.name
+
+    def _record(self, elapsed, mode):
+        self.registry.ai_duration.observe(elapsed, self.name, mode)
+        timings = _current.get()
+        if timings is not None:
+            timings.ai += elapsed
+
+    def generate(self, prompt):
+        start = time.perf_counter()
+        try:
+            return self.backend.generate(prompt)
+        except Exception:
+            self.registry.ai_errors.inc(self.name)
+            raise
+        finally:
+            self._record(time.perf_counter() - start, 'generate')
+
+    def stream(self, prompt):
+        start = time.perf_counter()
+        first_chunk = True
+        try:
+            for chunk in self.backend.stream(prompt):
+                if first_chunk:
+                    self.registry.ai_first_chunk.observe(time.perf_counter() - start, self.name)
+                    first_chunk = False
+                yield chunk
+        except Exception:
+            self.registry.ai_errors.inc(self.name)
+            raise
+        finally:
+            self._record(time.perf_counter() - start, 'stream')
+
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'inconnue'
+
+
+def init_app(app, registry=None):
+    """
+    Installe le middleware de mesure, les curseurs instrumentés et la route /metrics.
+
+    À appeler après db.init_app et avant la première requête (les connexions
+    du pool sont créées à la demande avec la classe instrumentée).
+
+    Returns:
+        MetricsRegistry: le registre utilisé
+    """
+    registry = registry or MetricsRegistry()
+    app.extensions['metrics'] = registry
+    app.extensions['db_pool'].factory = connection_factory(registry)
+
+    @app.before_request
+    def start_request_timer():
+        request.environ['metrics.start'] = time.perf_counter()
+        request.environ['metrics.token'] = _current.set(RequestTimings())
+
+    @app.teardown_request
+    def record_request_timings(exception=None):
+        start = request.environ.pop('metrics.start', None)
+        token = request.environ.pop('metrics.token', None)
+        if start is None:
+            return
+        timings = _current.get()
+        if token is not None:
+            _current.reset(token)
+        status = request.environ.get('metrics.status', 500 if exception else 200)
+        route = _route()
+        registry.request_duration.observe(time.perf_counter() - start, request.method, route, str(status))
+        if timings is not None:
+            registry.request_sql.observe(timings.sql, route)
+            registry.request_render.observe(timings.render, route)
+            if timings.ai:
+                registry.request_ai.observe(timings.ai, route)
+            registry.statements.inc(route, amount=timings.statements)
+
+    @app.after_request
+    def remember_status(response):
+        request.environ['metrics.status'] = response.status_code
+        return response
+
+    def start_render(sender, template, context, **extra):
+        context['_metrics_render_start'] = time.perf_counter()
+
+    def end_render(sender, template, context, **extra):
+        start = context.get('_metrics_render_start')
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        registry.render_duration.observe(elapsed, template.name or 'inline')
+        timings = _current.get()
+        if timings is not None:
+            timings.render += elapsed
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(end_render, app, weak=False)
+
+    @app.route('/metrics')
+    def metrics():
+        """Métriques au format texte Prometheus"""
+        return Response(registry.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+    return registry
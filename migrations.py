@@ -0,0 +1,523 @@
+"""
+Migrations numérotées du schéma SQLite.
+
+La version du schéma est stockée dans ``PRAGMA user_version`` : chaque
+migration de la liste ``MIGRATIONS`` n'est appliquée qu'une seule fois, dans
+sa propre transaction, puis la version est incrémentée. Pour ajouter une
+migration, écrire une fonction ``migration_XXX(conn)`` et l'ajouter à la fin
+de la liste (ne jamais réordonner ni supprimer une migration existante).
+"""
+
+from exercise_catalog import backfill_catalog_ids
+from programme_store import refresh_programme_progress
+from records import rebuild_record_maxima
+from stats import STATS_COLUMNS, register_functions, rebuild_exercise_stats
+
+
+def migrate_legacy_exercises(conn):
+    """Migre l'ancienne structure (sets/reps/weight dans exercises) vers la table sets"""
+    print("🔄 Début de la migration de la base de données...")
+    cursor = conn.cursor()
+
+    # 1. Créer une sauvegarde des données existantes
+    cursor.execute("SELECT * FROM exercises")
+    old_exercises = cursor.fetchall()
+    print(f"📊 {len(old_exercises)} exercices à migrer")
+
+    # 2. Créer la nouvelle table exercises temporaire
+    cursor.execute('''
+        CREATE TABLE exercises_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL,
+            exercise_name TEXT NOT NULL,
+            FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # 3. Créer la table sets si elle n'existe pas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exercise_id INTEGER NOT NULL,
+            set_number INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            FOREIGN KEY (exercise_id) REFERENCES exercises (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # 4. Migrer les données vers la nouvelle structure
+    for old_exercise in old_exercises:
+        # old_exercise: (id, session_id, exercise_name, sets, reps, weight)
+        old_id, session_id, exercise_name, sets_count, reps, weight = old_exercise
+
+        # Créer le nouvel exercice (sans sets, reps, weight)
+        cursor.execute('''
+            INSERT INTO exercises_new (session_id, exercise_name)
+            VALUES (?, ?)
+        ''', (session_id, exercise_name))
+
+        new_exercise_id = cursor.lastrowid
+
+        # Créer les séries individuelles
+        if sets_count and reps and weight:
+            for set_num in range(1, int(sets_count) + 1):
+                cursor.execute('''
+                    INSERT INTO sets (exercise_id, set_number, reps, weight)
+                    VALUES (?, ?, ?, ?)
+                ''', (new_exercise_id, set_num, int(reps), float(weight)))
+
+    # 5. Remplacer l'ancienne table par la nouvelle
+    cursor.execute("DROP TABLE exercises")
+    cursor.execute("ALTER TABLE exercises_new RENAME TO exercises")
+    print("✅ Migration terminée avec succès")
+
+
+def migration_001_initial_schema(conn):
+    """Schéma initial (séances, exercices, séries, programmes)"""
+    # Bases créées avant la table sets : les séries étaient stockées dans exercises
+    columns = [col[1] for col in conn.execute("PRAGMA table_info(exercises)").fetchall()]
+    if 'sets' in columns or 'reps' in columns or 'weight' in columns:
+        print("🔄 Migration de la base de données détectée...")
+        migrate_legacy_exercises(conn)
+
+    # Table pour les séances
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Table pour les exercices dans chaque séance (sans sets, reps, weight)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exercises (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL,
+            exercise_name TEXT NOT NULL,
+            FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Table pour les séries individuelles
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exercise_id INTEGER NOT NULL,
+            set_number INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            FOREIGN KEY (exercise_id) REFERENCES exercises (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Table pour les programmes d'entraînement
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS programmes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            description TEXT,
+            actif INTEGER DEFAULT 0,
+            archive INTEGER DEFAULT 0,
+            date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Table pour les séances d'un programme
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS programme_seances (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            programme_id INTEGER NOT NULL,
+            ordre INTEGER NOT NULL,
+            nom_seance TEXT NOT NULL,
+            description TEXT,
+            completee INTEGER DEFAULT 0,
+            date_completion TIMESTAMP,
+            FOREIGN KEY (programme_id) REFERENCES programmes (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Table pour les exercices des séances de programme
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS programme_exercices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seance_id INTEGER NOT NULL,
+            ordre INTEGER NOT NULL,
+            nom_exercice TEXT NOT NULL,
+            series INTEGER,
+            repetitions TEXT,
+            notes TEXT,
+            FOREIGN KEY (seance_id) REFERENCES programme_seances (id) ON DELETE CASCADE
+        )
+    ''')
+
+
+def migration_002_repair_sets_foreign_key(conn):
+    """Recrée la table sets si sa clé étrangère pointe vers une table disparue (ex: exercises_old)"""
+    targets = {row[2] for row in conn.execute("PRAGMA foreign_key_list(sets)").fetchall()}
+    if not targets or targets == {'exercises'}:
+        return
+
+    print(f"🔄 Réparation de la clé étrangère de la table sets ({', '.join(sorted(targets))})...")
+    conn.execute('''
+        CREATE TABLE sets_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exercise_id INTEGER NOT NULL,
+            set_number INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            FOREIGN KEY (exercise_id) REFERENCES exercises (id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute("""
+        INSERT INTO sets_new (id, exercise_id, set_number, reps, weight)
+        SELECT id, exercise_id, set_number, reps, weight FROM sets
+    """)
+    conn.execute("DROP TABLE sets")
+    conn.execute("ALTER TABLE sets_new RENAME TO sets")
+
+
+def migration_003_secondary_indexes(conn):
+    """Index secondaires sur les clés de jointure et les colonnes filtrées"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exercises_session_id ON exercises (session_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exercises_exercise_name ON exercises (exercise_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sets_exercise_id ON sets (exercise_id, set_number)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_programme_seances_programme_id ON programme_seances (programme_id, ordre)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_programme_exercices_seance_id ON programme_exercices (seance_id, ordre)")
+
+
+# Remplissages des migrations 004 et 007, figés tels qu'ils ont été livrés :
+# les fonctions de stats.py et exercise_catalog.py travaillent depuis sur
+# catalog_id (migration 008), absent à ce stade du schéma.
+
+LEGACY_STATS_BY_NAME_QUERY = """
+    WITH combos AS (
+        SELECT e.exercise_name AS name, st.reps, st.weight,
+               COUNT(*) AS set_count, MAX(s.date) AS last_date
+        FROM exercises e
+        JOIN sets st ON e.id = st.exercise_id
+        JOIN sessions s ON e.session_id = s.id
+        WHERE e.exercise_name IS NOT NULL AND e.exercise_name != ''
+          AND st.reps > 0 AND st.weight > 0
+        GROUP BY e.exercise_name, st.reps, st.weight
+    ),
+    scored AS (
+        SELECT name, reps, weight, set_count, last_date,
+               calculate_1rm(weight, reps) AS one_rm,
+               reps * weight AS volume
+        FROM combos
+    ),
+    ranked AS (
+        SELECT *,
+               ROW_NUMBER() OVER (PARTITION BY name ORDER BY one_rm DESC, last_date DESC) AS rank_1rm,
+               ROW_NUMBER() OVER (PARTITION BY name ORDER BY volume DESC, last_date DESC) AS rank_volume
+        FROM scored
+    )
+    SELECT name,
+           MAX(weight),
+           MAX(one_rm),
+           MAX(CASE WHEN rank_1rm = 1 THEN reps END),
+           MAX(CASE WHEN rank_1rm = 1 THEN weight END),
+           MAX(CASE WHEN rank_volume = 1 THEN reps END),
+           MAX(CASE WHEN rank_volume = 1 THEN weight END),
+           MAX(volume),
+           SUM(set_count),
+           MAX(CASE WHEN rank_1rm = 1 THEN reps = 1 END),
+           MAX(last_date)
+    FROM ranked
+    GROUP BY name
+"""
+
+
+def rebuild_exercise_stats_by_name(conn):
+    """exercise_stats indexée par nom saisi (schéma de la migration 004)"""
+    register_functions(conn)
+    conn.execute("DELETE FROM exercise_stats")
+    conn.execute(f"""
+        INSERT INTO exercise_stats (exercise_name, {', '.join(STATS_COLUMNS)})
+        {LEGACY_STATS_BY_NAME_QUERY}
+    """)
+
+
+def rebuild_exercise_catalog_by_name(conn):
+    """exercise_catalog avec un nom exact par ligne (schéma de la migration 007)"""
+    conn.execute("DELETE FROM exercise_catalog")
+    conn.execute("""
+        INSERT INTO exercise_catalog (name, usage_count, last_used)
+        SELECT TRIM(e.exercise_name), COUNT(*), MAX(s.date)
+        FROM exercises e
+        JOIN sessions s ON s.id = e.session_id
+        WHERE TRIM(e.exercise_name) != ''
+        GROUP BY TRIM(e.exercise_name)
+    """)
+
+
+def migration_004_exercise_stats(conn):
+    """Table exercise_stats (statistiques matérialisées par exercice)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_stats (
+            exercise_name TEXT PRIMARY KEY,
+            max_weight REAL NOT NULL,
+            max_1rm REAL NOT NULL,
+            best_1rm_reps INTEGER NOT NULL,
+            best_1rm_weight REAL NOT NULL,
+            best_volume_reps INTEGER NOT NULL,
+            best_volume_weight REAL NOT NULL,
+            best_volume_total REAL NOT NULL,
+            total_sets INTEGER NOT NULL DEFAULT 0,
+            has_actual_1rm INTEGER NOT NULL DEFAULT 0,
+            last_date TIMESTAMP
+        )
+    ''')
+    rebuild_exercise_stats_by_name(conn)
+
+
+def migration_005_app_meta(conn):
+    """Table app_meta (compteur de version des données pour les caches)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('data_version', 0)")
+
+
+def migration_006_ai_responses(conn):
+    """Table ai_responses (cache persistant des réponses du modèle IA)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ai_responses (
+            prompt_hash TEXT PRIMARY KEY,
+            backend TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_responses_last_used ON ai_responses (last_used)")
+
+
+def migration_007_exercise_catalog(conn):
+    """Table exercise_catalog (noms d'exercices pour l'autocomplétion)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_catalog (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            usage_count INTEGER NOT NULL DEFAULT 0,
+            last_used TIMESTAMP
+        )
+    ''')
+    rebuild_exercise_catalog_by_name(conn)
+
+
+def migration_008_canonical_exercises(conn):
+    """Catalogue canonique des exercices (alias, catalog_id sur exercises et programme_exercices)"""
+    conn.execute("ALTER TABLE exercise_catalog ADD COLUMN normalized_name TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_exercise_catalog_normalized_name ON exercise_catalog (normalized_name)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_aliases (
+            alias TEXT PRIMARY KEY,
+            catalog_id INTEGER NOT NULL,
+            FOREIGN KEY (catalog_id) REFERENCES exercise_catalog (id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exercise_aliases_catalog_id ON exercise_aliases (catalog_id)")
+
+    conn.execute("ALTER TABLE exercises ADD COLUMN catalog_id INTEGER REFERENCES exercise_catalog (id)")
+    conn.execute("ALTER TABLE programme_exercices ADD COLUMN catalog_id INTEGER REFERENCES exercise_catalog (id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exercises_catalog_id ON exercises (catalog_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_programme_exercices_catalog_id ON programme_exercices (catalog_id)")
+
+    # L'ancien catalogue (un nom exact par ligne) est reconstruit par clé canonique
+    conn.execute("DELETE FROM exercise_catalog")
+    backfill_catalog_ids(conn)
+
+    # Statistiques regroupées par exercice du catalogue au lieu du nom saisi
+    conn.execute("DROP TABLE IF EXISTS exercise_stats")
+    conn.execute('''
+        CREATE TABLE exercise_stats (
+            catalog_id INTEGER PRIMARY KEY,
+            max_weight REAL NOT NULL,
+            max_1rm REAL NOT NULL,
+            best_1rm_reps INTEGER NOT NULL,
+            best_1rm_weight REAL NOT NULL,
+            best_volume_reps INTEGER NOT NULL,
+            best_volume_weight REAL NOT NULL,
+            best_volume_total REAL NOT NULL,
+            total_sets INTEGER NOT NULL DEFAULT 0,
+            has_actual_1rm INTEGER NOT NULL DEFAULT 0,
+            last_date TIMESTAMP,
+            FOREIGN KEY (catalog_id) REFERENCES exercise_catalog (id) ON DELETE CASCADE
+        )
+    ''')
+    rebuild_exercise_stats(conn)
+
+
+
+def migration_009_personal_records(conn):
+    """Records personnels (table d'événements personal_records et maxima indexés)"""
+    conn.execute("ALTER TABLE exercise_stats ADD COLUMN best_session_volume REAL NOT NULL DEFAULT 0")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_rep_records (
+            catalog_id INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            best_reps INTEGER NOT NULL,
+            PRIMARY KEY (catalog_id, weight),
+            FOREIGN KEY (catalog_id) REFERENCES exercise_catalog (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS personal_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL,
+            catalog_id INTEGER NOT NULL,
+            record_type TEXT NOT NULL,
+            value REAL NOT NULL,
+            previous_value REAL,
+            reps INTEGER,
+            weight REAL,
+            date TIMESTAMP NOT NULL,
+            FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE,
+            FOREIGN KEY (catalog_id) REFERENCES exercise_catalog (id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_personal_records_date ON personal_records (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_personal_records_session_id ON personal_records (session_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_personal_records_catalog_id ON personal_records (catalog_id, record_type)")
+    rebuild_record_maxima(conn)
+
+
+def migration_010_sessions_name_index(conn):
+    """Index sur sessions (name, date) pour retrouver la dernière séance d'un nom"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_name_date ON sessions (name, date)")
+
+
+def migration_011_programme_progress(conn):
+    """Compteurs de progression sur programmes (total, complétées, séance suivante)"""
+    conn.execute("ALTER TABLE programmes ADD COLUMN total_seances INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE programmes ADD COLUMN completed_seances INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE programmes ADD COLUMN next_seance_id INTEGER")
+    refresh_programme_progress(conn.cursor())
+
+
+# Colonnes de dates ramenées au format stocké (celui de CURRENT_TIMESTAMP)
+DATE_COLUMNS = (
+    ('sessions', 'date'),
+    ('programmes', 'date_creation'),
+    ('programme_seances', 'date_completion'),
+    ('personal_records', 'date'),
+    ('exercise_stats', 'last_date'),
+    ('exercise_catalog', 'last_used'),
+)
+
+
+def migration_012_canonical_dates(conn):
+    """Dates au format stocké AAAA-MM-JJ HH:MM:SS (microsecondes et séparateur T retirés)"""
+    # strftime renvoie NULL pour les formats que SQLite ne lit pas : ces valeurs restent telles quelles
+    for table, column in DATE_COLUMNS:
+        conn.execute(f"""
+            UPDATE {table} SET {column} = strftime('%Y-%m-%d %H:%M:%S', {column})
+            WHERE {column} IS NOT NULL
+              AND strftime('%Y-%m-%d %H:%M:%S', {column}) IS NOT NULL
+              AND {column} != strftime('%Y-%m-%d %H:%M:%S', {column})
+        """)
+
+
+def migration_013_session_client_id(conn):
+    """Identifiant client des séances (UUID, unique) pour rendre les envois idempotents"""
+    conn.execute("ALTER TABLE sessions ADD COLUMN client_id TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_client_id ON sessions (client_id)")
+
+
+def migration_014_orphan_rows(conn):
+    """Lignes orphelines supprimées (parent effacé quand les clés étrangères n'étaient pas appliquées)"""
+    # Chaque violation est réparée comme l'aurait fait la contrainte : ON DELETE CASCADE
+    # supprime la ligne, sinon la référence est remise à NULL (catalog_id, recalculé par
+    # backfill_catalog_ids). Supprimer une séance de programme rend ses exercices orphelins :
+    # on recommence jusqu'à ce que PRAGMA foreign_key_check ne signale plus rien.
+    deleted = 0
+    while True:
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if not violations:
+            break
+        for table, rowid, _, fk_id in violations:
+            foreign_key = next(fk for fk in conn.execute(f"PRAGMA foreign_key_list({table})") if fk[0] == fk_id)
+            if foreign_key[6] == 'CASCADE':
+                conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+                deleted += 1
+            else:
+                conn.execute(f"UPDATE {table} SET {foreign_key[3]} = NULL WHERE rowid = ?", (rowid,))
+    if deleted:
+        print(f"🧹 {deleted} ligne(s) orpheline(s) supprimée(s)")
+    refresh_programme_progress(conn.cursor())
+
+
+MIGRATIONS = [
+    migration_001_initial_schema,
+    migration_002_repair_sets_foreign_key,
+    migration_003_secondary_indexes,
+    migration_004_exercise_stats,
+    migration_005_app_meta,
+    migration_006_ai_responses,
+    migration_007_exercise_catalog,
+    migration_008_canonical_exercises,
+    migration_009_personal_records,
+    migration_010_sessions_name_index,
+    migration_011_programme_progress,
+    migration_012_canonical_dates,
+    migration_013_session_client_id,
+    migration_014_orphan_rows,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    """Retourne la version du schéma enregistrée dans la base"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn):
+    """
+    Applique les migrations en attente.
+
+    Les clés étrangères sont désactivées pendant les migrations (procédure
+    recommandée par SQLite pour reconstruire des tables) puis vérifiées avant
+    d'être réactivées.
+
+    Returns:
+        list: noms des migrations appliquées
+    """
+    current_version = get_schema_version(conn)
+    pending = list(enumerate(MIGRATIONS, start=1))[current_version:]
+    if not pending:
+        return []
+
+    if conn.in_transaction:
+        conn.commit()
+
+    applied = []
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for version, migration in pending:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                print(f"❌ Échec de la migration {version} ({migration.__name__})")
+                raise
+            applied.append(migration.__name__)
+            print(f"✅ Migration {version} appliquée: {migration.__doc__}")
+
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            print(f"⚠️ {len(violations)} violation(s) de clé étrangère après migration")
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+
+    return applied
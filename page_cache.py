@@ -0,0 +1,90 @@
+"""
+Cache des pages rendues (accueil, programme, progression) et revalidation HTTP.
+
+Une page est mise en cache par (route, URL, version des données) : tant
+qu'aucune écriture n'a incrémenté ``data_version`` (voir cache.py), la même
+réponse est resservie sans requête SQL ni rendu Jinja, hormis la lecture de
+la version. Les entrées d'une ancienne version ne sont plus lues et finissent
+évincées par la politique LRU.
+
+Chaque réponse porte un ETag (empreinte du contenu) et, si elle est connue,
+l'heure de la dernière écriture en Last-Modified, avec ``Cache-Control:
+no-cache`` : le navigateur et le service worker revalident à chaque
+affichage et reçoivent un 304 sans corps si rien n'a changé.
+
+Les pages qui affichent des messages flash en attente ne sont ni lues ni
+écrites dans le cache (le message ne doit s'afficher qu'une fois) ; elles
+sont envoyées avec ``Cache-Control: no-store`` (no_store_flashed_pages) pour
+que le service worker ne les garde pas non plus.
+"""
+
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+from flask.globals import request_ctx
+
+from cache import LRUCache, get_data_state
+from db import get_db
+
+
+def no_store_flashed_pages(response):
+    """Hook after_request : une réponse qui a consommé des messages flash n'est mise en cache nulle part"""
+    if request_ctx.flashes:
+        response.cache_control.no_store = True
+    return response
+
+
+class PageEntries(LRUCache):
+    """LRU des pages : la taille d'une entrée est celle de son corps"""
+
+    @staticmethod
+    def _sizeof(value):
+        return len(value[0])
+
+
+class PageCache:
+    """Décorateur de vues GET dont le rendu ne dépend que des données en base et de l'URL"""
+
+    def __init__(self, max_entries=32, max_bytes=4 * 1024 * 1024):
+        self.entries = PageEntries(max_entries=max_entries, max_bytes=max_bytes)
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            try:
+                with get_db() as conn:
+                    version, modified = get_data_state(conn.cursor())
+            except sqlite3.Error as e:
+                print(f"❌ Erreur lors de la lecture de la version des données: {e}")
+                return view(*args, **kwargs)
+
+            key = (request.endpoint, request.full_path, version)
+            entry = self.entries.get(key)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                entry = (body, response.mimetype, hashlib.sha1(body).hexdigest()[:20])
+                self.entries.set(key, entry)
+
+            body, mimetype, etag = entry
+            response = make_response(body)
+            response.mimetype = mimetype
+            response.set_etag(etag)
+            if modified is not None:
+                response.last_modified = datetime.fromtimestamp(modified, tz=timezone.utc)
+            response.cache_control.no_cache = True
+            response.cache_control.private = True
+            return response.make_conditional(request)
+
+        return wrapper
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,222 @@
+"""
+Parser des programmes générés par le coach IA.
+
+Le texte est parcouru une seule fois, ligne par ligne, avec des expressions
+régulières compilées au chargement du module. Les séances sont produites au fur
+et à mesure (``iter_seances``) : une séance est émise dès que son bloc
+``[PARSE_START]...[PARSE_END]`` (ou, sans blocs, sa liste d'exercices) est
+terminé.
+
+Deux formats sont reconnus :
+1. Format avec blocs [PARSE_START]...[PARSE_END] (lignes "EXERCICE: ... | SERIES: ...")
+2. Format sans blocs : "Nom : X x Y reps @ RIR Z, T min repos", séances
+   éventuellement encadrées de séparateurs ────────
+
+Les traces de parsing passent par le logger ``programme_parser`` au niveau
+DEBUG ; elles sont silencieuses tant que ce niveau n'est pas activé.
+"""
+
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+PARSE_START = '[PARSE_START]'
+PARSE_END = '[PARSE_END]'
+SEPARATEUR = '─'
+
+# "SEANCE 1: Push" (format avec blocs, numéro facultatif)
+SEANCE_BLOC_RE = re.compile(r'^SEANCE\s*\d*\s*[:：]\s*(.+)', re.IGNORECASE)
+# "──── SEANCE 1: Push ────" (format sans blocs, avec séparateurs)
+SEANCE_SEPARATEUR_RE = re.compile(r'SEANCE\s*(\d+)\s*[:：]\s*(.+)', re.IGNORECASE)
+# "SEANCE 1: Push" (format sans blocs, numéro obligatoire)
+SEANCE_RE = re.compile(r'^SEANCE\s*(\d+)\s*[:：]\s*(.+)', re.IGNORECASE)
+# Début de ligne qui termine la liste d'exercices de la séance courante
+DEBUT_SEANCE_RE = re.compile(r'^SEANCE\s*\d+\s*[:：]', re.IGNORECASE)
+# "- Développé couché (Barre) : 4 x 6-8 reps @ RIR 2-3, 2.5 min repos"
+EXERCICE_RE = re.compile(
+    r'^-?\s*(.+?)\s*:\s*(\d+)\s*x\s*([0-9\-]+)\s*reps?\s*@\s*RIR\s*([0-9\-]+)\s*,?\s*(.+?)(?:min|minutes)?\s*repos',
+    re.IGNORECASE,
+)
+BALISE_HTML_RE = re.compile('<[^<]+?>')
+
+
+def strip_html(text):
+    """Enlève les balises HTML du programme rendu"""
+    return BALISE_HTML_RE.sub('', text)
+
+
+def _nouvelle_seance(ordre, nom):
+    return {'ordre': ordre, 'nom': nom[:200], 'exercices': []}
+
+
+def _exercice_depuis_bloc(ligne, ordre):
+    """Lit une ligne "EXERCICE: Nom | SERIES: 4 | REPS: 6-8 | NOTES: ..." """
+    parts = ligne.split('|')
+
+    nom_exercice = parts[0].replace('EXERCICE:', '').strip()
+    series = None
+    repetitions = None
+    notes = ''
+
+    for part in parts[1:]:
+        part = part.strip()
+        if part.startswith('SERIES:'):
+            try:
+                series = int(part.replace('SERIES:', '').strip())
+            except ValueError:
+                pass
+        elif part.startswith('REPS:'):
+            repetitions = part.replace('REPS:', '').strip()
+        elif part.startswith('NOTES:'):
+            notes = part.replace('NOTES:', '').strip()
+
+    return {
+        'ordre': ordre,
+        'nom': nom_exercice[:200],
+        'series': series,
+        'repetitions': repetitions,
+        'notes': notes[:500]
+    }
+
+
+def _exercice_depuis_ligne(match, ordre):
+    """Construit l'exercice à partir d'une ligne "Nom : X x Y reps @ RIR Z, T min repos" """
+    rir = match.group(4).strip()
+    temps_repos = match.group(5).strip()
+    notes = f"RIR {rir}, repos {temps_repos} min"
+
+    return {
+        'ordre': ordre,
+        'nom': match.group(1).strip()[:200],
+        'series': int(match.group(2)),
+        'repetitions': match.group(3).strip(),
+        'notes': notes[:500]
+    }
+
+
+def iter_seances_avec_blocs(lignes):
+    """
+    Format avec blocs : chaque titre "SEANCE" est suivi du prochain bloc
+    [PARSE_START]...[PARSE_END].
+
+    Les titres rencontrés avant que le bloc ne commence appartiennent à la
+    séance en attente ; s'il n'y a plus aucun bloc, la séance et ces titres
+    sont émis sans exercices.
+    """
+    ordre_seance = 1
+    seance = None
+    dans_bloc = False
+    titres_sans_bloc = []
+
+    for ligne in lignes:
+        if seance is None:
+            match = SEANCE_BLOC_RE.match(ligne.strip())
+            if match:
+                seance = _nouvelle_seance(ordre_seance, match.group(1).strip())
+                ordre_seance += 1
+                logger.debug("🆕 SÉANCE %s: %s", seance['ordre'], seance['nom'])
+        elif not dans_bloc:
+            if PARSE_START in ligne:
+                dans_bloc = True
+                titres_sans_bloc.clear()
+            else:
+                match = SEANCE_BLOC_RE.match(ligne.strip())
+                if match:
+                    titres_sans_bloc.append(match.group(1).strip())
+        elif PARSE_END in ligne:
+            logger.debug("   📊 Total: %d exercice(s)", len(seance['exercices']))
+            yield seance
+            seance = None
+            dans_bloc = False
+        else:
+            ligne = ligne.strip()
+            if ligne.startswith('EXERCICE:'):
+                exercice = _exercice_depuis_bloc(ligne, len(seance['exercices']) + 1)
+                seance['exercices'].append(exercice)
+                logger.debug("      ✅ Ex %d: %s | %sx%s", exercice['ordre'], exercice['nom'],
+                             exercice['series'], exercice['repetitions'])
+
+    if seance is not None:
+        if not dans_bloc:
+            logger.debug("   ❌ [PARSE_START] NON TROUVÉ")
+        yield seance
+        if not dans_bloc:
+            for nom_seance in titres_sans_bloc:
+                logger.debug("   ❌ [PARSE_START] NON TROUVÉ pour %s", nom_seance)
+                yield _nouvelle_seance(ordre_seance, nom_seance)
+                ordre_seance += 1
+
+
+def iter_seances_sans_blocs(lignes):
+    """
+    Format sans blocs : les exercices d'une séance sont les lignes qui
+    suivent son titre, jusqu'au prochain titre "SEANCE".
+    """
+    ordre_seance = 1
+    seance = None
+
+    for ligne in lignes:
+        ligne = ligne.strip()
+        avec_separateur = SEPARATEUR in ligne and 'SEANCE' in ligne.upper()
+
+        if seance is not None:
+            if not avec_separateur and not DEBUT_SEANCE_RE.match(ligne):
+                match = EXERCICE_RE.match(ligne)
+                if match:
+                    exercice = _exercice_depuis_ligne(match, len(seance['exercices']) + 1)
+                    seance['exercices'].append(exercice)
+                    logger.debug("      ✅ Ex %d: %s | %sx%s | %s", exercice['ordre'], exercice['nom'],
+                                 exercice['series'], exercice['repetitions'], exercice['notes'])
+                elif len(ligne) > 10 and not ligne.startswith('━') and not ligne.startswith('─'):
+                    logger.debug("      ⚠️ Ligne ignorée: %s", ligne[:80])
+                continue
+
+            # La séance courante s'arrête ici ; la ligne est relue comme titre
+            logger.debug("   📊 Total: %d exercice(s)", len(seance['exercices']))
+            yield seance
+            seance = None
+
+        if avec_separateur:
+            match = SEANCE_SEPARATEUR_RE.search(ligne)
+        else:
+            match = SEANCE_RE.match(ligne)
+        if match:
+            seance = _nouvelle_seance(ordre_seance, match.group(2).strip())
+            ordre_seance += 1
+            logger.debug("🆕 SÉANCE %s: %s", seance['ordre'], seance['nom'])
+
+    if seance is not None:
+        logger.debug("   📊 Total: %d exercice(s)", len(seance['exercices']))
+        yield seance
+
+
+def iter_seances(programme_text_clean):
+    """Produit les séances du programme au fil du parcours du texte"""
+    lignes = programme_text_clean.split('\n')
+    if PARSE_START in programme_text_clean:
+        logger.debug("📌 Format avec blocs [PARSE_START]...[PARSE_END]")
+        return iter_seances_avec_blocs(lignes)
+    logger.debug("📌 Format sans blocs (détection par pattern)")
+    return iter_seances_sans_blocs(lignes)
+
+
+def parse_programme_ia_robuste(programme_text_clean, nom_programme="Programme"):
+    """
+    Parser robuste pour les programmes générés par l'IA
+
+    Args:
+        programme_text_clean (str): Texte nettoyé du programme (sans HTML)
+        nom_programme (str): Nom du programme pour les logs
+
+    Returns:
+        tuple: (seances, total_exercices, success)
+    """
+    logger.debug("🔍 Parsing du programme %s (%d caractères)", nom_programme, len(programme_text_clean))
+
+    seances = list(iter_seances(programme_text_clean))
+    total_exercices = sum(len(s['exercices']) for s in seances)
+    success = len(seances) > 0 and total_exercices > 0
+
+    logger.debug("📊 RÉSUMÉ: %d séance(s), %d exercice(s)", len(seances), total_exercices)
+    return seances, total_exercices, success
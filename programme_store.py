@@ -0,0 +1,198 @@
+"""
+Programmes d'entraînement : compteurs de progression et copie profonde.
+
+Compteurs : ``programmes`` porte ``total_seances``, ``completed_seances`` et
+``next_seance_id`` (séance suivant la dernière complétée, dans l'ordre du
+programme). Ils sont recalculés par refresh_programme_progress dans la
+transaction de chaque écriture qui crée des séances ou change leur état, si
+bien que l'accueil et la page programme lisent la progression sur la seule
+ligne du programme.
+
+Copie (duplication, mésocycle suivant) :
+un programme, ses séances et leurs exercices sont copiés avec quelques
+instructions ensemblistes (INSERT … SELECT), quel que soit leur nombre, au
+lieu d'un INSERT par séance puis par exercice.
+
+La correspondance entre anciennes et nouvelles séances passe par la table
+temporaire ``programme_seance_map`` : les nouveaux ids sont attribués à
+l'avance (après le plus grand id déjà utilisé, comme le ferait AUTOINCREMENT),
+ce qui permet ensuite de rattacher tous les exercices en une seule jointure.
+
+La progression (séances complétées) n'est pas copiée : la copie repart de zéro.
+La durée de chaque copie est tracée par le logger ``programme_store`` (niveau INFO).
+"""
+
+import logging
+import re
+import time
+
+from cache import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+COPY_SUFFIX = " (Copie)"
+
+# Suffixe "(Méso 2)" des programmes clonés pour le mésocycle suivant
+MESOCYCLE_RE = re.compile(r'\s*\(Méso (\d+)\)$')
+
+
+# Séance suivante : la première après la dernière complétée (ordre le plus
+# élevé), ou la première du programme si aucune n'est complétée
+REFRESH_PROGRESS_QUERY = """
+    UPDATE programmes SET
+        total_seances = (
+            SELECT COUNT(*) FROM programme_seances WHERE programme_id = programmes.id
+        ),
+        completed_seances = (
+            SELECT COUNT(*) FROM programme_seances WHERE programme_id = programmes.id AND completee = 1
+        ),
+        next_seance_id = (
+            SELECT ps.id FROM programme_seances ps
+            WHERE ps.programme_id = programmes.id
+              AND ps.ordre > COALESCE((
+                  SELECT MAX(ordre) FROM programme_seances
+                  WHERE programme_id = programmes.id AND completee = 1
+              ), -1)
+            ORDER BY ps.ordre, ps.id
+            LIMIT 1
+        )
+    {where}
+"""
+
+
+def refresh_programme_progress(cur, programme_id=None):
+    """
+    Recalcule les compteurs de progression d'un programme (de tous si programme_id est None).
+
+    À appeler dans la transaction qui crée des séances ou modifie leur état.
+    """
+    if programme_id is None:
+        cur.execute(REFRESH_PROGRESS_QUERY.format(where=''))
+    else:
+        cur.execute(REFRESH_PROGRESS_QUERY.format(where='WHERE id = ?'), (programme_id,))
+
+
+def refresh_seance_programme_progress(cur, seance_id):
+    """Recalcule les compteurs du programme auquel appartient une séance"""
+    cur.execute(REFRESH_PROGRESS_QUERY.format(
+        where='WHERE id = (SELECT programme_id FROM programme_seances WHERE id = ?)'
+    ), (seance_id,))
+
+
+def _create_seance_map(cur):
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS programme_seance_map (
+            old_id INTEGER PRIMARY KEY,
+            new_id INTEGER NOT NULL
+        )
+    """)
+    cur.execute("DELETE FROM temp.programme_seance_map")
+
+
+def copy_programme(cur, programme_id, nom):
+    """
+    Copie un programme avec ses séances et leurs exercices, sous un nouveau nom.
+
+    Ne valide pas la transaction (à appeler dans celle de l'appelant).
+
+    Returns:
+        tuple: (id du nouveau programme, nombre de séances, nombre d'exercices),
+        ou None si le programme n'existe pas
+    """
+    cur.execute("""
+        INSERT INTO programmes (nom, description)
+        SELECT ?, description FROM programmes WHERE id = ?
+        RETURNING id
+    """, (nom, programme_id))
+    row = cur.fetchone()
+    if row is None:
+        return None
+    nouveau_programme_id = row[0]
+
+    # Nouveaux ids de séance : à la suite du plus grand id jamais attribué
+    _create_seance_map(cur)
+    cur.execute("""
+        INSERT INTO temp.programme_seance_map (old_id, new_id)
+        SELECT ps.id, base.last_id + ROW_NUMBER() OVER (ORDER BY ps.ordre, ps.id)
+        FROM programme_seances ps,
+             (SELECT MAX(
+                 COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'programme_seances'), 0),
+                 COALESCE((SELECT MAX(id) FROM programme_seances), 0)
+             ) AS last_id) base
+        WHERE ps.programme_id = ?
+    """, (programme_id,))
+
+    cur.execute("""
+        INSERT INTO programme_seances (id, programme_id, ordre, nom_seance, description)
+        SELECT m.new_id, ?, ps.ordre, ps.nom_seance, ps.description
+        FROM temp.programme_seance_map m
+        JOIN programme_seances ps ON ps.id = m.old_id
+        ORDER BY m.new_id
+    """, (nouveau_programme_id,))
+    total_seances = cur.rowcount
+
+    cur.execute("""
+        INSERT INTO programme_exercices (seance_id, ordre, nom_exercice, series, repetitions, notes, catalog_id)
+        SELECT m.new_id, pe.ordre, pe.nom_exercice, pe.series, pe.repetitions, pe.notes, pe.catalog_id
+        FROM temp.programme_seance_map m
+        JOIN programme_exercices pe ON pe.seance_id = m.old_id
+        ORDER BY m.new_id, pe.ordre, pe.id
+    """)
+    total_exercices = cur.rowcount
+
+    cur.execute("DELETE FROM temp.programme_seance_map")
+    refresh_programme_progress(cur, nouveau_programme_id)
+    return nouveau_programme_id, total_seances, total_exercices
+
+
+def next_mesocycle_name(nom):
+    """Nom du mésocycle suivant ("Force" → "Force (Méso 2)" → "Force (Méso 3)")"""
+    match = MESOCYCLE_RE.search(nom)
+    if match is None:
+        return f"{nom} (Méso 2)"
+    return f"{nom[:match.start()]} (Méso {int(match.group(1)) + 1})"
+
+
+def _copy_and_commit(conn, programme_id, make_name, activate=False):
+    start = time.perf_counter()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT nom FROM programmes WHERE id = ?", (programme_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        nouveau_programme_id, total_seances, total_exercices = copy_programme(cur, programme_id, make_name(row[0]))
+        if activate:
+            cur.execute("UPDATE programmes SET actif = (id = ?)", (nouveau_programme_id,))
+        bump_data_version(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info("Programme %s copié vers %s (%d séances, %d exercices) en %.1f ms", programme_id,
+                nouveau_programme_id, total_seances, total_exercices, (time.perf_counter() - start) * 1000)
+    return nouveau_programme_id, total_seances, total_exercices
+
+
+def duplicate_programme(conn, programme_id):
+    """
+    Duplique un programme (nom suffixé par " (Copie)", inactif), en une transaction.
+
+    Returns:
+        tuple: (id du nouveau programme, séances, exercices),
+        ou None si le programme n'existe pas
+    """
+    return _copy_and_commit(conn, programme_id, lambda nom: nom + COPY_SUFFIX)
+
+
+def clone_next_mesocycle(conn, programme_id):
+    """
+    Clone un programme comme modèle du mésocycle suivant : mêmes séances et
+    exercices, progression remise à zéro, nom "(Méso N+1)" ; le clone devient
+    le programme actif.
+
+    Returns:
+        tuple: (id du nouveau programme, séances, exercices),
+        ou None si le programme n'existe pas
+    """
+    return _copy_and_commit(conn, programme_id, next_mesocycle_name, activate=True)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script pour reconstruire la table exercise_stats à partir de toutes les séries
+enregistrées (backfill après import ou correction manuelle des données)
+"""
+
+import os
+import sqlite3
+import sys
+
+from analytics import load_sets
+from cache import bump_data_version
+from exercise_catalog import backfill_catalog_ids
+from migrations import run_migrations
+from records import rebuild_record_maxima
+from stats import rebuild_exercise_stats
+
+
+def main():
+    """Fonction principale"""
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'database.db'
+    if not os.path.exists(db_path):
+        print(f"❌ Fichier {db_path} non trouvé")
+        return False
+
+    print(f"🔄 Reconstruction des statistiques par exercice ({db_path})...")
+    try:
+        with sqlite3.connect(db_path) as conn:
+            run_migrations(conn)
+            linked = backfill_catalog_ids(conn)
+            # Séries chargées une seule fois pour les deux reconstructions
+            columns = load_sets(conn.cursor())
+            count = rebuild_exercise_stats(conn, columns)
+            rebuild_record_maxima(conn, columns)
+            # Pages et résumés en cache indexés par version : ils seront recalculés
+            bump_data_version(conn.cursor())
+            conn.commit()
+    except sqlite3.Error as e:
+        print(f"❌ Erreur SQLite: {e}")
+        return False
+
+    if linked:
+        print(f"🔗 {linked} exercice(s) rattaché(s) au catalogue")
+    print(f"✅ {count} exercice(s) recalculé(s)")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,223 @@
+"""
+Détection des records personnels à l'enregistrement d'une séance.
+
+Quatre types de records, par exercice du catalogue :
+- ``weight`` : charge la plus lourde,
+- ``e1rm`` : meilleur 1RM estimé (calculate_1rm),
+- ``reps_at_weight`` : plus de répétitions à une charge déjà pratiquée,
+- ``session_volume`` : plus gros tonnage de l'exercice sur une séance.
+
+Les séries de la séance sont comparées aux maxima courants, indexés par
+exercice : ``exercise_stats`` (charge, 1RM et ``best_session_volume``) et
+``exercise_rep_records`` (meilleur nombre de répétitions par charge). Aucun
+parcours de l'historique n'est nécessaire. Les records battus sont écrits
+dans la table d'événements ``personal_records``, lue par la page d'accueil
+et le contexte du coach IA.
+
+Le premier enregistrement d'un exercice (ou d'une charge pour
+``reps_at_weight``) n'est pas un record : il n'y a rien à battre.
+"""
+
+from analytics import best_session_volumes, load_sets, rep_records
+from stats import calculate_1rm
+
+RECORD_TYPES = ('weight', 'e1rm', 'reps_at_weight', 'session_volume')
+
+RECORD_LABELS = {
+    'weight': 'Charge max',
+    'e1rm': '1RM estimé',
+    'reps_at_weight': 'Répétitions',
+    'session_volume': 'Volume sur une séance',
+}
+
+# Couples (exercice, charge) par requête (2 ou 3 paramètres chacun)
+LOOKUP_BATCH_SIZE = 400
+
+
+def _session_bests(performed_sets):
+    """Meilleures valeurs de la séance par exercice : charge, 1RM, reps par charge, tonnage"""
+    bests = {}
+    for catalog_id, reps, weight in performed_sets:
+        best = bests.get(catalog_id)
+        if best is None:
+            best = bests[catalog_id] = {
+                'weight': (weight, reps),
+                'e1rm': (calculate_1rm(weight, reps), reps, weight),
+                'reps_at_weight': {},
+                'session_volume': 0.0,
+            }
+        if (weight, reps) > best['weight']:
+            best['weight'] = (weight, reps)
+        one_rm = calculate_1rm(weight, reps)
+        if one_rm > best['e1rm'][0]:
+            best['e1rm'] = (one_rm, reps, weight)
+        if reps > best['reps_at_weight'].get(weight, 0):
+            best['reps_at_weight'][weight] = reps
+        best['session_volume'] += reps * weight
+    return bests
+
+
+def _load_rep_records(cur, pairs):
+    rep_records = {}
+    for start in range(0, len(pairs), LOOKUP_BATCH_SIZE):
+        batch = pairs[start:start + LOOKUP_BATCH_SIZE]
+        cur.execute(f"""
+            SELECT catalog_id, weight, best_reps FROM exercise_rep_records
+            WHERE (catalog_id, weight) IN (VALUES {', '.join('(?, ?)' for _ in batch)})
+        """, [value for pair in batch for value in pair])
+        rep_records.update(((catalog_id, weight), best_reps) for catalog_id, weight, best_reps in cur.fetchall())
+    return rep_records
+
+
+def detect_records(cur, session_id, session_date, performed_sets):
+    """
+    Compare les séries d'une séance aux maxima courants et enregistre les records battus.
+
+    À appeler dans la transaction d'enregistrement, avant update_exercise_stats
+    (les maxima lus doivent être ceux d'avant la séance) ; update_record_maxima
+    met ensuite à jour les maxima propres aux records.
+
+    Args:
+        performed_sets: liste de tuples (catalog_id, reps, weight)
+
+    Returns:
+        tuple: (records battus [dict], meilleures valeurs de la séance pour update_record_maxima)
+    """
+    bests = _session_bests([
+        (catalog_id, reps, weight) for catalog_id, reps, weight in performed_sets
+        if catalog_id is not None and reps > 0 and weight > 0
+    ])
+    if not bests:
+        return [], bests
+
+    catalog_ids = sorted(bests)
+    cur.execute(f"""
+        SELECT catalog_id, max_weight, max_1rm, best_session_volume
+        FROM exercise_stats
+        WHERE catalog_id IN ({', '.join('?' for _ in catalog_ids)})
+    """, catalog_ids)
+    previous = {row[0]: row[1:] for row in cur.fetchall()}
+    rep_records = _load_rep_records(cur, [
+        (catalog_id, weight) for catalog_id in catalog_ids if catalog_id in previous
+        for weight in bests[catalog_id]['reps_at_weight']
+    ])
+
+    records = []
+    for catalog_id in catalog_ids:
+        if catalog_id not in previous:
+            continue
+        best = bests[catalog_id]
+        max_weight, max_1rm, best_session_volume = previous[catalog_id]
+
+        weight, reps = best['weight']
+        if weight > max_weight:
+            records.append((catalog_id, 'weight', weight, max_weight, reps, weight))
+        one_rm, reps, weight = best['e1rm']
+        if one_rm > max_1rm:
+            records.append((catalog_id, 'e1rm', one_rm, max_1rm, reps, weight))
+        for weight, reps in sorted(best['reps_at_weight'].items()):
+            previous_reps = rep_records.get((catalog_id, weight))
+            if previous_reps is not None and reps > previous_reps:
+                records.append((catalog_id, 'reps_at_weight', reps, previous_reps, reps, weight))
+        if best_session_volume and best['session_volume'] > best_session_volume:
+            records.append((catalog_id, 'session_volume', best['session_volume'], best_session_volume, None, None))
+
+    if not records:
+        return [], bests
+
+    cur.executemany("""
+        INSERT INTO personal_records (session_id, catalog_id, record_type, value, previous_value, reps, weight, date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(session_id, *record, session_date) for record in records])
+
+    cur.execute(f"""
+        SELECT id, name FROM exercise_catalog
+        WHERE id IN ({', '.join('?' for _ in catalog_ids)})
+    """, catalog_ids)
+    names = dict(cur.fetchall())
+    return [
+        {
+            'exercise': names.get(catalog_id),
+            'type': record_type,
+            'value': value,
+            'previous_value': previous_value,
+            'reps': reps,
+            'weight': weight,
+        }
+        for catalog_id, record_type, value, previous_value, reps, weight in records
+    ], bests
+
+
+def update_record_maxima(cur, bests):
+    """
+    Met à jour les maxima propres aux records (reps par charge, tonnage par séance).
+
+    À appeler après update_exercise_stats (la ligne exercise_stats d'un
+    nouvel exercice doit exister).
+    """
+    rows = [
+        (catalog_id, weight, reps)
+        for catalog_id, best in bests.items()
+        for weight, reps in best['reps_at_weight'].items()
+    ]
+    # INSERT multi-lignes : une instruction par paquet au lieu d'une par charge
+    for start in range(0, len(rows), LOOKUP_BATCH_SIZE):
+        batch = rows[start:start + LOOKUP_BATCH_SIZE]
+        cur.execute(f"""
+            INSERT INTO exercise_rep_records (catalog_id, weight, best_reps)
+            VALUES {', '.join('(?, ?, ?)' for _ in batch)}
+            ON CONFLICT (catalog_id, weight) DO UPDATE SET best_reps = MAX(best_reps, excluded.best_reps)
+        """, [value for row in batch for value in row])
+    cur.executemany("""
+        UPDATE exercise_stats SET best_session_volume = MAX(best_session_volume, ?)
+        WHERE catalog_id = ?
+    """, [(best['session_volume'], catalog_id) for catalog_id, best in bests.items()])
+
+
+def rebuild_record_maxima(conn, columns=None):
+    """
+    Recalcule exercise_rep_records et exercise_stats.best_session_volume depuis les séries.
+
+    À appeler après rebuild_exercise_stats (qui recrée les lignes d'exercise_stats).
+    Les événements déjà enregistrés dans personal_records ne sont pas modifiés.
+
+    Args:
+        columns: séries déjà chargées par analytics.load_sets (sinon chargées ici)
+    """
+    if columns is None:
+        columns = load_sets(conn.cursor())
+    conn.execute("DELETE FROM exercise_rep_records")
+    conn.executemany(
+        "INSERT INTO exercise_rep_records (catalog_id, weight, best_reps) VALUES (?, ?, ?)",
+        [(catalog_id, weight, reps) for (catalog_id, weight), reps in rep_records(columns).items()],
+    )
+    conn.execute("UPDATE exercise_stats SET best_session_volume = 0")
+    conn.executemany(
+        "UPDATE exercise_stats SET best_session_volume = ? WHERE catalog_id = ?",
+        [(volume, catalog_id) for catalog_id, volume in best_session_volumes(columns).items()],
+    )
+
+
+def recent_records(cur, limit=5):
+    """
+    Derniers records battus, du plus récent au plus ancien.
+
+    Returns:
+        list: [(nom de l'exercice, type, valeur, valeur précédente, reps, charge, date)]
+    """
+    cur.execute("""
+        SELECT c.name, pr.record_type, pr.value, pr.previous_value, pr.reps, pr.weight, pr.date
+        FROM personal_records pr
+        JOIN exercise_catalog c ON c.id = pr.catalog_id
+        ORDER BY pr.date DESC, pr.id DESC
+        LIMIT ?
+    """, (limit,))
+    return cur.fetchall()
+
+
+def format_record(exercise, record_type, value, previous_value, reps=None, weight=None):
+    """Texte court d'un record ("Squat : 1RM estimé 120.0 kg (avant 115.0)")"""
+    label = RECORD_LABELS.get(record_type, record_type)
+    if record_type == 'reps_at_weight':
+        return f"{exercise} : {label} {int(value)} @ {weight:g} kg (avant {int(previous_value)})"
+    return f"{exercise} : {label} {value:.1f} kg (avant {previous_value:.1f})"
@@ -0,0 +1,396 @@
+"""
+Enregistrement groupé des séances d'entraînement.
+
+Le contenu envoyé par le formulaire (``exercises_data``) est d'abord validé en
+entier, puis écrit dans une seule transaction ``BEGIN IMMEDIATE`` :
+- une instruction pour la séance (``RETURNING`` fournit sa date),
+- la résolution des noms saisis vers le catalogue d'exercices (``catalog_id``),
+- des INSERT multi-lignes pour les exercices, dont les identifiants sont
+  déduits de ``lastrowid`` (plage contiguë, le verrou d'écriture est détenu),
+- un ``executemany`` pour toutes les séries,
+- la détection des records personnels (comparés aux maxima d'avant la séance),
+- la mise à jour de l'usage du catalogue, d'``exercise_stats`` et de la
+  version des données.
+
+``import_sessions`` enregistre plusieurs séances (API JSON) dans une seule
+transaction, chacune dans son propre SAVEPOINT : une séance invalide est
+signalée sans annuler les autres.
+
+Une séance peut porter un ``client_id`` (UUID généré par le client, unique en
+base) : un nouvel envoi du même identifiant (double clic, nouvelle tentative
+réseau, file hors ligne du service worker) ne réécrit rien et renvoie la
+séance déjà enregistrée.
+
+``list_sessions`` parcourt l'historique par pagination « keyset » sur
+``(date, id)`` : chaque page part du dernier couple vu au lieu d'un OFFSET,
+son coût ne dépend donc pas de la profondeur dans l'historique.
+"""
+
+import math
+import sqlite3
+import uuid
+from datetime import datetime
+
+from cache import bump_data_version
+from dates import STORED_DATE_FORMAT
+from exercise_catalog import record_exercises, resolve_catalog_ids
+from programme_store import refresh_seance_programme_progress
+from records import detect_records, update_record_maxima
+from stats import update_exercise_stats
+
+# Nombre de lignes par INSERT multi-lignes (3 paramètres par exercice,
+# bien en dessous de la limite de variables de SQLite)
+EXERCISE_BATCH_SIZE = 400
+
+# Formats de date acceptés par l'API (stockés au format de CURRENT_TIMESTAMP)
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d')
+
+# Taille des pages de l'historique
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Séances les plus récentes d'abord ; idx_sessions_date contient aussi l'id
+# (rowid), il fournit donc directement l'ordre (date, id) sans tri.
+# Les compteurs sont calculés pour les seules lignes de la page.
+LIST_SESSIONS_QUERY = """
+    SELECT s.id, s.name, s.date,
+           (SELECT COUNT(*) FROM exercises e WHERE e.session_id = s.id) AS exercise_count,
+           (SELECT COUNT(*) FROM exercises e JOIN sets st ON st.exercise_id = e.id
+            WHERE e.session_id = s.id) AS set_count
+    FROM sessions s
+    {where}
+    ORDER BY s.date DESC, s.id DESC
+    LIMIT ?
+"""
+
+
+class SessionValidationError(ValueError):
+    """Contenu de séance invalide (rien n'a été écrit en base)"""
+
+
+def validate_exercises(exercises_data):
+    """
+    Valide et normalise la liste d'exercices reçue du formulaire.
+
+    Les exercices sans nom ou sans séries sont ignorés, ainsi que les séries
+    incomplètes (numéro, répétitions ou charge manquants). Un numéro qui
+    n'est pas un entier positif, ou des répétitions / une charge non
+    numériques ou non finies (NaN, infini), invalident tout le contenu.
+
+    Returns:
+        list: [(exercise_name, [(set_number, reps, weight), ...]), ...]
+    """
+    if not isinstance(exercises_data, list):
+        raise SessionValidationError("la liste des exercices est attendue")
+
+    exercises = []
+    for position, exercise in enumerate(exercises_data, 1):
+        if not isinstance(exercise, dict):
+            raise SessionValidationError(f"exercice n°{position} invalide")
+
+        exercise_name = exercise.get('name') or ''
+        sets = exercise.get('sets') or []
+        if not isinstance(exercise_name, str) or not isinstance(sets, list):
+            raise SessionValidationError(f"exercice n°{position} invalide")
+
+        exercise_name = exercise_name.strip()
+        if not exercise_name or not sets:
+            continue
+
+        valid_sets = []
+        for set_data in sets:
+            if not isinstance(set_data, dict):
+                raise SessionValidationError(f"série invalide pour {exercise_name}")
+            set_number = set_data.get('number')
+            reps = set_data.get('reps')
+            weight = set_data.get('weight')
+            if set_number is None or reps is None or weight is None:
+                continue
+            if isinstance(set_number, bool) or not isinstance(set_number, int) or set_number < 1:
+                raise SessionValidationError(f"numéro de série invalide pour {exercise_name}: {set_number!r}")
+            try:
+                reps, weight = float(reps), float(weight)
+            except (ValueError, TypeError):
+                raise SessionValidationError(f"série invalide pour {exercise_name}: valeur non numérique") from None
+            if not (math.isfinite(reps) and math.isfinite(weight)):
+                raise SessionValidationError(f"série invalide pour {exercise_name}: valeur non finie")
+            valid_sets.append((set_number, int(reps), weight))
+
+        exercises.append((exercise_name, valid_sets))
+    return exercises
+
+
+def parse_session_date(value):
+    """Normalise une date de séance ("2024-03-01", "2024-03-01T18:30:00"...) au format stocké"""
+    if not isinstance(value, str):
+        raise SessionValidationError("la date doit être une chaîne (AAAA-MM-JJ [HH:MM[:SS]])")
+    value = value.strip()
+    if value.endswith('Z'):
+        value = value[:-1]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime(STORED_DATE_FORMAT)
+        except ValueError:
+            continue
+    raise SessionValidationError(f"date invalide: {value}")
+
+
+def validate_client_id(value):
+    """Normalise l'identifiant client d'une séance (UUID) ; None s'il est absent"""
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise SessionValidationError("client_id doit être une chaîne (UUID)")
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        raise SessionValidationError(f"client_id invalide: {value}") from None
+
+
+def validate_session(item):
+    """
+    Valide une séance reçue par l'API JSON.
+
+    Format : {"name": ..., "date": ... (facultatif), "exercises": [...],
+    "programme_seance_id": ... (facultatif), "client_id": ... (facultatif)} ;
+    les exercices ont le même format que ``exercises_data`` du formulaire.
+
+    Returns:
+        tuple: (session_name, date ou None, exercises, programme_seance_id ou None, client_id ou None)
+    """
+    if not isinstance(item, dict):
+        raise SessionValidationError("un objet séance est attendu")
+
+    session_name = item.get('name')
+    if not isinstance(session_name, str) or not session_name.strip():
+        raise SessionValidationError("le nom de la séance est obligatoire")
+
+    date = item.get('date')
+    if date is not None:
+        date = parse_session_date(date)
+
+    exercises = validate_exercises(item.get('exercises'))
+    if not exercises:
+        raise SessionValidationError("aucun exercice valide dans la séance")
+
+    programme_seance_id = item.get('programme_seance_id')
+    if programme_seance_id is not None and (isinstance(programme_seance_id, bool)
+                                            or not isinstance(programme_seance_id, int)):
+        raise SessionValidationError("programme_seance_id doit être un entier")
+
+    return session_name.strip(), date, exercises, programme_seance_id, validate_client_id(item.get('client_id'))
+
+
+def find_client_session(cur, client_id):
+    """
+    Séance déjà enregistrée avec cet identifiant client (lecture par idx_sessions_client_id).
+
+    Returns:
+        tuple: (session_id, nombre d'exercices, nombre de séries), ou None
+    """
+    cur.execute("""
+        SELECT s.id,
+               (SELECT COUNT(*) FROM exercises e WHERE e.session_id = s.id),
+               (SELECT COUNT(*) FROM exercises e JOIN sets st ON st.exercise_id = e.id
+                WHERE e.session_id = s.id)
+        FROM sessions s
+        WHERE s.client_id = ?
+    """, (client_id,))
+    return cur.fetchone()
+
+
+def write_session(cur, session_name, exercises, programme_seance_id=None, date=None, client_id=None):
+    """
+    Écrit une séance déjà validée dans la transaction en cours.
+
+    Args:
+        cur: curseur d'une transaction ouverte (verrou d'écriture détenu)
+        session_name: nom de la séance
+        exercises: résultat de validate_exercises
+        programme_seance_id: séance de programme à marquer comme complétée
+        date: date de la séance (par défaut : maintenant)
+        client_id: identifiant client (UUID normalisé par validate_client_id)
+
+    Returns:
+        tuple: (session_id, nombre d'exercices, nombre de séries, records battus)
+    """
+    cur.execute(
+        "INSERT INTO sessions (name, date, client_id) VALUES (?, COALESCE(?, CURRENT_TIMESTAMP), ?) RETURNING id, date",
+        (session_name, date, client_id),
+    )
+    session_id, session_date = cur.fetchone()
+
+    catalog_ids = resolve_catalog_ids(cur, [exercise_name for exercise_name, _ in exercises])
+
+    exercise_ids = []
+    for start in range(0, len(exercises), EXERCISE_BATCH_SIZE):
+        batch = exercises[start:start + EXERCISE_BATCH_SIZE]
+        params = []
+        for exercise_name, _ in batch:
+            params.extend((session_id, exercise_name, catalog_ids[exercise_name]))
+        cur.execute(
+            "INSERT INTO exercises (session_id, exercise_name, catalog_id) VALUES "
+            + ", ".join("(?, ?, ?)" for _ in batch),
+            params,
+        )
+        # Les lignes d'un même INSERT reçoivent des identifiants consécutifs
+        first_id = cur.lastrowid - len(batch) + 1
+        exercise_ids.extend(range(first_id, cur.lastrowid + 1))
+
+    set_rows = []
+    performed_sets = []
+    for exercise_id, (exercise_name, sets) in zip(exercise_ids, exercises):
+        for set_number, reps, weight in sets:
+            set_rows.append((exercise_id, set_number, reps, weight))
+            performed_sets.append((catalog_ids[exercise_name], reps, weight))
+    cur.executemany(
+        "INSERT INTO sets (exercise_id, set_number, reps, weight) VALUES (?, ?, ?, ?)",
+        set_rows,
+    )
+
+    # Records, catalogue, statistiques par exercice et version des données, dans la même transaction
+    records, session_bests = detect_records(cur, session_id, session_date, performed_sets)
+    record_exercises(cur, [catalog_ids[exercise_name] for exercise_name, _ in exercises], session_date)
+    update_exercise_stats(cur, session_date, performed_sets)
+    update_record_maxima(cur, session_bests)
+    bump_data_version(cur)
+
+    if programme_seance_id is not None:
+        cur.execute("""
+            UPDATE programme_seances
+            SET completee = 1, date_completion = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (programme_seance_id,))
+        refresh_seance_programme_progress(cur, programme_seance_id)
+
+    return session_id, len(exercises), len(set_rows), records
+
+
+def save_session(conn, session_name, exercises, programme_seance_id=None, client_id=None):
+    """
+    Enregistre une séance validée dans sa propre transaction BEGIN IMMEDIATE.
+
+    Si une séance porte déjà ce client_id, rien n'est écrit : elle est
+    retournée avec created à False (et aucun record).
+
+    Returns:
+        tuple: (session_id, nombre d'exercices, nombre de séries, records battus, created)
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        existing = find_client_session(cur, client_id) if client_id is not None else None
+        if existing is not None:
+            conn.commit()
+            return (*existing, [], False)
+        result = (*write_session(cur, session_name, exercises, programme_seance_id, client_id=client_id), True)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return result
+
+
+def import_sessions(conn, items):
+    """
+    Enregistre une liste de séances (API JSON) dans une seule transaction.
+
+    Chaque séance est validée puis écrite dans son propre SAVEPOINT : en cas
+    d'erreur, seule cette séance est annulée et l'erreur est rapportée avec
+    son index. Une erreur SQLite non liée aux données annule tout l'import.
+
+    Une séance dont le client_id est déjà en base n'est pas réécrite : elle
+    figure parmi les séances créées avec ``duplicate`` à True.
+
+    Returns:
+        tuple: (séances créées [{index, id, exercises, sets, records, duplicate}], erreurs [{index, error}])
+    """
+    created = []
+    errors = []
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        for index, item in enumerate(items):
+            try:
+                session_name, date, exercises, programme_seance_id, client_id = validate_session(item)
+            except (ValueError, TypeError) as e:
+                errors.append({'index': index, 'error': str(e)})
+                continue
+
+            existing = find_client_session(cur, client_id) if client_id is not None else None
+            if existing is not None:
+                session_id, total_exercises, total_sets = existing
+                created.append({
+                    'index': index, 'id': session_id, 'exercises': total_exercises,
+                    'sets': total_sets, 'records': [], 'duplicate': True,
+                })
+                continue
+
+            cur.execute("SAVEPOINT import_session")
+            try:
+                session_id, total_exercises, total_sets, records = write_session(
+                    cur, session_name, exercises, programme_seance_id, date, client_id
+                )
+            except sqlite3.IntegrityError as e:
+                cur.execute("ROLLBACK TO import_session")
+                errors.append({'index': index, 'error': f"contrainte non respectée: {e}"})
+            except (sqlite3.InterfaceError, sqlite3.ProgrammingError) as e:
+                cur.execute("ROLLBACK TO import_session")
+                errors.append({'index': index, 'error': f"valeur non enregistrable: {e}"})
+            else:
+                created.append({
+                    'index': index, 'id': session_id, 'exercises': total_exercises,
+                    'sets': total_sets, 'records': records, 'duplicate': False,
+                })
+            cur.execute("RELEASE import_session")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return created, errors
+
+
+def format_cursor(date, session_id):
+    """Curseur de pagination "date,id" désignant la dernière séance d'une page"""
+    return f"{date},{session_id}"
+
+
+def parse_cursor(before):
+    """
+    Lit un curseur "date,id".
+
+    Returns:
+        tuple: (date, id)
+    """
+    date, sep, session_id = (before or '').rpartition(',')
+    if not sep or not date:
+        raise ValueError(f"curseur invalide: {before}")
+    return date, int(session_id)
+
+
+def list_sessions(cur, before=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Page de l'historique des séances, des plus récentes aux plus anciennes.
+
+    Args:
+        cur: curseur SQLite
+        before: (date, id) de la dernière séance de la page précédente
+        limit: nombre de séances par page
+
+    Returns:
+        tuple: (lignes (id, name, date, exercise_count, set_count), curseur suivant ou None)
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    if before is None:
+        cur.execute(LIST_SESSIONS_QUERY.format(where=""), (limit + 1,))
+    else:
+        cur.execute(LIST_SESSIONS_QUERY.format(where="WHERE (s.date, s.id) < (?, ?)"),
+                    (before[0], before[1], limit + 1))
+    rows = cur.fetchall()
+
+    # Une ligne de plus que demandé indique qu'il existe une page suivante
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = format_cursor(rows[-1][2], rows[-1][0])
+    return rows, next_cursor
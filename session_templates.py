@@ -0,0 +1,106 @@
+"""
+Chargement des templates de séance (pré-remplissage de la page de suivi).
+
+Deux sources :
+- la dernière séance enregistrée sous un nom (``/start-session/<nom>``),
+  avec ses exercices et leurs séries ;
+- une séance de programme (``/programme/start-seance/<id>``), avec le
+  nombre de séries et de répétitions prévu pour chaque exercice.
+
+Chaque template est chargé en une seule requête (séance, exercices et séries
+joints) puis regroupé par exercice avec ``itertools.groupby`` : les lignes
+arrivent déjà triées par exercice. La dernière séance d'un nom est trouvée
+par l'index ``idx_sessions_name_date``.
+
+Les traces passent par le logger ``session_templates`` au niveau DEBUG.
+"""
+
+import logging
+from itertools import groupby
+from operator import itemgetter
+
+from programme_parser import strip_html
+
+logger = logging.getLogger(__name__)
+
+# Séries proposées quand l'exercice du programme n'en précise pas
+DEFAULT_SET_COUNT = 3
+DEFAULT_REPS = '8-12'
+
+# Dernière séance du nom (id décroissant pour départager deux séances de même date)
+SESSION_TEMPLATE_QUERY = """
+    WITH last_session AS (
+        SELECT id FROM sessions
+        WHERE name = ?
+        ORDER BY date DESC, id DESC
+        LIMIT 1
+    )
+    SELECT e.id, e.exercise_name, st.set_number, st.reps, st.weight
+    FROM last_session ls
+    JOIN exercises e ON e.session_id = ls.id
+    LEFT JOIN sets st ON st.exercise_id = e.id
+    ORDER BY e.id, st.set_number
+"""
+
+PROGRAMME_TEMPLATE_QUERY = """
+    SELECT ps.nom_seance, pe.id, pe.nom_exercice, pe.series, pe.repetitions
+    FROM programme_seances ps
+    LEFT JOIN programme_exercices pe ON pe.seance_id = ps.id
+    WHERE ps.id = ?
+    ORDER BY pe.ordre, pe.id
+"""
+
+
+def load_session_template(cur, session_name):
+    """
+    Exercices et séries de la dernière séance enregistrée sous ce nom.
+
+    Returns:
+        list: [{'name': exercice, 'sets': [{'number', 'reps', 'weight'}]}],
+        vide si aucune séance ne porte ce nom
+    """
+    cur.execute(SESSION_TEMPLATE_QUERY, (session_name,))
+    rows = cur.fetchall()
+
+    template = []
+    # Regroupement par id d'exercice : deux exercices de même nom restent distincts
+    for _, exercise_rows in groupby(rows, key=itemgetter(0)):
+        exercise_rows = list(exercise_rows)
+        template.append({
+            'name': exercise_rows[0][1],
+            'sets': [
+                {'number': set_number, 'reps': reps, 'weight': weight}
+                for _, _, set_number, reps, weight in exercise_rows
+                if set_number is not None
+            ],
+        })
+
+    logger.debug("Template '%s': %d exercice(s), %d ligne(s)", session_name, len(template), len(rows))
+    return template
+
+
+def load_programme_template(cur, seance_id):
+    """
+    Nom et exercices d'une séance de programme, avec les séries prévues.
+
+    Returns:
+        tuple: (nom de la séance sans balises HTML, exercices au format de
+        load_session_template), ou None si la séance n'existe pas
+    """
+    cur.execute(PROGRAMME_TEMPLATE_QUERY, (seance_id,))
+    rows = cur.fetchall()
+    if not rows:
+        return None
+
+    nom_seance = strip_html(rows[0][0])
+    template = []
+    for _, nom_exercice, series, repetitions in (row[1:] for row in rows if row[1] is not None):
+        set_count = series if series else DEFAULT_SET_COUNT
+        reps = repetitions if series and repetitions else DEFAULT_REPS
+        template.append({
+            'name': nom_exercice,
+            'sets': [{'reps': reps, 'weight': ''} for _ in range(set_count)],
+        })
+
+    logger.debug("Séance de programme %s ('%s'): %d exercice(s)", seance_id, nom_seance, len(template))
+    return nom_seance, template
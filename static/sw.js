@@ -1,37 +1,58 @@
 // Service Worker pour AI Fitness Coach PWA
-const CACHE_NAME = 'fitness-coach-v1.2.0';
-const STATIC_CACHE = 'static-cache-v1';
-const DYNAMIC_CACHE = 'dynamic-cache-v1';
+//
+// Caches versionnés et bornés (les plus anciennes entrées sont évincées) :
+// - STATIC_CACHE  : CSS, JS, icônes, polices (cache first) ;
+// - PAGES_CACHE   : pages HTML (stale-while-revalidate : réponse immédiate
+//                   depuis le cache, rafraîchie en arrière-plan ; le serveur
+//                   répond 304 via ETag si rien n'a changé) ;
+// - RUNTIME_CACHE : autres GET (API de lecture), network first.
+// Changer CACHE_VERSION supprime tous les caches de la version précédente.
+//
+// Hors ligne, l'enregistrement d'une séance (POST /track) est placé dans une
+// file IndexedDB (OUTBOX_STORE) puis rejoué vers POST /api/sessions par
+// Background Sync (ou au retour du réseau si le navigateur ne le gère pas).
+// Chaque séance porte le client_id du formulaire, renvoyé à chaque
+// tentative : le serveur ignore les séances déjà reçues.
+const CACHE_VERSION = 'v2.1.1';
+const CACHE_NAME = `fitness-coach-${CACHE_VERSION}`;
+const STATIC_CACHE = `static-${CACHE_VERSION}`;
+const PAGES_CACHE = `pages-${CACHE_VERSION}`;
+const RUNTIME_CACHE = `runtime-${CACHE_VERSION}`;
+
+// Nombre maximal d'entrées par cache (éviction des moins récemment utilisées)
+const CACHE_LIMITS = {
+  [STATIC_CACHE]: 60,
+  [PAGES_CACHE]: 25,
+  [RUNTIME_CACHE]: 50
+};
 
 // Ressources à mettre en cache immédiatement
 const STATIC_ASSETS = [
-  '/',
-  '/ai',
-  '/track',
-  '/progress',
   '/static/css/style.css',
   '/static/manifest.json',
   // Polices Google Fonts (si utilisées)
   'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap'
 ];
 
-// Ressources dynamiques à mettre en cache après la première utilisation
-const DYNAMIC_ASSETS = [
-  '/static/screenshots/'
-];
+// Pages servies en stale-while-revalidate (les autres pages restent en network first)
+const PAGES = ['/', '/ai', '/track', '/progress', '/programme', '/sessions'];
+
+// File des séances enregistrées hors ligne
+const OUTBOX_DB = 'fitness-coach';
+const OUTBOX_STORE = 'outbox';
+const OUTBOX_SYNC_TAG = 'session-outbox';
 
 // Installation du Service Worker
 self.addEventListener('install', event => {
   console.log('Service Worker: Installation...');
   
   event.waitUntil(
-    caches.open(STATIC_CACHE)
-      .then(cache => {
-        console.log('Service Worker: Cache statique ouvert');
-        return cache.addAll(STATIC_ASSETS);
-      })
+    Promise.all([
+      caches.open(STATIC_CACHE).then(cache => cache.addAll(STATIC_ASSETS)),
+      caches.open(PAGES_CACHE).then(cache => cache.addAll(PAGES))
+    ])
       .then(() => {
-        console.log('Service Worker: Ressources statiques mises en cache');
+        console.log('Service Worker: Ressources statiques et pages mises en cache');
         return self.skipWaiting(); // Force l'activation immédiate
       })
       .catch(error => {
@@ -49,8 +70,8 @@ self.addEventListener('activate', event => {
       .then(cacheNames => {
         return Promise.all(
           cacheNames.map(cacheName => {
-            // Supprimer les anciens caches
-            if (cacheName !== STATIC_CACHE && cacheName !== DYNAMIC_CACHE) {
+            // Supprimer les caches des versions précédentes
+            if (!(cacheName in CACHE_LIMITS)) {
               console.log('Service Worker: Suppression ancien cache:', cacheName);
               return caches.delete(cacheName);
             }
@@ -61,6 +82,10 @@ self.addEventListener('activate', event => {
         console.log('Service Worker: Nettoyage terminé');
         return self.clients.claim(); // Prendre le contrôle immédiatement
       })
+      // Séances restées en file (navigateur fermé avant la synchronisation)
+      .then(() => replayOutbox().catch(error => {
+        console.log('Service Worker: File hors ligne non vidée:', error);
+      }))
   );
 });
 
@@ -74,20 +99,43 @@ self.addEventListener('fetch', event => {
     return;
   }
 
+  // Enregistrement d'une séance : mise en file si le réseau est indisponible
+  if (request.method === 'POST' && url.origin === self.location.origin && url.pathname === '/track') {
+    event.respondWith(submitSession(request));
+    return;
+  }
+
+  // Les autres envois modifient les données : les pages en cache sont périmées
+  if (request.method !== 'GET') {
+    event.waitUntil(caches.delete(PAGES_CACHE));
+    return;
+  }
+
+  // Ne jamais intercepter les jobs IA (polling et flux SSE)
+  if (url.pathname.startsWith('/api/ai/')) {
+    return;
+  }
+
   // Stratégie Cache First pour les ressources statiques
   if (isStaticAsset(request.url)) {
     event.respondWith(cacheFirst(request));
     return;
   }
 
-  // Stratégie Network First pour les pages HTML et API
-  if (request.destination === 'document' || request.url.includes('/api/')) {
-    event.respondWith(networkFirst(request));
-    return;
+  if (request.destination === 'document' && url.origin === self.location.origin) {
+    // Pages de lecture : réponse du cache, rafraîchie en arrière-plan
+    if (PAGES.includes(url.pathname) && !url.search) {
+      event.respondWith(staleWhileRevalidate(event, request));
+      return;
+    }
+    // Liens d'action (activer, dupliquer, cocher une séance...) : pages en cache périmées
+    if (url.pathname.startsWith('/programme/') && !url.pathname.startsWith('/programme/start-seance/')) {
+      event.waitUntil(caches.delete(PAGES_CACHE));
+    }
   }
 
-  // Stratégie Cache First par défaut
-  event.respondWith(cacheFirst(request));
+  // Stratégie Network First pour les autres pages et l'API
+  event.respondWith(networkFirst(request));
 });
 
 // Vérifier si c'est une ressource statique
@@ -102,52 +150,82 @@ function isStaticAsset(url) {
          url.includes('fonts.googleapis.com');
 }
 
+// Mise en cache d'une réponse valide, puis éviction des entrées les plus anciennes.
+// Les réponses no-store (pages affichant un message flash) ne sont jamais gardées.
+async function putInCache(cacheName, request, response) {
+  const cacheControl = response.headers.get('Cache-Control') || '';
+  if (response.status !== 200 || response.redirected || cacheControl.includes('no-store')) {
+    return;
+  }
+  const cache = await caches.open(cacheName);
+  await cache.put(request, response);
+  await trimCache(cacheName);
+}
+
+// Les clés sont dans l'ordre d'insertion ; chaque lecture remet l'entrée en fin
+// de liste (putInCache ou touch), les premières sont donc les moins récemment utilisées
+async function trimCache(cacheName) {
+  const cache = await caches.open(cacheName);
+  const keys = await cache.keys();
+  const excess = keys.length - CACHE_LIMITS[cacheName];
+  for (let i = 0; i < excess; i++) {
+    await cache.delete(keys[i]);
+  }
+}
+
+async function touch(cacheName, request, cachedResponse) {
+  const cache = await caches.open(cacheName);
+  await cache.delete(request);
+  await cache.put(request, cachedResponse);
+}
+
 // Stratégie Cache First
 async function cacheFirst(request) {
   try {
-    const cachedResponse = await caches.match(request);
+    const cachedResponse = await caches.match(request, { cacheName: STATIC_CACHE });
     if (cachedResponse) {
-      console.log('Service Worker: Ressource servie depuis le cache:', request.url);
+      touch(STATIC_CACHE, request, cachedResponse.clone());
       return cachedResponse;
     }
 
     console.log('Service Worker: Ressource non trouvée en cache, récupération réseau:', request.url);
     const networkResponse = await fetch(request);
-    
-    // Mettre en cache si la réponse est valide
-    if (networkResponse.status === 200) {
-      const cache = await caches.open(DYNAMIC_CACHE);
-      cache.put(request, networkResponse.clone());
-    }
-    
+    putInCache(STATIC_CACHE, request, networkResponse.clone());
     return networkResponse;
   } catch (error) {
     console.error('Service Worker: Erreur Cache First:', error);
-    
-    // Page de fallback pour les erreurs de réseau
-    if (request.destination === 'document') {
-      return caches.match('/') || new Response('Application hors ligne', {
-        status: 503,
-        headers: { 'Content-Type': 'text/plain; charset=utf-8' }
-      });
-    }
-    
     throw error;
   }
 }
 
+// Stratégie Stale-While-Revalidate (pages HTML)
+async function staleWhileRevalidate(event, request) {
+  const cachedResponse = await caches.match(request, { cacheName: PAGES_CACHE });
+  const networkUpdate = fetch(request)
+    .then(async networkResponse => {
+      await putInCache(PAGES_CACHE, request, networkResponse.clone());
+      return networkResponse;
+    });
+
+  if (cachedResponse) {
+    console.log('Service Worker: Page servie depuis le cache, rafraîchissement:', request.url);
+    event.waitUntil(networkUpdate.catch(() => {}));
+    return cachedResponse;
+  }
+
+  try {
+    return await networkUpdate;
+  } catch (error) {
+    return offlineFallback(request, error);
+  }
+}
+
 // Stratégie Network First
 async function networkFirst(request) {
   try {
     console.log('Service Worker: Tentative réseau:', request.url);
     const networkResponse = await fetch(request);
-    
-    // Mettre en cache si la réponse est valide
-    if (networkResponse.status === 200) {
-      const cache = await caches.open(DYNAMIC_CACHE);
-      cache.put(request, networkResponse.clone());
-    }
-    
+    putInCache(request.destination === 'document' ? PAGES_CACHE : RUNTIME_CACHE, request, networkResponse.clone());
     return networkResponse;
   } catch (error) {
     console.log('Service Worker: Réseau indisponible, tentative cache:', request.url);
@@ -156,16 +234,156 @@ async function networkFirst(request) {
     if (cachedResponse) {
       return cachedResponse;
     }
-    
-    // Page de fallback
-    if (request.destination === 'document') {
-      const fallbackResponse = await caches.match('/');
-      if (fallbackResponse) {
-        return fallbackResponse;
+    return offlineFallback(request, error);
+  }
+}
+
+async function offlineFallback(request, error) {
+  // Page de fallback
+  if (request.destination === 'document') {
+    const fallbackResponse = await caches.match('/', { cacheName: PAGES_CACHE });
+    return fallbackResponse || new Response('Application hors ligne', {
+      status: 503,
+      headers: { 'Content-Type': 'text/plain; charset=utf-8' }
+    });
+  }
+  throw error;
+}
+
+// ============================================
+// FILE DES SÉANCES HORS LIGNE (IndexedDB)
+// ============================================
+
+function openOutbox() {
+  return new Promise((resolve, reject) => {
+    const open = indexedDB.open(OUTBOX_DB, 1);
+    open.onupgradeneeded = () => {
+      open.result.createObjectStore(OUTBOX_STORE, { keyPath: 'client_id' });
+    };
+    open.onsuccess = () => resolve(open.result);
+    open.onerror = () => reject(open.error);
+  });
+}
+
+async function outboxRequest(mode, operation) {
+  const db = await openOutbox();
+  try {
+    return await new Promise((resolve, reject) => {
+      const transaction = db.transaction(OUTBOX_STORE, mode);
+      const request = operation(transaction.objectStore(OUTBOX_STORE));
+      transaction.oncomplete = () => resolve(request.result);
+      transaction.onerror = () => reject(transaction.error);
+    });
+  } finally {
+    db.close();
+  }
+}
+
+const outboxAdd = entry => outboxRequest('readwrite', store => store.put(entry));
+const outboxAll = () => outboxRequest('readonly', store => store.getAll());
+const outboxDelete = clientId => outboxRequest('readwrite', store => store.delete(clientId));
+
+// Formulaire de /track converti au format de POST /api/sessions
+function sessionFromForm(form) {
+  const session = {
+    // Identifiant généré par la page (le même si le formulaire était déjà parti)
+    client_id: form.get('client_id') || self.crypto.randomUUID(),
+    name: form.get('session_name') || 'Séance',
+    // Heure UTC de l'enregistrement, comme CURRENT_TIMESTAMP côté serveur
+    date: new Date().toISOString().slice(0, 19),
+    exercises: JSON.parse(form.get('exercises_data') || '[]')
+  };
+  const programmeSeanceId = parseInt(form.get('programme_seance_id'), 10);
+  if (!Number.isNaN(programmeSeanceId)) {
+    session.programme_seance_id = programmeSeanceId;
+  }
+  return session;
+}
+
+async function submitSession(request) {
+  const queuedCopy = request.clone();
+  try {
+    const response = await fetch(request);
+    await caches.delete(PAGES_CACHE);
+    return response;
+  } catch (error) {
+    const form = await queuedCopy.formData();
+    if (form.get('action') !== 'create_session') {
+      throw error;
+    }
+    const session = sessionFromForm(form);
+    await outboxAdd(session);
+    console.log('Service Worker: Séance mise en file hors ligne:', session.client_id);
+    if (self.registration.sync) {
+      await self.registration.sync.register(OUTBOX_SYNC_TAG).catch(() => {});
+    }
+    return offlineSavedPage(session);
+  }
+}
+
+function offlineSavedPage(session) {
+  const name = session.name.replace(/[&<>"]/g, c => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' })[c]);
+  return new Response(`<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Séance en attente - AI Fitness Coach</title>
+<style>
+body { font-family: Inter, system-ui, sans-serif; background: #0f172a; color: #e2e8f0; display: flex; min-height: 100vh; align-items: center; justify-content: center; margin: 0; }
+.card { background: #1e293b; border-radius: 16px; padding: 2rem; max-width: 420px; text-align: center; }
+a { color: #60a5fa; }
+</style>
+</head>
+<body>
+<div class="card">
+<h1>📴 Séance enregistrée hors ligne</h1>
+<p>« ${name} » sera envoyée automatiquement au retour du réseau.</p>
+<p><a href="/">Retour à l'accueil</a></p>
+</div>
+</body>
+</html>`, {
+    status: 202,
+    headers: { 'Content-Type': 'text/html; charset=utf-8' }
+  });
+}
+
+// Rejoue la file : une séance n'est retirée qu'une fois acceptée (201) ou
+// rejetée définitivement (400) ; les autres erreurs la laissent en file
+async function replayOutbox() {
+  const sessions = await outboxAll();
+  let sent = 0;
+  let failure = null;
+  for (const session of sessions) {
+    try {
+      const response = await fetch('/api/sessions', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(session)
+      });
+      if (response.status === 201 || response.status === 400) {
+        if (response.status === 400) {
+          console.error('Service Worker: Séance rejetée par le serveur:', session.client_id, await response.text());
+        }
+        await outboxDelete(session.client_id);
+        sent += response.status === 201 ? 1 : 0;
+      } else {
+        failure = new Error(`HTTP ${response.status}`);
       }
+    } catch (error) {
+      failure = error;
+      break;
     }
-    
-    throw error;
+  }
+
+  if (sent) {
+    await caches.delete(PAGES_CACHE);
+    const windows = await self.clients.matchAll({ type: 'window' });
+    windows.forEach(client => client.postMessage({ type: 'OUTBOX_SYNCED', count: sent }));
+  }
+  // Une erreur fait replanifier la synchronisation par le navigateur
+  if (failure) {
+    throw failure;
   }
 }
 
@@ -179,31 +397,24 @@ self.addEventListener('message', event => {
   if (event.data && event.data.type === 'GET_VERSION') {
     event.ports[0].postMessage({ version: CACHE_NAME });
   }
+
+  // Retour du réseau signalé par la page (navigateurs sans Background Sync)
+  if (event.data && event.data.type === 'REPLAY_OUTBOX') {
+    event.waitUntil(replayOutbox().catch(error => {
+      console.log('Service Worker: File hors ligne non vidée:', error);
+    }));
+  }
 });
 
-// Synchronisation en arrière-plan (pour les futures fonctionnalités)
+// Synchronisation en arrière-plan : envoi des séances en file
 self.addEventListener('sync', event => {
   console.log('Service Worker: Synchronisation en arrière-plan:', event.tag);
   
-  if (event.tag === 'background-sync') {
-    event.waitUntil(doBackgroundSync());
+  if (event.tag === OUTBOX_SYNC_TAG) {
+    event.waitUntil(replayOutbox());
   }
 });
 
-async function doBackgroundSync() {
-  try {
-    // Ici vous pourriez synchroniser les données hors ligne
-    console.log('Service Worker: Synchronisation des données...');
-    
-    // Exemple: envoyer les données en attente au serveur
-    // const pendingData = await getStoredData();
-    // await sendDataToServer(pendingData);
-    
-  } catch (error) {
-    console.error('Service Worker: Erreur lors de la synchronisation:', error);
-  }
-}
-
 // Notification push (pour les futures fonctionnalités)
 self.addEventListener('push', event => {
   console.log('Service Worker: Notification push reçue');
@@ -0,0 +1,218 @@
+"""
+Statistiques de performance par exercice.
+
+La table ``exercise_stats`` contient une ligne par exercice du catalogue,
+identifié par ``catalog_id`` : les variantes d'un même nom y sont regroupées
+(voir exercise_catalog). Chaque ligne porte le poids max, le meilleur 1RM, le
+meilleur volume sur une série, le nombre de séries et la dernière date.
+Elle est mise à jour de façon incrémentale dans la transaction qui enregistre
+une séance, et peut être entièrement reconstruite depuis les séries (backfill).
+"""
+
+STATS_COLUMNS = (
+    'max_weight', 'max_1rm', 'best_1rm_reps', 'best_1rm_weight',
+    'best_volume_reps', 'best_volume_weight', 'best_volume_total',
+    'total_sets', 'has_actual_1rm', 'last_date',
+)
+
+
+def calculate_1rm(weight, reps):
+    """
+    Calcule le 1RM en utilisant la formule d'Epley
+    1RM = weight * (1 + reps/30)
+    """
+    try:
+        weight = float(weight) if weight is not None else 0.0
+        reps = int(reps) if reps is not None else 1
+
+        if weight <= 0 or reps <= 0:
+            return 0.0
+
+        if reps == 1:
+            return weight
+        elif reps <= 12:  # Formule fiable jusqu'à 12 reps
+            return round(weight * (1 + reps / 30), 1)
+        else:  # Pour plus de 12 reps, estimation moins précise
+            return round(weight * (1 + reps / 30), 1)
+    except (ValueError, TypeError, ZeroDivisionError) as e:
+        print(f"Erreur dans calculate_1rm: {e}, weight={weight}, reps={reps}")
+        return 0.0
+
+
+def _new_stats(reps, weight, date):
+    return {
+        'max_weight': weight,
+        'max_1rm': calculate_1rm(weight, reps),
+        'best_1rm_reps': reps,
+        'best_1rm_weight': weight,
+        'best_volume_reps': reps,
+        'best_volume_weight': weight,
+        'best_volume_total': reps * weight,
+        'total_sets': 1,
+        'has_actual_1rm': reps == 1,
+        'last_date': date,
+    }
+
+
+def _merge_set(stats, reps, weight, date, prefer_new):
+    """
+    Intègre une série dans les statistiques d'un exercice.
+
+    prefer_new: en cas d'égalité, la série intégrée remplace le record
+    (utilisé quand elle est plus récente que celles déjà comptées).
+    """
+    current_1rm = calculate_1rm(weight, reps)
+    current_volume = reps * weight
+
+    if weight > stats['max_weight']:
+        stats['max_weight'] = weight
+
+    if current_1rm > stats['max_1rm'] or (prefer_new and current_1rm == stats['max_1rm']):
+        stats['max_1rm'] = current_1rm
+        stats['best_1rm_reps'] = reps
+        stats['best_1rm_weight'] = weight
+        stats['has_actual_1rm'] = reps == 1
+
+    if current_volume > stats['best_volume_total'] or (prefer_new and current_volume == stats['best_volume_total']):
+        stats['best_volume_reps'] = reps
+        stats['best_volume_weight'] = weight
+        stats['best_volume_total'] = current_volume
+
+    stats['total_sets'] += 1
+    if date is not None and (stats['last_date'] is None or str(date) > str(stats['last_date'])):
+        stats['last_date'] = date
+
+
+def _is_countable(reps, weight):
+    """Seules les séries avec des répétitions et une charge sont prises en compte"""
+    return reps is not None and weight is not None and reps > 0 and weight > 0
+
+
+def _row_to_stats(row):
+    stats = dict(zip(STATS_COLUMNS, row[1:]))
+    stats['has_actual_1rm'] = bool(stats['has_actual_1rm'])
+    return stats
+
+
+def _write_stats(cur, stats_by_exercise):
+    # UPSERT et non INSERT OR REPLACE : les autres colonnes de la ligne (maxima des records) sont conservées
+    cur.executemany(f"""
+        INSERT INTO exercise_stats (catalog_id, {', '.join(STATS_COLUMNS)})
+        VALUES (?, {', '.join('?' for _ in STATS_COLUMNS)})
+        ON CONFLICT (catalog_id) DO UPDATE SET
+            {', '.join(f'{col} = excluded.{col}' for col in STATS_COLUMNS)}
+    """, [
+        (catalog_id, *(int(stats[col]) if col == 'has_actual_1rm' else stats[col] for col in STATS_COLUMNS))
+        for catalog_id, stats in stats_by_exercise.items()
+    ])
+
+
+def update_exercise_stats(cur, session_date, performed_sets):
+    """
+    Met à jour exercise_stats avec les séries d'une séance qui vient d'être enregistrée.
+
+    À appeler dans la même transaction que l'insertion des séries.
+
+    Args:
+        cur: curseur de la transaction en cours
+        session_date: date de la séance
+        performed_sets: liste de tuples (catalog_id, reps, weight)
+    """
+    performed_sets = [
+        (catalog_id, reps, weight) for catalog_id, reps, weight in performed_sets
+        if catalog_id is not None and _is_countable(reps, weight)
+    ]
+    if not performed_sets:
+        return
+
+    catalog_ids = sorted({catalog_id for catalog_id, _, _ in performed_sets})
+    cur.execute(f"""
+        SELECT catalog_id, {', '.join(STATS_COLUMNS)}
+        FROM exercise_stats
+        WHERE catalog_id IN ({', '.join('?' for _ in catalog_ids)})
+    """, catalog_ids)
+    stats_by_exercise = {row[0]: _row_to_stats(row) for row in cur.fetchall()}
+
+    for catalog_id, reps, weight in performed_sets:
+        stats = stats_by_exercise.get(catalog_id)
+        if stats is None:
+            stats_by_exercise[catalog_id] = _new_stats(reps, weight, session_date)
+        else:
+            # Une séance rétro-datée ne doit pas l'emporter sur un record plus récent à égalité
+            prefer_new = stats['last_date'] is None or str(session_date) >= str(stats['last_date'])
+            _merge_set(stats, reps, weight, session_date, prefer_new)
+
+    _write_stats(cur, {catalog_id: stats_by_exercise[catalog_id] for catalog_id in catalog_ids})
+
+
+def register_functions(conn):
+    """Enregistre calculate_1rm comme fonction SQL déterministe sur la connexion"""
+    conn.create_function('calculate_1rm', 2, calculate_1rm, deterministic=True)
+
+
+def rebuild_exercise_stats(conn, columns=None):
+    """
+    Recalcule entièrement exercise_stats depuis les séries enregistrées.
+
+    Les séries sont chargées une fois en colonnes et agrégées par
+    analytics.exercise_summary. À égalité, la série la plus récente reste le
+    record, comme pour la mise à jour incrémentale.
+
+    Args:
+        columns: séries déjà chargées par analytics.load_sets (sinon chargées ici)
+
+    Returns:
+        int: nombre d'exercices recalculés
+    """
+    # Import local : analytics importe calculate_1rm depuis ce module
+    from analytics import exercise_summary, load_sets
+
+    cur = conn.cursor()
+    if columns is None:
+        columns = load_sets(cur)
+    summary = exercise_summary(columns)
+    cur.execute("DELETE FROM exercise_stats")
+    _write_stats(cur, summary)
+    return len(summary)
+
+
+def aggregate_training_history(cur):
+    """
+    Statistiques par exercice pour le contexte du coach IA.
+
+    Toutes les séries comptent, y compris celles sans charge (poids du corps).
+
+    Returns:
+        list: [(exercise_name, stats)] triés par 1RM décroissant, où stats contient
+        max_weight, max_1rm, occurrences, last_reps et last_weight (dernière série
+        en date) et improvements (nombre de fois où le meilleur 1RM a été battu)
+    """
+    from analytics import exercise_summary, load_sets
+
+    summary = exercise_summary(load_sets(cur, valid_only=False))
+    cur.execute("SELECT id, name FROM exercise_catalog")
+    names = dict(cur.fetchall())
+    history = [
+        (names[catalog_id], {
+            'max_weight': stats['max_weight'],
+            'max_1rm': stats['max_1rm'],
+            'occurrences': stats['total_sets'],
+            'last_reps': stats['last_reps'],
+            'last_weight': stats['last_weight'],
+            'improvements': stats['improvements'],
+        })
+        for catalog_id, stats in summary.items()
+    ]
+    history.sort(key=lambda item: (-item[1]['max_1rm'], item[0]))
+    return history
+
+
+def load_exercise_stats(cur):
+    """Retourne [(nom de l'exercice au catalogue, stats)] triés par 1RM décroissant"""
+    cur.execute(f"""
+        SELECT c.name, {', '.join('st.' + col for col in STATS_COLUMNS)}
+        FROM exercise_stats st
+        JOIN exercise_catalog c ON c.id = st.catalog_id
+        ORDER BY st.max_1rm DESC, c.name
+    """)
+    return [(row[0], _row_to_stats(row)) for row in cur.fetchall()]
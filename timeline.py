@@ -0,0 +1,170 @@
+"""
+Courbes de progression par exercice (API des graphiques).
+
+Les séries d'un exercice du catalogue sont agrégées en SQL par période
+(jour, semaine ou mois) : 1RM estimé, série la plus lourde et tonnage.
+Seule une ligne par période remonte en Python.
+
+Sur un long historique, la courbe est ensuite réduite à un nombre de points
+fixe avec l'algorithme LTTB (Largest-Triangle-Three-Buckets), qui garde les
+points les plus significatifs visuellement (pics, creux, ruptures de pente)
+au lieu d'un échantillonnage régulier qui lisserait les records.
+"""
+
+from datetime import datetime, timedelta
+
+# Expression SQL du début de période pour chaque granularité (semaines du lundi)
+BUCKETS = {
+    'day': "date(s.date)",
+    'week': "date(s.date, '-6 days', 'weekday 1')",
+    'month': "strftime('%Y-%m-01', s.date)",
+}
+DEFAULT_BUCKET = 'week'
+
+# Nombre de points renvoyés par défaut / au maximum (LTTB au-delà)
+DEFAULT_POINT_BUDGET = 200
+MAX_POINT_BUDGET = 1000
+
+DATE_FORMAT = '%Y-%m-%d'
+
+# Comme pour exercise_stats, les séries sont d'abord regroupées par
+# (période, reps, charge) : calculate_1rm n'est appelée qu'une fois par
+# combinaison distincte.
+PROGRESS_QUERY = """
+    WITH combos AS (
+        SELECT {bucket} AS bucket, st.reps, st.weight, COUNT(*) AS set_count
+        FROM exercises e
+        JOIN sessions s ON s.id = e.session_id
+        JOIN sets st ON st.exercise_id = e.id
+        WHERE e.catalog_id = ?
+          AND st.reps > 0 AND st.weight > 0
+          {where}
+        GROUP BY bucket, st.reps, st.weight
+    ),
+    ranked AS (
+        SELECT *,
+               calculate_1rm(weight, reps) AS one_rm,
+               ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY weight DESC, reps DESC) AS rank_top
+        FROM combos
+        WHERE bucket IS NOT NULL
+    )
+    SELECT bucket,
+           MAX(one_rm),
+           MAX(CASE WHEN rank_top = 1 THEN weight END),
+           MAX(CASE WHEN rank_top = 1 THEN reps END),
+           SUM(reps * weight * set_count),
+           SUM(set_count)
+    FROM ranked
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+
+def parse_day(value):
+    """Date "AAAA-MM-JJ" des paramètres from/to (ValueError si invalide)"""
+    return datetime.strptime(value.strip(), DATE_FORMAT)
+
+
+def load_progress(cur, catalog_id, bucket=DEFAULT_BUCKET, date_from=None, date_to=None):
+    """
+    Agrégats par période pour un exercice du catalogue.
+
+    Args:
+        date_from, date_to: bornes incluses (datetime, à la journée) ou None
+
+    Returns:
+        list: [(début de période, 1RM estimé, charge de la série la plus
+        lourde, ses répétitions, tonnage, nombre de séries)] par date croissante
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"période inconnue: {bucket} (attendu: {', '.join(BUCKETS)})")
+
+    # Bornes sur la colonne brute (et non date(s.date)) pour rester comparables au format stocké
+    where = []
+    params = [catalog_id]
+    if date_from is not None:
+        where.append("AND s.date >= ?")
+        params.append(date_from.strftime(DATE_FORMAT))
+    if date_to is not None:
+        where.append("AND s.date < ?")
+        params.append((date_to + timedelta(days=1)).strftime(DATE_FORMAT))
+
+    cur.execute(PROGRESS_QUERY.format(bucket=BUCKETS[bucket], where=' '.join(where)), params)
+    return cur.fetchall()
+
+
+def downsample_lttb(points, threshold):
+    """
+    Réduit une série à threshold points (Largest-Triangle-Three-Buckets).
+
+    Args:
+        points: liste de couples (x, y) triés par x croissant
+        threshold: nombre de points souhaité (au moins 3)
+
+    Returns:
+        list: indices des points conservés (le premier et le dernier toujours inclus)
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    selected = [0]
+    # Les points intérieurs sont répartis en threshold - 2 paquets
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Point moyen du paquet suivant (le dernier point pour le dernier paquet)
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        span = next_end - next_start
+        avg_x = sum(points[i][0] for i in range(next_start, next_end)) / span
+        avg_y = sum(points[i][1] for i in range(next_start, next_end)) / span
+
+        # Point du paquet courant formant le plus grand triangle avec le précédent et la moyenne
+        prev_x, prev_y = points[previous]
+        best_area = -1.0
+        best = start
+        for i in range(start, end):
+            x, y = points[i]
+            area = abs((prev_x - avg_x) * (y - prev_y) - (prev_x - x) * (avg_y - prev_y))
+            if area > best_area:
+                best_area = area
+                best = i
+        selected.append(best)
+        previous = best
+
+    selected.append(count - 1)
+    return selected
+
+
+def progress_series(cur, catalog_id, bucket=DEFAULT_BUCKET, date_from=None, date_to=None,
+                    max_points=DEFAULT_POINT_BUDGET):
+    """
+    Courbe de progression prête pour l'API : agrégats par période, réduits
+    à max_points points (LTTB sur le 1RM estimé) si nécessaire.
+
+    Returns:
+        tuple: (points, nombre de périodes avant réduction)
+    """
+    rows = load_progress(cur, catalog_id, bucket, date_from, date_to)
+    # Abscisse en jours : l'écart entre deux périodes compte, pas seulement leur rang
+    indices = downsample_lttb(
+        [(datetime.strptime(row[0], DATE_FORMAT).toordinal(), row[1]) for row in rows],
+        max_points,
+    )
+    points = [
+        {
+            'date': date,
+            'e1rm': one_rm,
+            'top_set': {'weight': top_weight, 'reps': top_reps},
+            'tonnage': round(tonnage, 1),
+            'sets': set_count,
+        }
+        for date, one_rm, top_weight, top_reps, tonnage, set_count in (rows[i] for i in indices)
+    ]
+    return points, len(rows)